@@ -3,24 +3,47 @@ Lead-Tool V4.0 - Web Edition
 Flask-basierte Web-App mit identischen Funktionen wie Desktop-Version
 """
 import os
+import io
+import csv
 import json
+import itertools
 import logging
 import threading
+import time
+import uuid
 import pandas as pd
 from datetime import datetime
-from functools import wraps
+from functools import wraps, partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, send_file, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, send_file, flash, Response, stream_with_context
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.datastructures import MultiDict
+from sqlalchemy.orm import load_only, undefer, undefer_group
 
 # Backend-Module (Original-Code!)
-from models_v3 import DatabaseV3, CompanyV3, Project, Base
+from models_v3 import (DatabaseV3, CompanyV3, Project, Base, ORIGINAL_ROW_KEY,
+                       STATE_HAS_NAMES, STATE_HAS_COMPLIMENT, STATE_COMPLETE,
+                       ProjectStats, PROJECT_STATS_COUNTERS, RATING_BUCKETS,
+                       project_columns, load_project_columns, unpack_original_row)
 from compliment_generator import ComplimentGenerator
-from impressum_scraper_ultimate import ImpressumScraperUltimate
+from impressum_scraper_ultimate import ImpressumScraperUltimate, ContactResult
 from prompt_manager import PromptManager
 from template_compliments import generate_template_compliment
+from name_lexicon import get_name_lexicon
+from contact_cache import get_cached_contact, store_contact
+from lead_search import apply_search
+from lead_counts import CountCache
+from rate_limiter import get_rate_limiter
+from job_queue import JobQueue, JobWorkerPool, LeadBatch, FINISHED_STATUSES, priority_for
+from scheduler import scrape_slots, llm_slots
+from pipeline import Pipeline, Stage
+from lead_import import (lead_records, insert_leads, resolve_columns, read_columns, read_csv_chunks,
+                         sniff_encoding, estimate_rows)
+from selections import (create_selection, get_selection, selection_filter, iter_selection_ids,
+                        selection_position)
 
 # Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -69,8 +92,8 @@ def get_prompt_manager():
         _prompt_manager = PromptManager()
     return _prompt_manager
 
-# Background task tracking
-background_tasks = {}
+# Hintergrund-Jobs (persistent in der DB, für alle Gunicorn-Worker sichtbar)
+job_queue = JobQueue(db)
 
 # ============================================================
 # USER MODEL (Simple - kann erweitert werden)
@@ -127,25 +150,38 @@ def logout():
 def index():
     """Hauptseite - Lead-Übersicht"""
     session_db = db.get_session()
-    projects = session_db.query(Project).order_by(Project.created_at.desc()).all()
+    projects = _project_list(session_db)
     session_db.close()
     return render_template('index.html', projects=projects)
 
 # ============================================================
 # API: PROJECTS
 # ============================================================
+def _stats_dict(stats):
+    """ProjectStats -> JSON (Nullen, wenn das Projekt noch keine Leads hat)"""
+    return {column: getattr(stats, column) if stats else 0 for column in PROJECT_STATS_COUNTERS}
+
+
+def _project_list(session_db):
+    """Projekte mit Kennzahlen aus project_stats - eine Query, unabhängig von der Lead-Anzahl"""
+    rows = (session_db.query(Project, ProjectStats)
+            .outerjoin(ProjectStats, ProjectStats.project_id == Project.id)
+            .order_by(Project.created_at.desc()).all())
+    return [{
+        'id': p.id,
+        'name': p.name,
+        'lead_count': stats.total if stats else 0,
+        'stats': _stats_dict(stats),
+        'created_at': p.created_at.isoformat() if p.created_at else None
+    } for p, stats in rows]
+
+
 @app.route('/api/projects')
 @login_required
 def get_projects():
     """Liste aller Projekte"""
     session_db = db.get_session()
-    projects = session_db.query(Project).order_by(Project.created_at.desc()).all()
-    result = [{
-        'id': p.id,
-        'name': p.name,
-        'lead_count': p.lead_count,
-        'created_at': p.created_at.isoformat() if p.created_at else None
-    } for p in projects]
+    result = _project_list(session_db)
     session_db.close()
     return jsonify(result)
 
@@ -196,37 +232,22 @@ def delete_project(project_id):
 # ============================================================
 # API: LEADS
 # ============================================================
-@app.route('/api/leads')
-@login_required
-def get_leads():
-    """Leads mit Pagination und Filter - ALLE DB-Felder!"""
-    project_id = request.args.get('project_id', type=int)
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
-    search = request.args.get('search', '')
-    filter_type = request.args.get('filter', '')  # no_names, no_compliment, complete
-    category = request.args.get('category', '')  # Kategorie-Filter
-    min_rating = request.args.get('min_rating', type=float)
-    min_reviews = request.args.get('min_reviews', type=int)
-
-    session_db = db.get_session()
-    query = session_db.query(CompanyV3)
+def _apply_lead_filters(query, args):
+    """Filter der Lead-Liste (Projekt, Suche, Kategorie, Rating, Spezial-Filter) aus den Query-Parametern"""
+    project_id = args.get('project_id', type=int)
+    search = args.get('search', '')
+    filter_type = args.get('filter', '')  # no_names, no_compliment, complete
+    category = args.get('category', '')  # Kategorie-Filter
+    min_rating = args.get('min_rating', type=float)
+    min_reviews = args.get('min_reviews', type=int)
 
     # Project filter
     if project_id:
         query = query.filter(CompanyV3.project_id == project_id)
 
-    # Search filter
+    # Search filter (FTS5-Index, nach Relevanz sortiert)
     if search:
-        search_term = f'%{search}%'
-        query = query.filter(
-            (CompanyV3.name.ilike(search_term)) |
-            (CompanyV3.website.ilike(search_term)) |
-            (CompanyV3.first_name.ilike(search_term)) |
-            (CompanyV3.last_name.ilike(search_term)) |
-            (CompanyV3.email.ilike(search_term)) |
-            (CompanyV3.city.ilike(search_term))
-        )
+        query = apply_search(query, search, use_fts=db.search_enabled)
 
     # Kategorie-Filter
     if category:
@@ -240,39 +261,104 @@ def get_leads():
     if min_reviews is not None:
         query = query.filter(CompanyV3.review_count >= min_reviews)
 
-    # Spezial-Filter (wie im Original)
+    # Spezial-Filter (wie im Original) - über die indizierte Spalte enrichment_state
     if filter_type == 'no_names':
-        query = query.filter(
-            (CompanyV3.first_name == None) | (CompanyV3.first_name == '') |
-            (CompanyV3.last_name == None) | (CompanyV3.last_name == '')
-        )
+        query = query.filter(CompanyV3.enrichment_state.in_((0, STATE_HAS_COMPLIMENT)))
     elif filter_type == 'no_compliment':
-        query = query.filter(
-            (CompanyV3.compliment == None) | (CompanyV3.compliment == '')
-        )
+        query = query.filter(CompanyV3.enrichment_state.in_((0, STATE_HAS_NAMES)))
     elif filter_type == 'complete':
-        query = query.filter(
-            CompanyV3.first_name != None, CompanyV3.first_name != '',
-            CompanyV3.last_name != None, CompanyV3.last_name != '',
-            CompanyV3.compliment != None, CompanyV3.compliment != ''
-        )
+        query = query.filter(CompanyV3.enrichment_state == STATE_COMPLETE)
+    return query
+
 
-    # Count total
-    total = query.count()
+def _stats_total(session_db, args):
+    """
+    Anzahl aus project_stats, wenn die Filter das zulassen (Projekt, Spezial-Filter
+    oder Rating-Stufe) - sonst None. Kein Zählen über die Leads.
+    """
+    if args.get('search') or args.get('category') or args.get('min_reviews'):
+        return None
+    min_rating = args.get('min_rating', type=float)
+    filter_type = args.get('filter', '')
+    if min_rating is not None and (filter_type or min_rating not in RATING_BUCKETS):
+        return None
+    if filter_type not in ('', 'no_names', 'no_compliment', 'complete'):
+        return None
+
+    query = session_db.query(ProjectStats)
+    project_id = args.get('project_id', type=int)
+    if project_id:
+        query = query.filter(ProjectStats.project_id == project_id)
+    stats = query.all()
 
-    # Pagination
-    leads = query.offset((page - 1) * per_page).limit(per_page).all()
+    def total_of(*columns):
+        return sum(getattr(row, column) for row in stats for column in columns)
 
-    # Original-Spalten vom ersten Lead holen (für dynamische Tabelle)
-    original_columns = []
-    if leads and leads[0].attributes:
-        original_columns = leads[0].attributes.get('_original_columns', [])
+    if min_rating is not None:
+        return total_of(*RATING_BUCKETS[min_rating])
+    if filter_type == 'no_names':
+        return total_of('total') - total_of('with_names')
+    if filter_type == 'no_compliment':
+        return total_of('total') - total_of('with_compliment')
+    if filter_type == 'complete':
+        return total_of('complete')
+    return total_of('total')
+
+
+# Gefilterte Anzahl pro Filter-Signatur - nicht bei jedem Seitenwechsel neu zählen
+lead_count_cache = CountCache()
+lead_count_cache.watch(db.engine, CompanyV3.__tablename__)
+_PAGINATION_ARGS = ('page', 'per_page', 'after_id')
+# Spalten-Projektion der Lead-Tabelle und Exporte (website_text & Co. bleiben in der DB)
+LEAD_LIST_COLUMNS = (CompanyV3.id, CompanyV3.project_id, CompanyV3.first_name, CompanyV3.last_name,
+                     CompanyV3.compliment, CompanyV3.attributes)
+
+@app.route('/api/leads')
+@login_required
+def get_leads():
+    """
+    Leads mit Pagination und Filter - ALLE DB-Felder!
+
+    Keyset-Pagination: after_id = next_cursor der vorherigen Seite (Seite N
+    kostet so viel wie Seite 1). Ohne after_id bzw. bei Suche (Relevanz-
+    Sortierung) blättert page per OFFSET.
+    """
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 50, type=int)
+    after_id = request.args.get('after_id', type=int)
+    search = request.args.get('search', '')
+
+    session_db = db.get_session()
+    query = _apply_lead_filters(session_db.query(CompanyV3).options(load_only(*LEAD_LIST_COLUMNS)), request.args)
+
+    # Count total (gecacht je Filter-Signatur, invalidiert bei Schreibzugriffen)
+    count_key = tuple(sorted((key, value) for key, value in request.args.items(multi=True)
+                             if key not in _PAGINATION_ARGS))
+    total = _stats_total(session_db, request.args)
+    if total is None:
+        total = lead_count_cache.get(count_key, query.with_entities(CompanyV3.id).order_by(None).count)
+
+    # Pagination (eine Zeile mehr laden: gibt es eine nächste Seite?)
+    if search:
+        leads = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    else:
+        query = query.order_by(CompanyV3.id)
+        if after_id is not None:
+            query = query.filter(CompanyV3.id > after_id)
+        else:
+            query = query.offset((page - 1) * per_page)
+        leads = query.limit(per_page + 1).all()
+    has_more = len(leads) > per_page
+    leads = leads[:per_page]
+
+    # Original-Spalten der Projekte auf dieser Seite (eine Query), Header vom ersten Lead
+    columns_by_project = load_project_columns(session_db, {l.project_id for l in leads})
+    original_columns = columns_by_project.get(leads[0].project_id, []) if leads else []
 
     # DYNAMISCH: Alle Original-Daten + neue Felder zurückgeben
     leads_data = []
     for l in leads:
-        attrs = l.attributes or {}
-        original_data = attrs.get('_original_data', {})
+        original_data = unpack_original_row(l.attributes, columns_by_project.get(l.project_id, []))
 
         lead_dict = {
             'id': l.id,
@@ -289,78 +375,93 @@ def get_leads():
         'total': total,
         'page': page,
         'per_page': per_page,
-        'pages': (total + per_page - 1) // per_page
+        'pages': (total + per_page - 1) // per_page,
+        'has_more': has_more,
+        # Cursor für die nächste Seite (nur ohne Suche - dort zählt die Relevanz-Reihenfolge)
+        'next_cursor': leads[-1].id if has_more and not search else None
     }
 
     session_db.close()
     return jsonify(result)
 
-@app.route('/api/leads/ids')
+# ============================================================
+# API: SELECTIONS (serverseitige Auswahl statt ID-Listen im Browser)
+# ============================================================
+SELECTION_FILTER_KEYS = ('project_id', 'search', 'filter', 'category', 'min_rating', 'min_reviews')
+
+
+@app.route('/api/selections', methods=['POST'])
 @login_required
-def get_lead_ids():
-    """Alle Lead-IDs für Bulk-Auswahl (wie Original: select_all lädt alle IDs)"""
-    project_id = request.args.get('project_id', type=int)
-    search = request.args.get('search', '')
-    filter_type = request.args.get('filter', '')
-    category = request.args.get('category', '')
-    min_rating = request.args.get('min_rating', type=float)
-    min_reviews = request.args.get('min_reviews', type=int)
+def create_lead_selection():
+    """
+    Auswahl anlegen -> Token für Jobs und Exporte
 
+    Body: {"filters": {...wie /api/leads...}, "exclude_ids": [...]} (Alle auswählen)
+          oder {"lead_ids": [...]} (einzeln angehakte Leads)
+    """
+    data = request.json or {}
+    filters = data.get('filters')
     session_db = db.get_session()
-    query = session_db.query(CompanyV3.id)
+    try:
+        if filters is not None:
+            filters = {key: filters[key] for key in SELECTION_FILTER_KEYS if filters.get(key) not in (None, '')}
+            lead_query = _apply_lead_filters(session_db.query(CompanyV3.id), MultiDict(filters))
+            selection = create_selection(session_db, lead_query, exclude_ids=data.get('exclude_ids', []),
+                                         filters=filters)
+        elif data.get('lead_ids'):
+            selection = create_selection(session_db, lead_ids=data['lead_ids'])
+        else:
+            return jsonify({'error': 'Keine Leads ausgewählt'}), 400
+        return jsonify({'token': selection.token, 'count': selection.lead_count})
+    finally:
+        session_db.close()
 
-    # Gleiche Filter wie get_leads
-    if project_id:
-        query = query.filter(CompanyV3.project_id == project_id)
-    if search:
-        search_term = f'%{search}%'
-        query = query.filter(
-            (CompanyV3.name.ilike(search_term)) |
-            (CompanyV3.website.ilike(search_term)) |
-            (CompanyV3.first_name.ilike(search_term)) |
-            (CompanyV3.last_name.ilike(search_term)) |
-            (CompanyV3.email.ilike(search_term)) |
-            (CompanyV3.city.ilike(search_term))
-        )
-    if category:
-        query = query.filter(CompanyV3.main_category.ilike(f'%{category}%'))
-    if min_rating is not None:
-        query = query.filter(CompanyV3.rating >= min_rating)
-    if min_reviews is not None:
-        query = query.filter(CompanyV3.review_count >= min_reviews)
-    if filter_type == 'no_names':
-        query = query.filter(
-            (CompanyV3.first_name == None) | (CompanyV3.first_name == '') |
-            (CompanyV3.last_name == None) | (CompanyV3.last_name == '')
-        )
-    elif filter_type == 'no_compliment':
-        query = query.filter(
-            (CompanyV3.compliment == None) | (CompanyV3.compliment == '')
-        )
-    elif filter_type == 'complete':
-        query = query.filter(
-            CompanyV3.first_name != None, CompanyV3.first_name != '',
-            CompanyV3.last_name != None, CompanyV3.last_name != '',
-            CompanyV3.compliment != None, CompanyV3.compliment != ''
-        )
 
-    ids = [row[0] for row in query.all()]
-    session_db.close()
-    return jsonify({'ids': ids, 'count': len(ids)})
+def _job_targets(data):
+    """
+    Ziel-Leads eines Job-Requests: (params, Anzahl) oder (None, Fehler)
+
+    Selection-Token ({"selection": ...}) bevorzugt; lead_ids nur noch für
+    kleine Listen (Einzel-Lead im Modal).
+    """
+    token = data.get('selection')
+    if token:
+        session_db = db.get_session()
+        selection = get_selection(session_db, token)
+        session_db.close()
+        if selection is None:
+            return None, 'Auswahl abgelaufen - bitte neu auswählen'
+        if not selection.lead_count:
+            return None, 'Keine Leads ausgewählt'
+        return {'selection': selection.token}, selection.lead_count
+
+    lead_ids = data.get('lead_ids', [])
+    if not lead_ids:
+        return None, 'Keine Leads ausgewählt'
+    # Sortiert + eindeutig: der Checkpoint-Cursor ist die letzte fertige Lead-ID
+    lead_ids = sorted({int(lead_id) for lead_id in lead_ids})
+    return {'lead_ids': lead_ids}, len(lead_ids)
+
+
+def _target_filter(token, lead_ids):
+    """WHERE-Bedingung für Bulk-Routen: Selection-Token oder ID-Liste"""
+    if token:
+        return selection_filter(token)
+    return CompanyV3.id.in_([int(lead_id) for lead_id in lead_ids])
 
 @app.route('/api/leads/<int:lead_id>')
 @login_required
 def get_lead(lead_id):
     """Einzelnen Lead abrufen - ALLE DB-Felder!"""
     session_db = db.get_session()
-    lead = session_db.query(CompanyV3).get(lead_id)
+    # Deferred Detail-Spalten in derselben Query statt je Feld nachzuladen
+    lead = session_db.query(CompanyV3).options(undefer_group('details'), undefer(CompanyV3.attributes)).get(lead_id)
     if not lead:
         session_db.close()
         return jsonify({'error': 'Lead not found'}), 404
 
-    attrs = lead.attributes or {}
-    original_data = attrs.get('_original_data', {})
-    original_columns = attrs.get('_original_columns', [])
+    original_columns = project_columns(lead.project)
+    original_data = unpack_original_row(lead.attributes, original_columns)
 
     result = {
         'id': lead.id,
@@ -441,18 +542,22 @@ def delete_lead_compliment(lead_id):
 def delete_multiple_compliments():
     """Komplimente für mehrere Leads löschen (Bulk)"""
     data = request.json
+    token = data.get('selection')
     lead_ids = data.get('lead_ids', [])
 
-    if not lead_ids:
+    if not token and not lead_ids:
         return jsonify({'error': 'Keine Leads ausgewählt'}), 400
 
     session_db = db.get_session()
-    deleted = 0
-    for lead_id in lead_ids:
-        lead = session_db.query(CompanyV3).get(lead_id)
-        if lead and lead.compliment:
-            lead.compliment = None
-            deleted += 1
+    if token and get_selection(session_db, token) is None:
+        session_db.close()
+        return jsonify({'error': 'Auswahl abgelaufen - bitte neu auswählen'}), 400
+
+    # Ein UPDATE in der DB - die IDs der Selection gehen nicht durch Python
+    deleted = (session_db.query(CompanyV3)
+               .filter(_target_filter(token, lead_ids), CompanyV3.compliment.isnot(None),
+                       CompanyV3.compliment != '')
+               .update({CompanyV3.compliment: None}, synchronize_session=False))
 
     session_db.commit()
     session_db.close()
@@ -523,7 +628,13 @@ DB_FIELDS = {
 @app.route('/api/import', methods=['POST'])
 @login_required
 def import_csv():
-    """CSV importieren - speichert ALLE Original-Spalten 1:1!"""
+    """
+    CSV importieren - speichert ALLE Original-Spalten 1:1!
+
+    Der Request speichert nur die Datei, liest den Header und legt das Projekt
+    an; die Zeilen importiert ein Hintergrund-Job chunkweise (Fortschritt über
+    /api/task/<id>) - große Dateien laufen nicht mehr in den Gunicorn-Timeout.
+    """
     if 'file' not in request.files:
         return jsonify({'error': 'Keine Datei'}), 400
 
@@ -534,302 +645,253 @@ def import_csv():
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Nur CSV-Dateien erlaubt'}), 400
 
-    # Save file
+    # Save file (eindeutiger Name: gleichnamige Uploads laufen evtl. parallel)
     filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex[:8]}_{filename}")
     file.save(filepath)
 
     try:
-        # Read CSV
-        try:
-            df = pd.read_csv(filepath, encoding='utf-8')
-        except:
-            df = pd.read_csv(filepath, encoding='latin-1')
-
+        encoding = sniff_encoding(filepath)
         # WICHTIG: Original-Spaltennamen und -Reihenfolge speichern!
-        original_columns = list(df.columns)
-        logger.info(f"CSV hat {len(original_columns)} Spalten: {original_columns[:5]}...")
-
-        # Normalized columns for mapping
-        df_normalized = df.copy()
-        df_normalized.columns = [c.lower().strip().replace(' ', '_') for c in df.columns]
-
-        # Mapping für Suche/Filter (nur Schlüsselfelder)
-        KEY_MAPPINGS = {
-            'site': 'website', 'website': 'website', 'url': 'website', 'webseite': 'website',
-            'name': 'name', 'company_name': 'name', 'firmenname': 'name',
-            'email_1': 'email', 'email': 'email', 'e-mail': 'email',
-            'phone': 'phone', 'telefon': 'phone',
-            'city': 'city', 'stadt': 'city', 'ort': 'city',
-            'rating': 'rating', 'bewertung': 'rating',
-            'reviews': 'review_count', 'review_count': 'review_count',
-            'category': 'main_category', 'kategorie': 'main_category',
-            'full_address': 'address', 'address': 'address', 'adresse': 'address',
-            'postal_code': 'zip_code', 'zip_code': 'zip_code', 'plz': 'zip_code',
-            'state': 'state', 'bundesland': 'state',
-            'country': 'country', 'land': 'country',
-        }
+        original_columns = read_columns(filepath, encoding)
+        logger.info(f"CSV hat {len(original_columns)} Spalten: {original_columns[:5]}... ({encoding})")
 
         # Create project
         session_db = db.get_session()
-        project_name = filename.replace('.csv', '')
         project = Project(
-            name=project_name,
+            name=filename.replace('.csv', ''),
             csv_filename=filename,
-            lead_count=len(df),
+            lead_count=0,  # Nach dem Import: Anzahl CSV-Zeilen
+            column_cache={'original_columns': original_columns},  # Spalten-Reihenfolge einmal pro Projekt
             created_at=datetime.now()
         )
         session_db.add(project)
         session_db.commit()
         project_id = project.id
-
-        # Import leads
-        imported = 0
-        skipped = 0
-
-        for idx, row in df.iterrows():
-            # === ALLES ORIGINAL SPEICHERN ===
-            # Speichere die komplette Zeile als Dict mit Original-Spaltennamen
-            original_data = {}
-            for col in original_columns:
-                val = row[col]
-                if pd.notna(val):
-                    original_data[col] = str(val).strip() if not isinstance(val, (int, float)) else val
-                else:
-                    original_data[col] = ''
-
-            # Find website (required!)
-            website = None
-            row_normalized = df_normalized.iloc[idx]
-            for csv_col in df_normalized.columns:
-                if csv_col in KEY_MAPPINGS and KEY_MAPPINGS[csv_col] == 'website':
-                    val = row_normalized.get(csv_col)
-                    if pd.notna(val) and str(val).strip():
-                        website = str(val).strip()
-                        break
-
-            if not website:
-                skipped += 1
-                continue
-
-            # Create lead
-            lead = CompanyV3(project_id=project_id, website=website)
-
-            # Map key fields for search/filter
-            for csv_col in df_normalized.columns:
-                db_field = KEY_MAPPINGS.get(csv_col)
-                if db_field and db_field != 'website':
-                    val = row_normalized.get(csv_col)
-                    if pd.notna(val):
-                        val_str = str(val).strip()
-                        if val_str and val_str.lower() != 'nan':
-                            if db_field == 'rating':
-                                try:
-                                    lead.rating = float(val)
-                                except:
-                                    pass
-                            elif db_field == 'review_count':
-                                try:
-                                    lead.review_count = int(float(val))
-                                except:
-                                    pass
-                            elif hasattr(lead, db_field):
-                                setattr(lead, db_field, val_str)
-
-            # === WICHTIG: Speichere ALLE Original-Daten + Spalten-Reihenfolge ===
-            lead.attributes = {
-                '_original_columns': original_columns,  # Spalten-Reihenfolge
-                '_original_data': original_data         # Alle Werte
-            }
-
-            session_db.add(lead)
-            imported += 1
-
-        session_db.commit()
         session_db.close()
+    except Exception as e:
+        logger.error(f"Import error: {e}")
+        os.remove(filepath)
+        return jsonify({'error': str(e)}), 400
 
-        logger.info(f"CSV-Import fertig: {imported} importiert, {skipped} übersprungen, {len(original_columns)} Spalten")
-
-        return jsonify({
-            'success': True,
+    try:
+        estimated = estimate_rows(filepath)
+        task_id = job_queue.enqueue('import_csv', {
+            'upload_path': filepath,  # Löscht die Queue bei Job-Ende (TEMP_FILE_PARAMS)
+            'encoding': encoding,
             'project_id': project_id,
-            'imported': imported,
-            'skipped': skipped,
-            'total': len(df),
-            'columns': len(original_columns)
-        })
-
+            'columns': original_columns,
+        }, progress={
+            'progress': 0,
+            'total': estimated,  # Schätzung, am Ende exakt
+            'imported': 0,
+            'skipped': 0,
+            'errors': 0,
+            'project_id': project_id,
+            'columns': len(original_columns),
+            'current': '',
+            'start_time': time.time()
+        }, prefix='import', priority=priority_for(estimated))
     except Exception as e:
-        logger.error(f"Import error: {e}")
-        import traceback
-        traceback.print_exc()
+        # Kein Job -> leeres Projekt und Upload wieder entfernen
+        logger.error(f"Import-Job konnte nicht angelegt werden: {e}")
+        session_db = db.get_session()
+        try:
+            session_db.query(Project).filter(Project.id == project_id).delete()
+            session_db.commit()
+        finally:
+            session_db.close()
+        os.remove(filepath)
         return jsonify({'error': str(e)}), 500
+    job_worker_pool.notify()
+
+    return jsonify({'task_id': task_id, 'project_id': project_id})
+
+
+def _run_import(ctx):
+    """
+    Job-Handler: CSV-Import (läuft in einem JobWorkerPool-Thread, fortsetzbar)
+
+    Liest die Datei in Chunks, jeder Chunk wird mit seinem Checkpoint in
+    einer Transaktion committet - nach Absturz/Deploy geht es ab der
+    nächsten CSV-Zeile weiter, ohne Leads doppelt anzulegen. Bei Job-Ende
+    (auch Abbruch/Fehler) löscht die Queue den Upload; fortsetzen lässt
+    sich ein beendeter Import daher nicht.
+    """
+    params = ctx.params
+    project_id = params['project_id']
+    mapping = resolve_columns(params['columns'])  # Einmal pro Datei
+    counts = {key: ctx.state.get(key, 0) for key in ('imported', 'skipped')}
+    done = ctx.state.get('cursor') or 0  # Bereits importierte CSV-Zeilen
+    rows = 0
+    session_db = db.get_session()
+
+    try:
+        for chunk in read_csv_chunks(params['upload_path'], params['encoding']):
+            if ctx.cancelled():
+                break
+            start, rows = rows, rows + len(chunk)
+            if rows <= done:
+                continue  # Beim Fortsetzen: schon importiert
+            if start < done:
+                chunk = chunk.iloc[done - start:]
+
+            records, skipped = lead_records(chunk, project_id, mapping)
+            counts['imported'] += insert_leads(session_db, records)
+            counts['skipped'] += skipped
+            ctx.checkpoint(session_db, cursor=rows, progress=rows, total=max(rows, ctx.state.get('total', 0)),
+                           current=f"{rows} Zeilen", **counts)
+            session_db.commit()
+            ctx.add_throughput(results=len(records))
+            ctx.sample_memory()
+
+        if not ctx.cancelled():
+            session_db.query(Project).filter(Project.id == project_id).update({'lead_count': rows})
+            ctx.checkpoint(session_db, progress=rows, total=rows, current='', **counts)
+            session_db.commit()
+            logger.info(f"CSV-Import fertig: {counts['imported']} importiert, {counts['skipped']} übersprungen, "
+                        f"{len(params['columns'])} Spalten")
+    finally:
+        session_db.close()
 
 # ============================================================
 # API: EXPORT
 # ============================================================
-@app.route('/api/export')
-@login_required
-def export_csv():
-    """Leads als CSV exportieren - Original-Spalten + 3 neue am Ende!"""
-    project_id = request.args.get('project_id', type=int)
-    lead_ids = request.args.get('lead_ids', '')  # Comma-separated
+# Neue Spalten die am Ende hinzugefügt werden
+EXPORT_NEW_COLUMNS = ['first_name', 'last_name', 'compliment']
+EXPORT_CHUNK_SIZE = 1000  # Leads pro Keyset-Query beim Streaming-Export
 
-    session_db = db.get_session()
-    query = session_db.query(CompanyV3)
 
-    if lead_ids:
+def _export_query(session_db, args):
+    """Export-Leads: Selection-Token, ID-Liste, Projekt oder alle"""
+    project_id = args.get('project_id', type=int)
+    token = args.get('selection', '')
+    lead_ids = args.get('lead_ids', '')  # Comma-separated
+
+    query = session_db.query(CompanyV3).options(load_only(*LEAD_LIST_COLUMNS))
+    if token:
+        query = query.filter(selection_filter(token))
+    elif lead_ids:
         ids = [int(x) for x in lead_ids.split(',') if x]
         query = query.filter(CompanyV3.id.in_(ids))
     elif project_id:
         query = query.filter(CompanyV3.project_id == project_id)
+    return query
 
-    leads = query.all()
 
-    if not leads:
-        session_db.close()
-        return jsonify({'error': 'Keine Leads zum Exportieren'}), 400
+def _iter_lead_chunks(session_db, query, chunk_size=EXPORT_CHUNK_SIZE):
+    """Leads der Query in id-Reihenfolge, chunkweise per Keyset (Identity-Map wird je Chunk geleert)"""
+    last_id = 0
+    while True:
+        leads = query.filter(CompanyV3.id > last_id).order_by(CompanyV3.id).limit(chunk_size).all()
+        if not leads:
+            return
+        yield leads
+        last_id = leads[-1].id
+        session_db.expunge_all()
 
-    # Hole Original-Spalten vom ersten Lead
-    original_columns = []
-    first_lead_attrs = leads[0].attributes if leads[0].attributes else {}
-    if '_original_columns' in first_lead_attrs:
-        original_columns = first_lead_attrs['_original_columns']
 
-    # Neue Spalten die am Ende hinzugefügt werden
-    NEW_COLUMNS = ['first_name', 'last_name', 'compliment']
+def _export_row(lead, original_columns, columns_by_project):
+    """Export-Zeile {Spalte: Wert} - Original-Spalten + neue Spalten am Ende"""
+    row = {}
+    original_data = unpack_original_row(lead.attributes, columns_by_project.get(lead.project_id, []))
 
-    # Alle Spalten: Original + Neue
-    all_columns = original_columns + NEW_COLUMNS
+    # Original-Spalten
+    for col in original_columns:
+        row[col] = original_data.get(col, '')
 
-    data = []
-    for lead in leads:
-        row = {}
-        attrs = lead.attributes if lead.attributes else {}
-        original_data = attrs.get('_original_data', {})
+    # Neue Spalten am Ende
+    row['first_name'] = lead.first_name or ''
+    row['last_name'] = lead.last_name or ''
+    row['compliment'] = lead.compliment or ''
+    return row
 
-        # Original-Spalten
-        for col in original_columns:
-            row[col] = original_data.get(col, '')
 
-        # Neue Spalten am Ende
-        row['first_name'] = lead.first_name or ''
-        row['last_name'] = lead.last_name or ''
-        row['compliment'] = lead.compliment or ''
+@app.route('/api/export')
+@login_required
+def export_csv():
+    """
+    Leads als CSV exportieren - Original-Spalten + 3 neue am Ende!
 
-        data.append(row)
+    Gestreamt: Leads werden chunkweise gelesen und direkt als CSV-Zeilen
+    gesendet - der Download startet sofort, der Speicher bleibt konstant.
+    """
+    session_db = db.get_session()
+    query = _export_query(session_db, request.args)
+    chunks = _iter_lead_chunks(session_db, query)
+    first_chunk = next(chunks, None)
 
-    session_db.close()
+    if not first_chunk:
+        session_db.close()
+        return jsonify({'error': 'Keine Leads zum Exportieren'}), 400
 
-    # DataFrame mit korrekter Spalten-Reihenfolge
-    df = pd.DataFrame(data, columns=all_columns)
-    filename = f"leads_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    df.to_csv(filepath, index=False, encoding='utf-8')
+    # Original-Spalten, Reihenfolge vom Projekt des ersten Leads
+    columns_by_project = load_project_columns(session_db, {lead.project_id for lead in first_chunk})
+    original_columns = columns_by_project.get(first_chunk[0].project_id, [])
 
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    # Alle Spalten: Original + Neue
+    all_columns = original_columns + EXPORT_NEW_COLUMNS
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        try:
+            writer.writerow(all_columns)
+            for leads in itertools.chain([first_chunk], chunks):
+                missing = {lead.project_id for lead in leads} - set(columns_by_project)
+                if missing:
+                    columns_by_project.update(load_project_columns(session_db, missing))
+                for lead in leads:
+                    row = _export_row(lead, original_columns, columns_by_project)
+                    writer.writerow([row[col] for col in all_columns])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        finally:
+            session_db.close()
+
+    filename = f"leads_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return Response(stream_with_context(generate()), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
 @app.route('/api/export/excel')
 @login_required
 def export_excel():
     """Leads als Excel exportieren - Original-Spalten + 3 neue am Ende!"""
-    project_id = request.args.get('project_id', type=int)
-    lead_ids = request.args.get('lead_ids', '')
-
     session_db = db.get_session()
-    query = session_db.query(CompanyV3)
-
-    if lead_ids:
-        ids = [int(x) for x in lead_ids.split(',') if x]
-        query = query.filter(CompanyV3.id.in_(ids))
-    elif project_id:
-        query = query.filter(CompanyV3.project_id == project_id)
-
-    leads = query.all()
+    leads = _export_query(session_db, request.args).all()
 
     if not leads:
         session_db.close()
         return jsonify({'error': 'Keine Leads zum Exportieren'}), 400
 
-    # Hole Original-Spalten vom ersten Lead
-    original_columns = []
-    first_lead_attrs = leads[0].attributes if leads[0].attributes else {}
-    if '_original_columns' in first_lead_attrs:
-        original_columns = first_lead_attrs['_original_columns']
-
-    # Neue Spalten die am Ende hinzugefügt werden
-    NEW_COLUMNS = ['first_name', 'last_name', 'compliment']
+    # Original-Spalten der Projekte, Reihenfolge vom Projekt des ersten Leads
+    columns_by_project = load_project_columns(session_db, {lead.project_id for lead in leads})
+    original_columns = columns_by_project.get(leads[0].project_id, [])
 
     # Alle Spalten: Original + Neue
-    all_columns = original_columns + NEW_COLUMNS
+    all_columns = original_columns + EXPORT_NEW_COLUMNS
 
-    data = []
-    for lead in leads:
-        row = {}
-        attrs = lead.attributes if lead.attributes else {}
-        original_data = attrs.get('_original_data', {})
-
-        # Original-Spalten
-        for col in original_columns:
-            row[col] = original_data.get(col, '')
-
-        # Neue Spalten am Ende
-        row['first_name'] = lead.first_name or ''
-        row['last_name'] = lead.last_name or ''
-        row['compliment'] = lead.compliment or ''
-
-        data.append(row)
+    data = [_export_row(lead, original_columns, columns_by_project) for lead in leads]
 
     session_db.close()
 
     # DataFrame mit korrekter Spalten-Reihenfolge
     df = pd.DataFrame(data, columns=all_columns)
     filename = f"leads_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    df.to_excel(filepath, index=False)
+    # Im Speicher bauen - keine Export-Dateien in uploads/, die liegen bleiben
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
 
-    return send_file(filepath, as_attachment=True, download_name=filename)
+    return send_file(buffer, as_attachment=True, download_name=filename)
 
 # ============================================================
 # API: NAME FINDER (Bulk) - MIT LOKALER EXTRAKTION WIE ORIGINAL!
 # ============================================================
 
-# Deutsche Vornamen-Datenbank (wie im Original)
-_KNOWN_FIRST_NAMES = {
-    'alexander', 'andreas', 'benjamin', 'christian', 'daniel', 'david', 'dennis', 'dominik',
-    'eric', 'erik', 'fabian', 'felix', 'florian', 'frank', 'hans', 'jan', 'jens', 'johannes',
-    'jonas', 'julian', 'kai', 'kevin', 'klaus', 'lars', 'lukas', 'marcel', 'marco', 'marcus',
-    'mario', 'markus', 'martin', 'matthias', 'max', 'maximilian', 'michael', 'niklas', 'nils',
-    'oliver', 'patrick', 'paul', 'peter', 'philipp', 'ralf', 'rene', 'robin', 'sascha',
-    'sebastian', 'simon', 'stefan', 'steffen', 'stephan', 'thomas', 'tim', 'tobias', 'tom',
-    'uwe', 'wolfgang', 'achim', 'albert', 'alfred', 'armin', 'bernd', 'bernhard', 'boris',
-    'carsten', 'christoph', 'claus', 'detlef', 'dieter', 'dirk', 'edgar', 'ernst', 'erwin',
-    'franz', 'fred', 'friedhelm', 'friedrich', 'georg', 'gerald', 'gerd', 'gerhard',
-    'guido', 'harald', 'hartmut', 'heinrich', 'heinz', 'helmut', 'herbert', 'hermann',
-    'holger', 'horst', 'hubert', 'ingo', 'jakob', 'joachim', 'jochen', 'josef',
-    'karl', 'karsten', 'kurt', 'leon', 'lothar', 'ludwig', 'manfred', 'manuel', 'marc',
-    'mark', 'norbert', 'olaf', 'otto', 'pascal', 'ralph', 'rainer', 'reinhard', 'richard',
-    'robert', 'roland', 'rolf', 'rudolf', 'sven', 'theo', 'thorsten', 'torsten', 'udo',
-    'ulrich', 'volker', 'walter', 'werner', 'wilhelm', 'willi', 'winfried', 'henning',
-    'alexandra', 'andrea', 'angelika', 'anja', 'anna', 'anne', 'annette', 'antje', 'barbara',
-    'bianca', 'brigitte', 'carina', 'carmen', 'carolin', 'caroline', 'christina', 'christiane',
-    'claudia', 'daniela', 'diana', 'doris', 'elena', 'elke', 'eva', 'franziska', 'gabriele',
-    'heike', 'helena', 'ines', 'iris', 'jana', 'jasmin', 'jennifer', 'jessica', 'johanna',
-    'julia', 'juliane', 'karin', 'katharina', 'kathrin', 'katja', 'katrin', 'kerstin',
-    'kristina', 'lara', 'laura', 'lea', 'lena', 'linda', 'lisa', 'manuela', 'maria',
-    'marie', 'marina', 'marion', 'martina', 'melanie', 'michaela', 'monika', 'nadine',
-    'natalie', 'nicole', 'nina', 'petra', 'sabine', 'sabrina', 'sandra', 'sara', 'sarah',
-    'silke', 'simone', 'sophia', 'stefanie', 'stephanie', 'susanne', 'tanja', 'ulrike',
-    'ursula', 'vanessa', 'vera', 'yvonne', 'anita', 'anke', 'astrid', 'beate', 'bettina',
-    'christa', 'cornelia', 'dagmar', 'edith', 'elisabeth', 'emma', 'erika', 'frieda',
-    'gerda', 'gisela', 'hanna', 'heidi', 'helga', 'hildegard', 'ilse', 'ingrid',
-    'jordie', 'melissa', 'christopher', 'epiphanie',
-    'wilfried', 'björn', 'lilli', 'jörg', 'ulf',
-    'nadia', 'janine', 'evelyn', 'marleen', 'madlen', 'rufus', 'fabio',
-    'yevgeniy', 'christoff', 'christof', 'reinfried', 'dorothea',
-    'diethelm', 'nico', 'fikriye', 'samia', 'torben', 'ludgerus', 'günter', 'birgit',
-    'marcello', 'christine',
-}
+# Deutsche Vornamen-Datenbank (gemeinsames Lexikon, siehe name_lexicon.py)
+_KNOWN_FIRST_NAMES = get_name_lexicon()
 
 # Fake/Platzhalter-Namen die NIEMALS akzeptiert werden
 _FAKE_NAMES = {
@@ -965,110 +1027,205 @@ def _extract_name_from_local_data(company):
 def find_names():
     """Namen für ausgewählte Leads finden - MIT LOKALER EXTRAKTION!"""
     data = request.json
-    lead_ids = data.get('lead_ids', [])
+    targets, total = _job_targets(data)
+    if targets is None:
+        return jsonify({'error': total}), 400
 
-    if not lead_ids:
-        return jsonify({'error': 'Keine Leads ausgewählt'}), 400
-
-    # Create task ID
-    task_id = f"names_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    import time
-    background_tasks[task_id] = {
-        'status': 'running',
+    task_id = job_queue.enqueue('find_names', targets, progress={
         'progress': 0,
-        'total': len(lead_ids),
+        'total': total,
         'found': 0,
         'skipped': 0,
         'errors': 0,
         'local_found': 0,  # Aus lokalen Daten gefunden
+        'cache_found': 0,  # Aus Domain-Cache (anderes Projekt, schon gescraped)
         'web_found': 0,    # Durch Web-Scraping gefunden
         'current': '',
         'start_time': time.time()
-    }
+    }, prefix='names', priority=priority_for(total))
+    job_worker_pool.notify()
 
-    def worker():
-        import time
-        scraper = get_impressum_scraper()
-        session_db = db.get_session()
-        found = 0
-        skipped = 0
-        errors = 0
-        local_found = 0
-        web_found = 0
-
-        for idx, lead_id in enumerate(lead_ids):
-            if background_tasks[task_id]['status'] == 'cancelled':
-                break
+    return jsonify({'task_id': task_id})
 
-            lead = session_db.query(CompanyV3).get(lead_id)
-            if not lead:
-                skipped += 1
-                background_tasks[task_id]['skipped'] = skipped
-                continue
 
-            # Skip if already has name
-            if lead.first_name and lead.last_name:
-                skipped += 1
-                background_tasks[task_id]['skipped'] = skipped
-                background_tasks[task_id]['progress'] = idx + 1
-                continue
+# Job-Handler laden Leads chunkweise (ein IN-Query pro Chunk)
+LEAD_CHUNK_SIZE = 200
+# Spalten-Projektion der Job-Handler: website_text, description & Co. werden
+# nur geladen, wenn der Handler sie wirklich liest
+FIND_NAMES_COLUMNS = (CompanyV3.id, CompanyV3.name, CompanyV3.website, CompanyV3.email, CompanyV3.phone,
+                      CompanyV3.first_name, CompanyV3.last_name, CompanyV3.attributes)
+FIND_NAMES_APPLY_COLUMNS = (CompanyV3.id, CompanyV3.name, CompanyV3.email, CompanyV3.phone,
+                            CompanyV3.first_name, CompanyV3.last_name)
+# Alle Spalten, die Platzhalter (ComplimentGenerator) und Templates lesen
+COMPLIMENT_COLUMNS = (CompanyV3.id, CompanyV3.name, CompanyV3.website, CompanyV3.description, CompanyV3.email,
+                      CompanyV3.phone, CompanyV3.first_name, CompanyV3.last_name, CompanyV3.owner_name,
+                      CompanyV3.rating, CompanyV3.review_count, CompanyV3.review_keywords, CompanyV3.industries,
+                      CompanyV3.main_category, CompanyV3.city, CompanyV3.address, CompanyV3.zip_code,
+                      CompanyV3.country, CompanyV3.compliment, CompanyV3.attributes)
+COMPLIMENT_APPLY_COLUMNS = (CompanyV3.id, CompanyV3.name, CompanyV3.compliment, CompanyV3.confidence_score)
+
+
+def _pending_chunks(ctx, session_db, chunk_size=LEAD_CHUNK_SIZE):
+    """
+    Offene Leads eines Jobs als Chunks von (index, lead_id) ab dem Checkpoint
+
+    Selection-Jobs lesen die IDs chunkweise aus selection_items (Keyset),
+    ältere/kleine Jobs aus params['lead_ids'].
+    """
+    token = ctx.params.get('selection')
+    cursor = ctx.state.get('cursor')
+    if not token:
+        pending = list(ctx.pending(ctx.params.get('lead_ids', [])))
+        for start in range(0, len(pending), chunk_size):
+            yield pending[start:start + chunk_size]
+        return
 
-            background_tasks[task_id]['current'] = (lead.name or lead.website or '')[:50]
-            background_tasks[task_id]['progress'] = idx + 1
+    idx = selection_position(session_db, token, cursor) if cursor is not None else 0
+    if idx:
+        logger.info(f"⏩ Job {ctx.id}: Fortsetzen nach Lead {cursor} ({idx}/{ctx.state.get('total')})")
+    for ids in iter_selection_ids(session_db, token, after_id=cursor, chunk_size=chunk_size):
+        yield [(idx + offset, lead_id) for offset, lead_id in enumerate(ids)]
+        idx += len(ids)
 
-            try:
-                # ZUERST: Lokale Extraktion versuchen (SCHNELL!)
-                fn, ln = _extract_name_from_local_data(lead)
-
-                if fn and ln:
-                    lead.first_name = fn
-                    lead.last_name = ln
-                    session_db.commit()
-                    found += 1
-                    local_found += 1
-                    background_tasks[task_id]['found'] = found
-                    background_tasks[task_id]['local_found'] = local_found
-                    # Echtzeit-Update: letzter aktualisierter Lead
-                    background_tasks[task_id]['last_updated'] = {
-                        'id': lead.id,
-                        'first_name': fn,
-                        'last_name': ln
-                    }
-                    logger.info(f"[LOCAL] {lead.name}: {fn} {ln}")
-                    continue
 
-                # DANN: Web-Scraping nur wenn Website vorhanden und lokal nichts gefunden
-                if lead.website:
-                    result = scraper.scrape(lead.website)
-                    if result.found_name:
-                        lead.first_name = result.first_name
-                        lead.last_name = result.last_name
-                        session_db.commit()
-                        found += 1
-                        web_found += 1
-                        background_tasks[task_id]['found'] = found
-                        background_tasks[task_id]['web_found'] = web_found
-                        # Echtzeit-Update: letzter aktualisierter Lead
-                        background_tasks[task_id]['last_updated'] = {
-                            'id': lead.id,
-                            'first_name': result.first_name,
-                            'last_name': result.last_name
-                        }
-                        logger.info(f"[WEB] {lead.website}: {result.first_name} {result.last_name}")
+def _with_slot(pool, job_id, func, *args):
+    """Führt func in einem Slot des globalen Pools aus (fair geteilt zwischen Jobs)"""
+    with pool.slot(job_id):
+        return func(*args)
 
-            except Exception as e:
-                errors += 1
-                background_tasks[task_id]['errors'] = errors
-                logger.error(f"Name finder error {lead.name}: {e}")
 
+def _run_find_names(ctx):
+    """
+    Job-Handler: Namen finden (läuft in einem JobWorkerPool-Thread, fortsetzbar)
+
+    Lokale Extraktion und Domain-Cache laufen direkt im Job-Thread, nur echte
+    Web-Kandidaten gehen in einen Scrape-Pool. Ergebnisse werden gesammelt
+    und in Batches committed statt einem fsync pro gefundenem Namen.
+    """
+    scraper = get_impressum_scraper()
+    session_db = db.get_session()
+    # Zähler aus dem Checkpoint übernehmen (0 bei neuem Job)
+    counts = {key: ctx.state.get(key, 0)
+              for key in ('found', 'skipped', 'errors', 'local_found', 'cache_found', 'web_found')}
+    # Threads bis zur globalen Obergrenze - wie viele wirklich scrapen, regelt scrape_slots
+    executor = ThreadPoolExecutor(max_workers=scrape_slots.capacity, thread_name_prefix=f'scrape-{ctx.id[-6:]}')
+
+    try:
+        for chunk in _pending_chunks(ctx, session_db):
+            if ctx.cancelled():
+                break
+            _find_names_chunk(ctx, session_db, scraper, executor, chunk, counts)
+    finally:
+        # Laufende Scrapes nach Abbruch nicht abwarten - Ergebnisse werden verworfen
+        executor.shutdown(wait=False, cancel_futures=True)
         session_db.close()
-        background_tasks[task_id]['status'] = 'completed'
-        background_tasks[task_id]['progress'] = len(lead_ids)
 
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
+    if not ctx.cancelled():
+        ctx.update(progress=ctx.state.get('total', 0))
+
+
+def _find_names_chunk(ctx, session_db, scraper, executor, chunk, counts):
+    """Verarbeitet einen Chunk von (index, lead_id) - Scrape-Threads fassen die Session nicht an"""
+
+    def apply(lead, website, result, source):
+        if source == 'web':
+            store_contact(session_db, website, result)
+        if lead is None:
+            return
+
+        # Kontaktdaten ergänzen, vorhandene Werte nie überschreiben
+        if result.email and not lead.email:
+            lead.email = result.email
+        if result.phone and not lead.phone:
+            lead.phone = result.phone
+
+        if result.found_name:
+            lead.first_name = result.first_name
+            lead.last_name = result.last_name
+            counts['found'] += 1
+            counts[f'{source}_found'] += 1
+            # Echtzeit-Update: Lead-Event in derselben Transaktion
+            ctx.record_lead(session_db, {
+                'id': lead.id,
+                'first_name': result.first_name,
+                'last_name': result.last_name
+            })
+            logger.info(f"[{source.upper()}] {lead.name}: {result.first_name} {result.last_name}")
+
+    batch = LeadBatch(ctx, session_db, chunk, apply, FIND_NAMES_APPLY_COLUMNS)
+    leads = {lead.id: lead for lead in
+             session_db.query(CompanyV3).options(load_only(*FIND_NAMES_COLUMNS))
+             .filter(CompanyV3.id.in_(batch.lead_ids))}
+    futures = {}  # Future -> (lead_id, website, Anzeigename)
+
+    for idx, lead_id in chunk:
+        lead = leads.get(lead_id)
+        # Skip if missing or already has name
+        if not lead or (lead.first_name and lead.last_name):
+            counts['skipped'] += 1
+            batch.skip(lead_id)
+            continue
 
-    return jsonify({'task_id': task_id})
+        try:
+            # ZUERST: Lokale Extraktion versuchen (SCHNELL!)
+            fn, ln = _extract_name_from_local_data(lead)
+            if fn and ln:
+                batch.add(lead_id, lead.website, ContactResult(first_name=fn, last_name=ln, found_name=True), 'local')
+
+            # DANN: Domain-Cache vor jedem Netzwerk-Zugriff (auch negative Treffer)
+            elif lead.website:
+                cached = get_cached_contact(session_db, lead.website)
+                if cached is not None:
+                    batch.add(lead_id, lead.website, cached, 'cache')
+                else:
+                    label = (lead.name or lead.website or '')[:50]
+                    futures[executor.submit(_with_slot, scrape_slots, ctx.id, scraper.scrape, lead.website)] = (lead_id, lead.website, label)
+
+            else:
+                batch.skip(lead_id)
+
+        except Exception as e:
+            counts['errors'] += 1
+            batch.skip(lead_id)
+            logger.error(f"Name finder error {lead.name}: {e}")
+
+    # Lokale + Cache-Treffer des Chunks in einer Transaktion
+    batch.commit(counts)
+    _collect_futures(ctx, batch, futures, counts, lambda lead_id, website, result: (lead_id, website, result, 'web'))
+
+
+def _collect_futures(ctx, batch, futures, counts, to_item):
+    """
+    Sammelt Ergebnisse eines Thread-Pools in den LeadBatch
+
+    futures: Future -> (lead_id, ..., Anzeigename); to_item baut aus
+    (lead_id, ..., Ergebnis) die Argumente für batch.add(). Bei Abbruch
+    werden wartende Futures verworfen.
+    """
+    waiting = set(futures)
+    while waiting:
+        finished, waiting = wait(waiting, timeout=batch.batch_seconds, return_when=FIRST_COMPLETED)
+        for future in finished:
+            *key, label = futures[future]
+            try:
+                batch.add(*to_item(*key, future.result()))
+            except Exception as e:
+                counts['errors'] += 1
+                batch.skip(key[0])
+                logger.error(f"{ctx.kind} error {label}: {e}")
+            ctx.state['current'] = label
+
+        if batch.due():
+            batch.commit(counts)
+        ctx.update(progress=batch.progress, **counts)
+
+        if ctx.cancelled():
+            for future in waiting:
+                future.cancel()
+            break
+
+    # Rest + Cursor des Chunks (auch wenn nur übersprungen wurde)
+    batch.commit(counts)
 
 # ============================================================
 # API: COMPLIMENT GENERATOR (Bulk) - MIT PROMPT-AUSWAHL WIE ORIGINAL
@@ -1078,170 +1235,462 @@ def find_names():
 def generate_compliments():
     """Komplimente für ausgewählte Leads generieren - mit Prompt-Auswahl"""
     data = request.json
-    lead_ids = data.get('lead_ids', [])
-    prompt_type = data.get('type', 'template')  # 'template' oder 'custom'
     provider = data.get('provider', 'deepseek')
     use_template_only = data.get('is_template', False)  # Template ohne KI
 
-    if not lead_ids:
-        return jsonify({'error': 'Keine Leads ausgewählt'}), 400
+    targets, total = _job_targets(data)
+    if targets is None:
+        return jsonify({'error': total}), 400
 
     # Prompt vorbereiten (nur für KI-basierte Generierung)
-    system_prompt = ''
-    user_prompt = ''
+    system_prompt, user_prompt, error = _resolve_compliment_prompts(data, use_template_only)
+    if error:
+        return jsonify({'error': error}), 400
 
-    if not use_template_only:
-        if prompt_type == 'custom':
-            system_prompt = data.get('system_prompt', 'Du bist ein Experte für authentische, personalisierte B2B-Kommunikation.')
-            user_prompt = data.get('user_prompt', '')
-            if not user_prompt:
-                return jsonify({'error': 'User-Prompt fehlt'}), 400
-        else:
-            # Template-Prompt laden
-            prompt_id = data.get('prompt_id')
-            if prompt_id:
-                pm = get_prompt_manager()
-                prompt_template = pm.get_prompt_by_id(prompt_id)
-                if prompt_template:
-                    system_prompt = prompt_template.get('system_prompt', '')
-                    user_prompt = prompt_template.get('user_prompt_template', prompt_template.get('prompt', ''))
-                else:
-                    # Fallback Standard-Prompt
-                    system_prompt = 'Du bist ein Experte für authentische B2B-Kommunikation.'
-                    user_prompt = """Schreibe ein kurzes, authentisches Kompliment für {name}.
-- Bewertung: {rating} Sterne ({reviews} Bewertungen)
-- Kategorie: {category}
-- Keywords aus Bewertungen: {review_keywords}
-Das Kompliment soll 2-3 Sätze lang sein und authentisch klingen."""
-            else:
-                # Fallback Standard-Prompt
-                system_prompt = 'Du bist ein Experte für authentische B2B-Kommunikation.'
-                user_prompt = """Schreibe ein kurzes, authentisches Kompliment für {name}.
+    # Session-Key vor dem Einreihen holen (Job läuft evtl. in einem anderen Worker-Prozess)
+    # -> wird in den Job-Parametern gespeichert und bei Job-Ende gelöscht
+    session_provider, session_api_key = get_session_api_key()
+
+    task_id = job_queue.enqueue('generate_compliments', {
+        **targets,
+        'provider': provider,
+        'use_template_only': use_template_only,
+        'system_prompt': system_prompt,
+        'user_prompt': user_prompt,
+        'api_provider': session_provider,
+        'api_key': session_api_key,
+    }, progress={
+        'progress': 0,
+        'total': total,
+        'found': 0,
+        'generated': 0,
+        'skipped': 0,
+        'errors': 0,
+        'current': '',
+        'start_time': time.time(),
+        'mode': 'template' if use_template_only else 'ai'
+    }, prefix='compliments', priority=priority_for(total))
+    job_worker_pool.notify()
+
+    return jsonify({'task_id': task_id})
+
+
+DEFAULT_SYSTEM_PROMPT = 'Du bist ein Experte für authentische B2B-Kommunikation.'
+DEFAULT_USER_PROMPT = """Schreibe ein kurzes, authentisches Kompliment für {name}.
 - Bewertung: {rating} Sterne ({reviews} Bewertungen)
 - Kategorie: {category}
 - Keywords aus Bewertungen: {review_keywords}
 Das Kompliment soll 2-3 Sätze lang sein und authentisch klingen."""
 
-    import time
-    task_id = f"compliments_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    background_tasks[task_id] = {
-        'status': 'running',
+
+def _resolve_compliment_prompts(data, use_template_only):
+    """(system_prompt, user_prompt, Fehler) aus dem Request - leer bei Template ohne KI"""
+    if use_template_only:
+        return '', '', None
+
+    if data.get('type', 'template') == 'custom':
+        system_prompt = data.get('system_prompt', 'Du bist ein Experte für authentische, personalisierte B2B-Kommunikation.')
+        user_prompt = data.get('user_prompt', '')
+        if not user_prompt:
+            return '', '', 'User-Prompt fehlt'
+        return system_prompt, user_prompt, None
+
+    # Template-Prompt laden
+    prompt_id = data.get('prompt_id')
+    if prompt_id:
+        prompt_template = get_prompt_manager().get_prompt_by_id(prompt_id)
+        if prompt_template:
+            return (prompt_template.get('system_prompt', ''),
+                    prompt_template.get('user_prompt_template', prompt_template.get('prompt', '')), None)
+    # Fallback Standard-Prompt
+    return DEFAULT_SYSTEM_PROMPT, DEFAULT_USER_PROMPT, None
+
+
+def _llm_client_for_job(ctx, generator):
+    """
+    Eigener, unveränderlicher LLM-Client pro Task - der Generator-Singleton wird nicht verändert.
+    Session-Key hat Priorität, sonst Umgebungsvariablen/Config des gewählten Providers.
+    """
+    session_api_key = ctx.params.get('api_key')
+    provider = ctx.params.get('api_provider') if session_api_key else ctx.params.get('provider', 'deepseek')
+    client = generator.client_for(provider, session_api_key, pool_size=llm_slots.capacity)
+    if client is None:
+        raise RuntimeError(f"Kein API-Key für {provider} konfiguriert")
+    logger.info(f"Job {ctx.id}: {client.provider} ({client.model}){' mit Session-Key' if session_api_key else ''}")
+    return client
+
+
+def _run_generate_compliments(ctx):
+    """Job-Handler: Komplimente generieren (läuft in einem JobWorkerPool-Thread, fortsetzbar)"""
+    params = ctx.params
+    use_template_only = params.get('use_template_only', False)
+
+    generator = None
+    client = None
+    if not use_template_only:
+        generator = get_compliment_generator()
+        client = _llm_client_for_job(ctx, generator)
+
+    # Zähler aus dem Checkpoint übernehmen (0 bei neuem Job)
+    counts = {key: ctx.state.get(key, 0) for key in ('generated', 'found', 'skipped', 'errors', 'tokens_used')}
+    session_db = db.get_session()
+    executor = None
+    if client:
+        # Pool-Größe = Concurrency-Limit des Providers (Slots werden prozessweit geteilt)
+        limiter = get_rate_limiter(client.provider)
+        executor = ThreadPoolExecutor(max_workers=min(limiter.max_concurrency, llm_slots.capacity),
+                                      thread_name_prefix=f'llm-{ctx.id[-6:]}')
+
+    try:
+        for chunk in _pending_chunks(ctx, session_db):
+            if ctx.cancelled():
+                break
+            _generate_compliments_chunk(ctx, session_db, generator, client, executor, chunk, counts)
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if client:
+            client.close()
+        session_db.close()
+
+    if not ctx.cancelled():
+        ctx.update(progress=ctx.state.get('total', 0))
+
+
+def _generate_compliments_chunk(ctx, session_db, generator, client, executor, chunk, counts):
+    """Verarbeitet einen Chunk von (index, lead_id) - Template inline, KI parallel über den Pool"""
+    user_prompt = ctx.params.get('user_prompt', '')
+    system_prompt = ctx.params.get('system_prompt', '')
+
+    def apply(lead, text, confidence_score, tokens, source):
+        counts['tokens_used'] += tokens
+        ctx.add_throughput(tokens=tokens)
+        if not text:
+            counts['errors'] += 1
+            logger.warning(f"[COMPLIMENT] Lead {lead.id if lead else '?'}: Kein Ergebnis")
+            return
+        if lead is None:
+            return
+
+        lead.compliment = text
+        if confidence_score is not None:
+            lead.confidence_score = confidence_score
+        counts['generated'] += 1
+        counts['found'] = counts['generated']
+        # Echtzeit-Update: Lead-Event in derselben Transaktion
+        ctx.record_lead(session_db, {
+            'id': lead.id,
+            'compliment': text[:100] + '...' if source == 'ai' and len(text) > 100 else text
+        })
+        logger.info(f"[{source.upper()}] {lead.name}: {text[:50]}...")
+
+    batch = LeadBatch(ctx, session_db, chunk, apply, COMPLIMENT_APPLY_COLUMNS)
+    leads = {lead.id: lead for lead in
+             session_db.query(CompanyV3).options(load_only(*COMPLIMENT_COLUMNS))
+             .filter(CompanyV3.id.in_(batch.lead_ids))}
+    # Generator-Threads lesen nur bereits geladene Spalten - gelöste Objekte
+    # werden von Commits im Job-Thread nicht expired
+    session_db.expunge_all()
+    futures = {}  # Future -> (lead_id, Anzeigename)
+
+    for idx, lead_id in chunk:
+        lead = leads.get(lead_id)
+        # Skip if missing or already has compliment
+        if not lead or lead.compliment:
+            counts['skipped'] += 1
+            batch.skip(lead_id)
+            continue
+
+        if generator is None:
+            # Template-basierte Generierung (OHNE KI!)
+            try:
+                result = generate_template_compliment(lead)
+                batch.add(lead_id, result.get('compliment', ''), result.get('confidence_score', 50), 0, 'template')
+            except Exception as e:
+                counts['errors'] += 1
+                batch.skip(lead_id)
+                logger.error(f"Compliment error {lead.name}: {e}")
+            if batch.due():
+                batch.commit(counts)
+                ctx.update(progress=batch.progress, current=(lead.name or lead.website or '')[:50], **counts)
+                if ctx.cancelled():
+                    break
+        else:
+            # KI-basierte Generierung
+            label = (lead.name or lead.website or '')[:50]
+            futures[executor.submit(_with_slot, llm_slots, ctx.id,
+                                    partial(generator.generate, client=client),
+                                    lead, user_prompt, system_prompt)] = (lead_id, label)
+
+    _collect_futures(ctx, batch, futures, counts,
+                     lambda lead_id, result: (lead_id, result.text if result else '', None,
+                                              result.tokens_used if result else 0, 'ai'))
+
+# ============================================================
+# API: ANREICHERN (Namen + Kompliment in einem Durchlauf)
+# ============================================================
+@app.route('/api/enrich', methods=['POST'])
+@login_required
+def enrich_leads():
+    """
+    Namen finden + Komplimente generieren als ein Job
+
+    Jeder Lead läuft einzeln durch die Stufen (lokal -> Web-Scraping ->
+    Kompliment) - die ersten Komplimente entstehen, während andere Leads
+    noch gescraped werden.
+    """
+    data = request.json
+    use_template_only = data.get('is_template', False)  # Template ohne KI
+
+    targets, total = _job_targets(data)
+    if targets is None:
+        return jsonify({'error': total}), 400
+
+    system_prompt, user_prompt, error = _resolve_compliment_prompts(data, use_template_only)
+    if error:
+        return jsonify({'error': error}), 400
+
+    # Session-Key wie bei generate-compliments in den Job-Parametern (wird bei Job-Ende gelöscht)
+    session_provider, session_api_key = get_session_api_key()
+
+    task_id = job_queue.enqueue('enrich', {
+        **targets,
+        'provider': data.get('provider', 'deepseek'),
+        'use_template_only': use_template_only,
+        'system_prompt': system_prompt,
+        'user_prompt': user_prompt,
+        'api_provider': session_provider,
+        'api_key': session_api_key,
+    }, progress={
         'progress': 0,
-        'total': len(lead_ids),
+        'total': total,
         'found': 0,
+        'local_found': 0,
+        'cache_found': 0,
+        'web_found': 0,
         'generated': 0,
         'skipped': 0,
         'errors': 0,
+        'tokens_used': 0,
         'current': '',
         'start_time': time.time(),
         'mode': 'template' if use_template_only else 'ai'
-    }
+    }, prefix='enrich', priority=priority_for(total))
+    job_worker_pool.notify()
 
-    # Session-Key vor Worker holen (weil Worker in eigenem Thread läuft)
-    session_provider, session_api_key = get_session_api_key()
+    return jsonify({'task_id': task_id})
 
-    def worker():
-        import time
-        generator = None
-        if not use_template_only:
-            generator = get_compliment_generator()
-            # Session-Key hat Priorität
-            if session_api_key:
-                generator.api_enabled = True
-                generator.api_key = session_api_key
-                # Provider-spezifische Einstellungen
-                if session_provider == 'deepseek':
-                    generator.api_base_url = 'https://api.deepseek.com/v1'
-                    generator.api_model = 'deepseek-chat'
-                elif session_provider == 'openai':
-                    generator.api_base_url = 'https://api.openai.com/v1'
-                    generator.api_model = 'gpt-4o-mini'
-                elif session_provider == 'anthropic':
-                    generator.api_base_url = 'https://api.anthropic.com/v1'
-                    generator.api_model = 'claude-3-5-sonnet-20241022'
-                logger.info(f"Using session API key for {session_provider}")
-            else:
-                # Fallback: set_provider versucht Umgebungsvariablen/Config
-                generator.set_provider(provider)
-        session_db = db.get_session()
-        generated = 0
-        skipped = 0
-        errors = 0
 
-        for idx, lead_id in enumerate(lead_ids):
-            if background_tasks[task_id]['status'] == 'cancelled':
-                break
+ENRICH_COLUMNS = tuple({column.key: column for column in FIND_NAMES_COLUMNS + COMPLIMENT_COLUMNS}.values())
+ENRICH_APPLY_COLUMNS = FIND_NAMES_APPLY_COLUMNS + (CompanyV3.compliment, CompanyV3.confidence_score)
 
-            lead = session_db.query(CompanyV3).get(lead_id)
-            if not lead:
-                skipped += 1
-                background_tasks[task_id]['skipped'] = skipped
-                background_tasks[task_id]['progress'] = idx + 1
-                continue
 
-            # Skip if already has compliment
-            if lead.compliment:
-                skipped += 1
-                background_tasks[task_id]['skipped'] = skipped
-                background_tasks[task_id]['progress'] = idx + 1
-                continue
+def _run_enrich(ctx):
+    """
+    Job-Handler: Anreichern als Pipeline (läuft in einem JobWorkerPool-Thread, fortsetzbar)
 
-            background_tasks[task_id]['current'] = (lead.name or lead.website or '')[:50]
-            background_tasks[task_id]['progress'] = idx + 1
+    Job-Thread: Leads chunkweise laden, lokale Extraktion + Domain-Cache,
+                Ergebnisse in Batches committen (einziger DB-Schreiber)
+    'scrape':   Web-Scraping, nur für Leads ohne Namen aus lokalen Daten/Cache
+    'compliment': Template oder KI, nur für Leads ohne Kompliment
 
-            try:
-                if use_template_only:
-                    # Template-basierte Generierung (OHNE KI!)
-                    result = generate_template_compliment(lead)
-                    compliment_text = result.get('compliment', '')
-                    if compliment_text:
-                        lead.compliment = compliment_text
-                        lead.confidence_score = result.get('confidence_score', 50)
-                        session_db.commit()
-                        generated += 1
-                        background_tasks[task_id]['generated'] = generated
-                        background_tasks[task_id]['found'] = generated
-                        # Echtzeit-Update
-                        background_tasks[task_id]['last_updated'] = {
-                            'id': lead.id,
-                            'compliment': compliment_text
-                        }
-                        logger.info(f"[TEMPLATE] {lead.name}: {compliment_text[:50]}...")
-                    else:
-                        errors += 1
-                        background_tasks[task_id]['errors'] = errors
-                else:
-                    # KI-basierte Generierung
-                    result = generator.generate(lead, user_prompt, system_prompt)
-                    if result and result.text:
-                        lead.compliment = result.text
-                        session_db.commit()
-                        generated += 1
-                        background_tasks[task_id]['generated'] = generated
-                        background_tasks[task_id]['found'] = generated
-                        # Echtzeit-Update
-                        background_tasks[task_id]['last_updated'] = {
-                            'id': lead.id,
-                            'compliment': result.text[:100] + '...' if len(result.text) > 100 else result.text
-                        }
-                        logger.info(f"[AI] {lead.name}: OK")
-                    else:
-                        errors += 1
-                        background_tasks[task_id]['errors'] = errors
-                        logger.warning(f"[COMPLIMENT] {lead.name}: Kein Ergebnis")
-            except Exception as e:
-                errors += 1
-                background_tasks[task_id]['errors'] = errors
-                logger.error(f"Compliment error {lead.name}: {e}")
+    Die Stufen sind über begrenzte Queues verbunden, jede mit eigener
+    Parallelität (scrape_slots bzw. Provider-Limit/llm_slots).
+    """
+    params = ctx.params
+    user_prompt = params.get('user_prompt', '')
+    system_prompt = params.get('system_prompt', '')
+    scraper = get_impressum_scraper()
+
+    generator = None
+    client = None
+    compliment_workers = 1  # Template: reines CPU-Formatieren
+    if not params.get('use_template_only', False):
+        generator = get_compliment_generator()
+        client = _llm_client_for_job(ctx, generator)
+        limiter = get_rate_limiter(client.provider)
+        compliment_workers = min(limiter.max_concurrency, llm_slots.capacity)
+
+    def scrape(item):
+        with scrape_slots.slot(ctx.id):
+            result = scraper.scrape(item['website'])
+        item['contact'], item['source'] = result, 'web'
+        if result.found_name:
+            # Gelöster Lead: Namen stehen dem Kompliment-Prompt direkt zur Verfügung
+            item['lead'].first_name, item['lead'].last_name = result.first_name, result.last_name
+        return 'compliment' if item['needs_compliment'] else None
+
+    def compliment(item):
+        lead = item['lead']
+        if generator is None:
+            result = generate_template_compliment(lead)
+            item['compliment'] = result.get('compliment', '')
+            item['confidence_score'] = result.get('confidence_score', 50)
+        else:
+            with llm_slots.slot(ctx.id):
+                result = generator.generate(lead, user_prompt, system_prompt, client=client)
+            item['compliment'] = result.text if result else ''
+            item['tokens'] = result.tokens_used if result else 0
+        return None
+
+    counts = {key: ctx.state.get(key, 0) for key in
+              ('found', 'local_found', 'cache_found', 'web_found', 'generated', 'skipped', 'errors', 'tokens_used')}
+    session_db = db.get_session()
+    # Ein Batch über den ganzen Rest (chunkweise erweitert) - der Cursor folgt dem lückenlos fertigen Anfang
+    batch = LeadBatch(ctx, session_db, [], partial(_apply_enrich_item, ctx, session_db, counts),
+                      ENRICH_APPLY_COLUMNS)
+    pipeline = Pipeline(f'enrich-{ctx.id[-6:]}', [
+        Stage('scrape', scrape, workers=scrape_slots.capacity),
+        Stage('compliment', compliment, workers=compliment_workers),
+    ])
+
+    def drain(timeout=0.0):
+        for item in pipeline.results(timeout):
+            batch.add(item['lead_id'], item)
+            ctx.state['current'] = item['label']
+        if batch.due():
+            batch.commit(counts)
+        ctx.update(progress=batch.progress, **counts)
+
+    pipeline.start()
+    try:
+        for chunk in _pending_chunks(ctx, session_db):
+            if ctx.cancelled():
+                break
+            batch.extend(chunk)
+            leads = {lead.id: lead for lead in
+                     session_db.query(CompanyV3).options(load_only(*ENRICH_COLUMNS))
+                     .filter(CompanyV3.id.in_([lead_id for _, lead_id in chunk]))}
+            # Stufen-Threads lesen nur bereits geladene Spalten - gelöste Objekte
+            # werden von Commits im Job-Thread nicht expired
+            session_db.expunge_all()
+
+            for idx, lead_id in chunk:
+                lead = leads.get(lead_id)
+                # Skip if missing or already complete
+                if not lead or (lead.first_name and lead.last_name and lead.compliment):
+                    counts['skipped'] += 1
+                    batch.skip(lead_id)
+                    continue
 
+                try:
+                    item = _enrich_item(session_db, lead)
+                except Exception as e:
+                    item = None
+                    counts['errors'] += 1
+                    logger.error(f"Enrich error {lead.name}: {e}")
+
+                if item is None:
+                    batch.skip(lead_id)
+                elif item['stage'] is None:
+                    # Lokal/Cache gefunden, Kompliment vorhanden
+                    batch.add(lead_id, item)
+                else:
+                    # Volle Queue -> Ergebnisse abholen, bis wieder Platz ist (Backpressure)
+                    while not pipeline.put(item['stage'], item):
+                        drain()
+                        if ctx.cancelled():
+                            break
+                drain()
+                if ctx.cancelled():
+                    break
+
+        # Restliche Leads aus den Stufen abholen
+        while pipeline.in_flight and not ctx.cancelled():
+            drain(batch.batch_seconds)
+        # Rest + Cursor (bei Abbruch nur bis zum ersten noch offenen Lead)
+        batch.commit(counts)
+    finally:
+        # Laufende Scrapes/KI-Aufrufe nach Abbruch nicht abwarten - Ergebnisse werden verworfen
+        pipeline.stop()
+        if client:
+            client.close()
         session_db.close()
-        background_tasks[task_id]['status'] = 'completed'
-        background_tasks[task_id]['progress'] = len(lead_ids)
 
-    thread = threading.Thread(target=worker, daemon=True)
-    thread.start()
+    if not ctx.cancelled():
+        ctx.update(progress=ctx.state.get('total', 0))
 
-    return jsonify({'task_id': task_id})
+
+def _enrich_item(session_db, lead):
+    """
+    Erste Stufe im Job-Thread: lokale Extraktion und Domain-Cache
+
+    Liefert das Pipeline-Item mit der nächsten Stufe ('scrape', 'compliment'
+    oder None = fertig) - oder None, wenn es für den Lead nichts zu tun gibt.
+    """
+    item = {
+        'lead_id': lead.id,
+        'lead': lead,
+        'website': lead.website,
+        'label': (lead.name or lead.website or '')[:50],
+        'needs_compliment': not lead.compliment,
+        'contact': None,
+        'source': None,
+    }
+    if not (lead.first_name and lead.last_name):
+        fn, ln = _extract_name_from_local_data(lead)
+        if fn and ln:
+            item['contact'], item['source'] = ContactResult(first_name=fn, last_name=ln, found_name=True), 'local'
+        elif lead.website:
+            cached = get_cached_contact(session_db, lead.website)
+            if cached is None:
+                item['stage'] = 'scrape'
+                return item
+            item['contact'], item['source'] = cached, 'cache'
+
+        if item['contact'] is not None and item['contact'].found_name:
+            lead.first_name, lead.last_name = item['contact'].first_name, item['contact'].last_name
+
+    if item['contact'] is None and not item['needs_compliment']:
+        return None
+    item['stage'] = 'compliment' if item['needs_compliment'] else None
+    return item
+
+
+def _apply_enrich_item(ctx, session_db, counts, lead, item):
+    """LeadBatch-apply: Kontakt + Kompliment eines Items in den Lead schreiben (Job-Thread)"""
+    contact, source = item['contact'], item['source']
+    if source == 'web':
+        store_contact(session_db, item['website'], contact)
+    tokens = item.get('tokens', 0)
+    if tokens:
+        counts['tokens_used'] += tokens
+        ctx.add_throughput(tokens=tokens)
+    if item.get('error'):
+        counts['errors'] += 1
+    if lead is None:
+        return
+
+    update = {'id': lead.id}
+    if contact is not None:
+        # Kontaktdaten ergänzen, vorhandene Werte nie überschreiben
+        if contact.email and not lead.email:
+            lead.email = contact.email
+        if contact.phone and not lead.phone:
+            lead.phone = contact.phone
+        if contact.found_name:
+            lead.first_name = contact.first_name
+            lead.last_name = contact.last_name
+            counts['found'] += 1
+            counts[f'{source}_found'] += 1
+            update.update(first_name=contact.first_name, last_name=contact.last_name)
+
+    if 'compliment' in item:
+        text = item['compliment']
+        if text:
+            lead.compliment = text
+            if item.get('confidence_score') is not None:
+                lead.confidence_score = item['confidence_score']
+            counts['generated'] += 1
+            update['compliment'] = text[:100] + '...' if 'tokens' in item and len(text) > 100 else text
+        elif not item.get('error'):
+            counts['errors'] += 1
+            logger.warning(f"[COMPLIMENT] {lead.name}: Kein Ergebnis")
+
+    if len(update) > 1:
+        # Echtzeit-Update: Lead-Event in derselben Transaktion
+        ctx.record_lead(session_db, update)
+        logger.info(f"[ENRICH/{(source or '-').upper()}] {lead.name}: {', '.join(sorted(update.keys() - {'id'}))}")
 
 # ============================================================
 # API: TASK STATUS
@@ -1249,21 +1698,138 @@ Das Kompliment soll 2-3 Sätze lang sein und authentisch klingen."""
 @app.route('/api/task/<task_id>')
 @login_required
 def get_task_status(task_id):
-    """Task-Status abrufen"""
-    task = background_tasks.get(task_id)
+    """Task-Status abrufen (aus der DB - egal welcher Worker den Job ausführt)"""
+    task = job_queue.get_status(task_id)
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     return jsonify(task)
 
+@app.route('/api/tasks/history')
+@login_required
+def get_task_history():
+    """Historie beendeter Tasks (Dauer, Durchsatz, Treffer, Fehler) + Kennzahlen je Task-Art"""
+    kind = request.args.get('kind')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    return jsonify(job_queue.get_history(kind=kind, limit=limit))
+
 @app.route('/api/task/<task_id>/cancel', methods=['POST'])
 @login_required
 def cancel_task(task_id):
     """Task abbrechen"""
-    if task_id in background_tasks:
-        background_tasks[task_id]['status'] = 'cancelled'
+    if job_queue.request_cancel(task_id):
         return jsonify({'success': True})
     return jsonify({'error': 'Task not found'}), 404
 
+@app.route('/api/task/<task_id>/resume', methods=['POST'])
+@login_required
+def resume_task(task_id):
+    """Abgebrochenen/fehlgeschlagenen Task ab dem letzten Checkpoint fortsetzen"""
+    params_update = None
+    task = job_queue.get_status(task_id)
+    if task and task.get('kind') == 'import_csv' and task.get('status') in ('cancelled', 'failed'):
+        # Upload wurde bei Job-Ende gelöscht
+        return jsonify({'error': 'Import kann nicht fortgesetzt werden - bitte CSV erneut hochladen'}), 409
+    if task and task.get('kind') in ('generate_compliments', 'enrich'):
+        # API-Key wurde bei Job-Ende gelöscht -> aus der aktuellen Session neu übernehmen
+        session_provider, session_api_key = get_session_api_key()
+        params_update = {'api_provider': session_provider, 'api_key': session_api_key}
+
+    status = job_queue.resume(task_id, params_update)
+    if status is None:
+        return jsonify({'error': 'Task not found'}), 404
+    if status == 'completed':
+        return jsonify({'error': 'Task bereits abgeschlossen'}), 409
+
+    job_worker_pool.notify()
+    return jsonify({'success': True, 'task_id': task_id, 'status': status})
+
+# SSE: Server fragt die DB ab (prozessübergreifend), nicht der Browser die App.
+# Jeder offene Stream belegt einen gthread-Thread (siehe start.sh: 2 Worker x 8 Threads),
+# daher höchstens SSE_MAX_STREAMS pro Prozess - weitere Tabs bekommen 503 und pollen.
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 2))
+SSE_POLL_INTERVAL = 0.5
+SSE_MAX_POLL_INTERVAL = 4.0     # Backoff, solange sich nichts ändert
+SSE_MAX_STREAM_SECONDS = 300    # Danach verbindet sich der Browser neu (mit Last-Event-ID)
+_sse_streams = threading.BoundedSemaphore(max(1, SSE_MAX_STREAMS))
+
+def _sse_message(data, event=None, event_id=None):
+    """Formatiert eine Server-Sent-Events-Nachricht"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+@app.route('/api/task/<task_id>/events')
+@login_required
+def task_events(task_id):
+    """
+    Server-Sent Events: Fortschritt + jede Lead-Änderung live
+
+    Events:
+        progress - Status/Zähler wie /api/task/<id> (nur bei Änderung)
+        lead     - geänderte Felder eines Leads (id = JobEvent-ID)
+        done     - Job beendet, Stream endet
+
+    Sind alle SSE_MAX_STREAMS belegt: 503 - der Browser fällt auf Polling zurück.
+    """
+    if job_queue.get_status(task_id) is None:
+        return jsonify({'error': 'Task not found'}), 404
+    if not _sse_streams.acquire(blocking=False):
+        return jsonify({'error': 'Zu viele offene Live-Streams'}), 503, {'Retry-After': '5'}
+
+    # Reconnect: Browser schickt die ID des letzten empfangenen Lead-Events mit
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_event_id = 0
+
+    def stream():
+        nonlocal last_event_id
+        last_task = None
+        interval = SSE_POLL_INTERVAL
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        yield 'retry: 2000\n\n'
+
+        while True:
+            changed = False
+            for event in job_queue.get_events(task_id, last_event_id):
+                last_event_id = event['id']
+                changed = True
+                yield _sse_message(event['data'], event['type'], event['id'])
+
+            task = job_queue.get_status(task_id)
+            if task is None:
+                break
+            if task != last_task:
+                last_task = task
+                changed = True
+                yield _sse_message(task, 'progress')
+
+            if task['status'] in FINISHED_STATUSES:
+                # Events, die zwischen Abfrage und Job-Ende committed wurden
+                for event in job_queue.get_events(task_id, last_event_id):
+                    last_event_id = event['id']
+                    yield _sse_message(event['data'], event['type'], event['id'])
+                yield _sse_message(task, 'done')
+                break
+
+            if time.monotonic() > deadline:
+                break
+            # Ruhiger Job (z.B. wartet in der Queue): seltener abfragen
+            interval = SSE_POLL_INTERVAL if changed else min(interval * 2, SSE_MAX_POLL_INTERVAL)
+            time.sleep(interval)
+
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',     # Proxy-Buffering aus (Railway/nginx)
+    })
+    # Slot freigeben, wenn der Server die Antwort schließt (Ende, Abbruch, Client weg)
+    response.call_on_close(_sse_streams.release)
+    return response
+
 # ============================================================
 # API: API CONFIG
 # ============================================================
@@ -1549,10 +2115,40 @@ def delete_prompt(prompt_id):
         logger.error(f"Error deleting prompt: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ============================================================
+# JOB-WORKER (ein Pool pro Prozess, Jobs werden über die DB verteilt)
+# ============================================================
+job_worker_pool = JobWorkerPool(job_queue, {
+    'find_names': _run_find_names,
+    'generate_compliments': _run_generate_compliments,
+    'enrich': _run_enrich,
+    'import_csv': _run_import,
+})
+
+def start_job_workers(use_reloader=False):
+    """
+    Startet den Worker-Pool dieses Prozesses
+
+    Mit Werkzeug-Reloader (Debug-Server) importieren Eltern- und Kindprozess
+    die App - Jobs laufen nur im Kindprozess (WERKZEUG_RUN_MAIN), der Eltern-
+    prozess überwacht nur die Dateien.
+    """
+    if os.environ.get('JOB_WORKERS_ENABLED', 'true').lower() != 'true':
+        return
+    if use_reloader and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return
+    job_worker_pool.start()
+
+if __name__ != '__main__':
+    # gunicorn: immer starten; "flask run --debug" setzt FLASK_RUN_FROM_CLI + FLASK_DEBUG
+    start_job_workers(use_reloader=os.environ.get('FLASK_RUN_FROM_CLI') == 'true'
+                      and os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true'))
+
 # ============================================================
 # RUN
 # ============================================================
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
     debug = os.environ.get('FLASK_DEBUG', 'true').lower() == 'true'
+    start_job_workers(use_reloader=debug)
     app.run(host='0.0.0.0', port=port, debug=debug)
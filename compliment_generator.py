@@ -11,6 +11,7 @@ Features:
 """
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import logging
 import re
@@ -18,6 +19,9 @@ from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List, Callable
 from dataclasses import dataclass, field
 
+from name_lexicon import get_name_lexicon
+from rate_limiter import get_rate_limiter, parse_retry_after
+
 # Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -29,6 +33,68 @@ try:
 except ImportError:
     pass
 
+# Wiederholungen bei Rate-Limit/Überlastung (Wartezeit über rate_limiter)
+API_MAX_RETRIES = 4
+API_RETRY_STATUS = (429, 503)
+
+# Provider-Stammdaten
+PROVIDERS = {
+    'deepseek': {
+        'base_url': 'https://api.deepseek.com/v1',
+        'model': 'deepseek-chat',
+        'env_key': 'DEEPSEEK_API_KEY'
+    },
+    'openai': {
+        'base_url': 'https://api.openai.com/v1',
+        'model': 'gpt-4o-mini',
+        'env_key': 'OPENAI_API_KEY'
+    },
+    'anthropic': {
+        'base_url': 'https://api.anthropic.com/v1',
+        'model': 'claude-3-5-sonnet-20241022',
+        'env_key': 'ANTHROPIC_API_KEY'
+    }
+}
+
+
+@dataclass(frozen=True)
+class LLMClientContext:
+    """
+    Unveränderliche KI-Client-Konfiguration pro Task
+
+    Jeder Task bekommt einen eigenen Kontext (Provider, Key, Modell) mit
+    eigener gepoolter HTTP-Session. Der Generator-Singleton wird nicht mehr
+    verändert - parallele Tasks mit verschiedenen Keys/Providern können sich
+    nicht gegenseitig überschreiben.
+    """
+    provider: str
+    base_url: str
+    model: str
+    api_key: str = field(repr=False)
+    session: Optional[requests.Session] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def create(cls, provider: str, api_key: str, base_url: str = None, model: str = None,
+               pool_size: int = 10) -> 'LLMClientContext':
+        """Kontext mit eigener Session (Keep-Alive, pool_size parallele Verbindungen)"""
+        config = PROVIDERS.get(provider, {})
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return cls(
+            provider=provider,
+            base_url=base_url or config.get('base_url', ''),
+            model=model or config.get('model', ''),
+            api_key=api_key,
+            session=session,
+        )
+
+    def close(self):
+        """Gibt die Verbindungen des Pools frei (am Task-Ende)"""
+        if self.session is not None:
+            self.session.close()
+
 
 @dataclass
 class GenerationResult:
@@ -74,57 +140,6 @@ class ComplimentGenerator:
         print(result.text)  # Der generierte Text
     """
     
-    # Deutsche Vornamen für Geschlechts-Erkennung (Anrede)
-    MALE_NAMES = {
-        'alexander', 'andreas', 'benjamin', 'christian', 'daniel', 'david',
-        'dennis', 'dominik', 'eric', 'erik', 'fabian', 'felix', 'florian',
-        'frank', 'hans', 'jan', 'jens', 'johannes', 'jonas', 'julian',
-        'kai', 'kevin', 'klaus', 'lars', 'lukas', 'marcel', 'marco',
-        'marcus', 'mario', 'markus', 'martin', 'matthias', 'max',
-        'maximilian', 'michael', 'niklas', 'nils', 'oliver', 'patrick',
-        'paul', 'peter', 'philipp', 'ralf', 'rene', 'robin', 'sascha',
-        'sebastian', 'simon', 'stefan', 'steffen', 'stephan', 'thomas',
-        'tim', 'tobias', 'tom', 'uwe', 'wolfgang', 'achim', 'albert',
-        'alfred', 'armin', 'bernd', 'bernhard', 'boris', 'carsten',
-        'christoph', 'claus', 'detlef', 'dieter', 'dirk', 'eckhard',
-        'edgar', 'egon', 'ernst', 'erwin', 'franz', 'fred', 'friedhelm',
-        'friedrich', 'georg', 'gerald', 'gerd', 'gerhard', 'günter',
-        'günther', 'guido', 'harald', 'hartmut', 'heinrich', 'heinz',
-        'helmut', 'herbert', 'hermann', 'holger', 'horst', 'hubert',
-        'ingo', 'jakob', 'joachim', 'jochen', 'jörg', 'josef', 'jürgen',
-        'karl', 'karsten', 'kurt', 'leon', 'leopold', 'lothar', 'ludwig',
-        'manfred', 'manuel', 'marc', 'norbert', 'olaf', 'otto', 'pascal',
-        'ralph', 'rainer', 'reinhard', 'reinhold', 'richard', 'robert',
-        'roland', 'rolf', 'rudolf', 'rüdiger', 'sven', 'theo', 'theodor',
-        'thorsten', 'torsten', 'udo', 'ulrich', 'volker', 'walter',
-        'werner', 'wilhelm', 'willi', 'winfried'
-    }
-    
-    FEMALE_NAMES = {
-        'alexandra', 'andrea', 'angelika', 'anja', 'anna', 'anne',
-        'annette', 'antje', 'barbara', 'bianca', 'brigitte', 'carina',
-        'carmen', 'carolin', 'caroline', 'christina', 'christiane',
-        'claudia', 'daniela', 'diana', 'doris', 'elena', 'elke', 'eva',
-        'franziska', 'gabriele', 'heike', 'helena', 'ines', 'iris',
-        'jana', 'jasmin', 'jennifer', 'jessica', 'johanna', 'julia',
-        'juliane', 'karin', 'katharina', 'kathrin', 'katja', 'katrin',
-        'kerstin', 'kristina', 'lara', 'laura', 'lea', 'lena', 'linda',
-        'lisa', 'manuela', 'maria', 'marie', 'marina', 'marion', 'martina',
-        'melanie', 'michaela', 'monika', 'nadine', 'natalie', 'nicole',
-        'nina', 'petra', 'sabine', 'sabrina', 'sandra', 'sara', 'sarah',
-        'silke', 'simone', 'sophia', 'stefanie', 'stephanie', 'susanne',
-        'tanja', 'ulrike', 'ursula', 'vanessa', 'vera', 'yvonne',
-        'adelheid', 'agnes', 'anita', 'anke', 'astrid', 'beate', 'bettina',
-        'christa', 'cornelia', 'dagmar', 'dora', 'edith', 'elfriede',
-        'elisabeth', 'ella', 'emma', 'erika', 'erna', 'frieda', 'gerda',
-        'gertrud', 'gisela', 'greta', 'gudrun', 'hanna', 'hannah', 'hedwig',
-        'helene', 'helga', 'hilde', 'hildegard', 'ilse', 'ingrid', 'irene',
-        'jutta', 'karla', 'klara', 'lieselotte', 'lotte', 'luise', 'magda',
-        'margarete', 'margot', 'marianne', 'marlene', 'marta', 'martha',
-        'mathilde', 'meike', 'nora', 'renate', 'rita', 'rosa', 'rosemarie',
-        'ruth', 'sonja', 'sophie', 'traute', 'ulla', 'waltraud', 'wiebke'
-    }
-    
     # Team-Erkennungs-Keywords
     TEAM_KEYWORDS = [
         'team', 'mitarbeiter', 'mitarbeiterin', 'personal', 'angestellte',
@@ -146,9 +161,19 @@ class ComplimentGenerator:
         self.api_key = ""
         self.api_base_url = ""
         self.api_model = "deepseek-chat"
+        # Session für Aufrufe ohne eigenen Task-Kontext (Einzel-Generierung)
+        self._session = requests.Session()
         
         self._load_api_config(api_config_file)
     
+    @property
+    def api_provider(self) -> str:
+        """Provider-Name aus der Base-URL (Schlüssel für die Rate-Limits)"""
+        for provider in ('deepseek', 'openai', 'anthropic'):
+            if provider in (self.api_base_url or ''):
+                return provider
+        return 'default'
+
     def _load_api_config(self, config_file: str):
         """Lädt API-Konfiguration aus Datei und Umgebungsvariablen"""
         try:
@@ -213,37 +238,13 @@ class ComplimentGenerator:
             logger.info(f"✅ API aus Umgebungsvariable geladen: Anthropic")
             return
 
-    def set_provider(self, provider: str):
-        """Wechselt den API-Provider zur Laufzeit"""
-        provider = provider.lower()
-
-        providers = {
-            'deepseek': {
-                'base_url': 'https://api.deepseek.com/v1',
-                'model': 'deepseek-chat',
-                'env_key': 'DEEPSEEK_API_KEY'
-            },
-            'openai': {
-                'base_url': 'https://api.openai.com/v1',
-                'model': 'gpt-4o-mini',
-                'env_key': 'OPENAI_API_KEY'
-            },
-            'anthropic': {
-                'base_url': 'https://api.anthropic.com/v1',
-                'model': 'claude-3-5-sonnet-20241022',
-                'env_key': 'ANTHROPIC_API_KEY'
-            }
-        }
-
-        if provider not in providers:
-            logger.warning(f"Unbekannter Provider: {provider}")
-            return False
-
-        config = providers[provider]
+    def resolve_api_key(self, provider: str) -> str:
+        """API-Key eines Providers aus Umgebungsvariable oder Config-Datei ('' wenn keiner)"""
+        config = PROVIDERS.get(provider)
+        if not config:
+            return ''
 
-        # API-Key aus Umgebungsvariable oder Config-Datei
         api_key = os.environ.get(config['env_key'], '')
-
         if not api_key:
             # Versuche aus Config-Datei
             try:
@@ -254,6 +255,18 @@ class ComplimentGenerator:
                     api_key = api_config.get('providers', {}).get(provider, {}).get('api_key', '')
             except:
                 pass
+        return api_key
+
+    def set_provider(self, provider: str):
+        """Wechselt den API-Provider zur Laufzeit (nur für Einzelaufrufe - Tasks nutzen client_for)"""
+        provider = provider.lower()
+
+        if provider not in PROVIDERS:
+            logger.warning(f"Unbekannter Provider: {provider}")
+            return False
+
+        config = PROVIDERS[provider]
+        api_key = self.resolve_api_key(provider)
 
         if api_key:
             self.api_enabled = True
@@ -266,6 +279,37 @@ class ComplimentGenerator:
             logger.warning(f"⚠️ Kein API-Key für {provider} gefunden")
             return False
 
+    def client_for(self, provider: str, api_key: str = None, pool_size: int = 10) -> Optional[LLMClientContext]:
+        """
+        Erstellt einen Task-Kontext, ohne den Generator zu verändern
+
+        Args:
+            provider: 'deepseek', 'openai', 'anthropic'
+            api_key: Session-Key (hat Priorität); sonst Umgebung/Config
+            pool_size: Parallele Verbindungen der Session
+
+        Returns:
+            LLMClientContext oder None wenn kein Key gefunden wurde
+        """
+        provider = (provider or '').lower()
+        api_key = api_key or self.resolve_api_key(provider)
+        if api_key and provider in PROVIDERS:
+            return LLMClientContext.create(provider, api_key, pool_size=pool_size)
+
+        # Fallback: Standard-Konfiguration des Generators (api_config.json / Umgebung)
+        if self.api_enabled and self.api_key:
+            logger.warning(f"⚠️ Kein API-Key für {provider} - nutze {self.api_provider}")
+            return LLMClientContext.create(self.api_provider, self.api_key, base_url=self.api_base_url,
+                                           model=self.api_model, pool_size=pool_size)
+        return None
+
+    def _default_client(self) -> Optional[LLMClientContext]:
+        """Kontext aus der eigenen Konfiguration (Aufrufe ohne Task-Kontext)"""
+        if not self.api_enabled or not self.api_key:
+            return None
+        return LLMClientContext(provider=self.api_provider, base_url=self.api_base_url,
+                                model=self.api_model, api_key=self.api_key, session=self._session)
+
     def _detect_gender(self, first_name: str) -> str:
         """
         Erkennt Geschlecht basierend auf Vorname
@@ -278,10 +322,10 @@ class ComplimentGenerator:
         
         name_lower = first_name.lower().strip()
         
-        if name_lower in self.MALE_NAMES:
-            return 'male'
-        elif name_lower in self.FEMALE_NAMES:
-            return 'female'
+        gender = get_name_lexicon().gender(name_lower.split('-')[0])
+        if gender:
+            # Unisex-Namen bewusst 'unknown' - neutrale Anrede statt Raten
+            return gender
         
         # Heuristik: Namen die auf 'a' enden sind oft weiblich (im Deutschen)
         if name_lower.endswith('a') and not name_lower.endswith('ja'):
@@ -459,10 +503,12 @@ class ComplimentGenerator:
             '{datum_lang}': datum_lang,
         }
         
-        # Custom Attributes hinzufügen
+        # Custom Attributes hinzufügen (interne Schlüssel wie '_original_row' nicht)
         attributes = safe_get(company, 'attributes', {})
         if attributes and isinstance(attributes, dict):
             for key, value in attributes.items():
+                if key.startswith('_'):
+                    continue
                 placeholders[f'{{{key}}}'] = str(value) if value is not None else ''
         
         return placeholders
@@ -495,14 +541,19 @@ class ComplimentGenerator:
         return processed_text, replaced, missing
     
     def _call_api(self, system_prompt: str, user_prompt: str, 
-                  temperature: float = 0.7, max_tokens: int = 500) -> Dict[str, Any]:
+                  temperature: float = 0.7, max_tokens: int = 500,
+                  client: Optional[LLMClientContext] = None) -> Dict[str, Any]:
         """
         Ruft die KI-API auf
         
+        Args:
+            client: Task-Kontext (Key, Modell, Session); ohne: eigene Konfiguration
+        
         Returns:
             Dict mit 'text', 'success', 'error', 'tokens_used'
         """
-        if not self.api_enabled or not self.api_key:
+        client = client or self._default_client()
+        if client is None or not client.api_key:
             return {
                 'text': '',
                 'success': False,
@@ -511,12 +562,12 @@ class ComplimentGenerator:
             }
         
         headers = {
-            'Authorization': f'Bearer {self.api_key}',
+            'Authorization': f'Bearer {client.api_key}',
             'Content-Type': 'application/json'
         }
         
         data = {
-            'model': self.api_model,
+            'model': client.model,
             'messages': [
                 {'role': 'system', 'content': system_prompt},
                 {'role': 'user', 'content': user_prompt}
@@ -526,23 +577,37 @@ class ComplimentGenerator:
         }
         
         if self.debug:
-            logger.debug(f"API Request - Model: {self.api_model}")
+            logger.debug(f"API Request - Model: {client.model}")
             logger.debug(f"System Prompt: {system_prompt[:200]}...")
             logger.debug(f"User Prompt: {user_prompt[:200]}...")
         
+        # Rate-Limits des Providers (geteilt mit allen parallelen Aufrufen)
+        limiter = get_rate_limiter(client.provider)
+        estimated_tokens = (len(system_prompt) + len(user_prompt)) // 4 + max_tokens
+        
         try:
-            response = requests.post(
-                f"{self.api_base_url}/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=45
-            )
+            for attempt in range(API_MAX_RETRIES + 1):
+                with limiter.slot(estimated_tokens):
+                    response = (client.session or requests).post(
+                        f"{client.base_url}/chat/completions",
+                        headers=headers,
+                        json=data,
+                        timeout=45
+                    )
+                if response.status_code not in API_RETRY_STATUS or attempt == API_MAX_RETRIES:
+                    break
+                # 429/503: Retry-After respektieren, sonst exponentiell warten
+                delay = parse_retry_after(response.headers.get('Retry-After'))
+                if delay is None:
+                    delay = min(2 ** (attempt + 1), 60)
+                limiter.pause(delay)
             response.raise_for_status()
             
             result = response.json()
             
             text = result['choices'][0]['message']['content'].strip()
             tokens = result.get('usage', {}).get('total_tokens', 0)
+            limiter.record_usage(estimated_tokens, tokens)
             
             if self.debug:
                 logger.debug(f"API Response: {text[:200]}...")
@@ -578,7 +643,8 @@ class ComplimentGenerator:
             }
     
     def generate(self, company, prompt: str, system_prompt: str = None,
-                 temperature: float = 0.7, max_tokens: int = 500) -> GenerationResult:
+                 temperature: float = 0.7, max_tokens: int = 500,
+                 client: Optional[LLMClientContext] = None) -> GenerationResult:
         """
         Generiert Text für eine Company basierend auf Custom Prompt
         
@@ -588,12 +654,14 @@ class ComplimentGenerator:
             system_prompt: Optional - System-Prompt für die KI
             temperature: Kreativität (0.0-1.0)
             max_tokens: Max. Länge der Antwort
+            client: Task-Kontext (thread-sicher, für parallele Tasks); ohne: eigene Konfiguration
         
         Returns:
             GenerationResult mit generiertem Text
         """
+        client = client or self._default_client()
         result = GenerationResult()
-        result.model_used = self.api_model
+        result.model_used = client.model if client else self.api_model
         
         # Platzhalter erstellen
         placeholders = self._build_placeholders(company)
@@ -629,7 +697,8 @@ class ComplimentGenerator:
             processed_system, 
             processed_prompt,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            client=client
         )
         
         result.text = api_result['text']
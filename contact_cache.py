@@ -0,0 +1,120 @@
+"""
+Contact Cache - Scraping-Ergebnisse pro Domain (projektübergreifend)
+
+Der Name-Finder fragt hier zuerst nach, bevor er eine Website scraped.
+Überlappende Lead-Listen werden so ohne Netzwerk-I/O befüllt.
+
+TTL (per Umgebungsvariable änderbar):
+- CONTACT_CACHE_TTL_DAYS           Treffer (Name gefunden), Standard 30 Tage
+- CONTACT_CACHE_NEGATIVE_TTL_DAYS  Nichts gefunden, Standard 3 Tage
+
+Negativ gecacht wird nur, wenn das Impressum wirklich geladen und
+ausgewertet wurde - Timeouts, Verbindungsfehler oder eine nicht gefundene
+Impressum-URL werden beim nächsten Lauf erneut versucht.
+"""
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import urlparse
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models_v3 import ContactCacheEntry
+from impressum_scraper_ultimate import ContactResult
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = timedelta(days=float(os.environ.get('CONTACT_CACHE_TTL_DAYS', 30)))
+NEGATIVE_CACHE_TTL = timedelta(days=float(os.environ.get('CONTACT_CACHE_NEGATIVE_TTL_DAYS', 3)))
+
+# Plattformen, auf denen viele Firmen unter EINER Domain liegen
+# -> Schlüssel enthält zusätzlich das erste Pfad-Segment
+SHARED_HOSTS = {
+    'facebook.com', 'instagram.com', 'linkedin.com', 'xing.com', 'twitter.com', 'x.com',
+    'youtube.com', 'tiktok.com', 'linktr.ee', 'google.com', 'sites.google.com',
+}
+
+_CACHE_FIELDS = (
+    'first_name', 'last_name', 'email', 'phone', 'position', 'impressum_url',
+    'found_name', 'found_email', 'extraction_method', 'confidence',
+)
+
+
+def normalize_domain(website: str) -> Optional[str]:
+    """
+    Cache-Schlüssel für eine Website
+
+    "https://www.Mueller-Bau.de/kontakt" -> "mueller-bau.de"
+    "facebook.com/MuellerBau"           -> "facebook.com/muellerbau"
+    """
+    if not website:
+        return None
+    website = website.strip()
+    if '://' not in website:
+        website = 'http://' + website
+    try:
+        parsed = urlparse(website)
+    except ValueError:
+        return None
+
+    host = (parsed.hostname or '').lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host or '.' not in host:
+        return None
+
+    if host in SHARED_HOSTS:
+        segment = parsed.path.strip('/').split('/')[0].lower()
+        if not segment:
+            return None
+        host = f"{host}/{segment}"
+    return host[:255]
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite liefert naive Datetimes zurück (gespeichert als UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def get_cached_contact(session, website: str) -> Optional[ContactResult]:
+    """
+    Liefert das gecachte Ergebnis oder None (nicht vorhanden / abgelaufen)
+
+    Ein Treffer mit found_name=False bedeutet: kürzlich erfolglos gescraped.
+    """
+    domain = normalize_domain(website)
+    if not domain:
+        return None
+
+    entry = session.get(ContactCacheEntry, domain)
+    if entry is None or entry.scraped_at is None:
+        return None
+
+    ttl = CACHE_TTL if entry.found_name else NEGATIVE_CACHE_TTL
+    if datetime.now(timezone.utc) - _as_utc(entry.scraped_at) > ttl:
+        return None
+
+    return ContactResult.from_dict({field: getattr(entry, field) for field in _CACHE_FIELDS})
+
+
+def store_contact(session, website: str, result: ContactResult) -> None:
+    """
+    Speichert ein Scraping-Ergebnis (Upsert, auch negative Ergebnisse)
+
+    Ergebnisse ohne ausgewertetes Impressum (Seite nicht erreichbar,
+    keine Impressum-URL, leeres HTML) werden nicht gespeichert.
+    Commit übernimmt der Aufrufer - zusammen mit dem Lead-Update.
+    """
+    if not result.impressum_parsed:
+        return
+    domain = normalize_domain(website)
+    if not domain:
+        return
+
+    values = {field: getattr(result, field) for field in _CACHE_FIELDS}
+    values['scraped_at'] = datetime.now(timezone.utc)
+
+    stmt = sqlite_insert(ContactCacheEntry).values(domain=domain, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=['domain'], set_=values)
+    session.execute(stmt)
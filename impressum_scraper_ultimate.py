@@ -11,21 +11,26 @@ Features:
 - Robuste Fallbacks auf allen Ebenen
 """
 import requests
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
 import re
 import time
 import logging
 import json
 import os
+import threading
+import zlib
+import codecs
+import xml.etree.ElementTree as ET
 from urllib.parse import urljoin, urlparse, parse_qs, unquote
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, Iterator
 from dataclasses import dataclass, field
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import WebDriverException, TimeoutException as SeleniumTimeout
 from webdriver_manager.chrome import ChromeDriverManager
-import html as html_module
+
+from name_lexicon import get_name_lexicon
 
 # Versuche dotenv zu laden (optional)
 try:
@@ -38,6 +43,123 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Statistische Zeichensatz-Erkennung (charset_normalizer/chardet, je nach requests-Installation)
+try:
+    from requests.compat import chardet as _charset_detector
+except ImportError:
+    _charset_detector = None
+
+# Zeichensatz-Erkennung: nur Kopf/Präfix des Dokuments wird untersucht
+_CHARSET_SNIFF_BYTES = 4096             # BOM + <meta charset>
+_CHARSET_DETECT_BYTES = 32 * 1024       # Präfix für die statistische Erkennung
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+_LATIN1 = codecs.lookup('latin-1').name   # requests rät Latin-1 wenn kein Charset angegeben ist
+_ASCII_BYTES = bytes(range(128))
+_WESTERN_MAX_HIGH_RATIO = 0.15          # Westeuropäischer Text: wenige Bytes > 0x7F (Umlaute)
+_META_CHARSET_RE = re.compile(
+    rb'<meta[^>]+?charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)', re.IGNORECASE
+)
+# Doppelt-encodiertes UTF-8 (z.B. "Ã¼" statt "ü"): UTF-8-Bytefolgen als Latin-1 gelesen
+_MOJIBAKE_RE = re.compile('(?:[\xc2-\xf4][\x80-\xbf]{1,3})+')
+
+
+def _fix_mojibake(text: str) -> str:
+    """Repariert doppelt-encodierte UTF-8-Sequenzen ("Ã¼" → "ü"), Rest bleibt unverändert"""
+    def _repair(match):
+        try:
+            return match.group(0).encode('latin-1').decode('utf-8')
+        except UnicodeDecodeError:
+            return match.group(0)  # Echte Latin-1-Zeichen, kein Mojibake
+    return _MOJIBAKE_RE.sub(_repair, text)
+
+
+def _lookup_encoding(name: Optional[str]) -> Optional[str]:
+    """Normalisiert einen Encoding-Namen, None wenn Python ihn nicht kennt"""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip().strip('"\'')).name
+    except LookupError:
+        return None
+
+
+def detect_html_encoding(content: bytes, declared: Optional[str] = None) -> str:
+    """
+    Bestimmt den Zeichensatz eines HTML-Dokuments mit begrenztem Aufwand
+
+    Reihenfolge:
+    1. BOM
+    2. Explizit deklarierter Header-Charset (außer Latin-1, das requests oft nur rät)
+    3. <meta charset> / http-equiv im Dokumentkopf
+    4. UTF-8-Prüfung auf einem Präfix
+    5. Windows-1252 für westeuropäischen Text (überwiegend ASCII, vereinzelte Umlaute)
+    6. Statistische Erkennung auf dem Präfix (nie auf dem ganzen Body)
+    """
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    declared = _lookup_encoding(declared)
+    if declared and declared != _LATIN1:
+        return declared
+
+    meta = _META_CHARSET_RE.search(content[:_CHARSET_SNIFF_BYTES])
+    if meta:
+        meta_encoding = _lookup_encoding(meta.group(1).decode('ascii', 'ignore'))
+        if meta_encoding:
+            return meta_encoding
+
+    prefix = content[:_CHARSET_DETECT_BYTES]
+    try:
+        # final=False: am Präfix-Ende abgeschnittene Multibyte-Zeichen sind kein Fehler
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # Kein UTF-8: DACH-Seiten sind dann fast immer Latin-1/Windows-1252
+    high_bytes = len(prefix.translate(None, _ASCII_BYTES))
+    if high_bytes <= len(prefix) * _WESTERN_MAX_HIGH_RATIO:
+        return 'cp1252'
+
+    if _charset_detector is not None:
+        try:
+            detected = _lookup_encoding(_charset_detector.detect(prefix).get('encoding'))
+            if detected:
+                return detected
+        except Exception:
+            pass
+
+    return declared or 'utf-8'
+
+
+def decode_html(content: bytes, declared: Optional[str] = None) -> str:
+    """Dekodiert HTML-Bytes (begrenzte Erkennung) und repariert Mojibake einmalig"""
+    encoding = detect_html_encoding(content, declared)
+    try:
+        text = content.decode(encoding, errors='replace')
+    except LookupError:
+        text = content.decode('utf-8', errors='replace')
+    return _fix_mojibake(text)
+
+
+def _decode_cfemail(encoded: str) -> Optional[str]:
+    """Dekodiert Cloudflare-E-Mail-Schutz (data-cfemail / #email-protection)"""
+    try:
+        data = bytes.fromhex(encoded.strip())
+    except ValueError:
+        return None
+    if len(data) < 2:
+        return None
+    key = data[0]
+    return bytes(b ^ key for b in data[1:]).decode('utf-8', errors='ignore')
+
 
 @dataclass
 class ContactResult:
@@ -54,6 +176,7 @@ class ContactResult:
     found_email: bool = False
     extraction_method: Optional[str] = None  # Wie wurde der Name gefunden
     confidence: float = 0.0  # 0.0 - 1.0
+    impressum_parsed: bool = False  # Impressum geladen und ausgewertet (nicht Teil von to_dict)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -71,6 +194,15 @@ class ContactResult:
             'confidence': self.confidence
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ContactResult':
+        """Gegenstück zu to_dict (unbekannte Keys werden ignoriert)"""
+        known = cls.__dataclass_fields__
+        result = cls(**{k: v for k, v in data.items() if k in known and v is not None})
+        if result.first_name and result.last_name and not result.full_name:
+            result.full_name = f"{result.first_name} {result.last_name}"
+        return result
+
 
 class ImpressumScraperUltimate:
     """
@@ -130,7 +262,20 @@ class ImpressumScraperUltimate:
         '.footer-bottom', '#footer-bottom',
         '.site-info', '#site-info',
     ]
-    
+
+    # Sitemap-Suche (Streaming - große Shop-Sitemaps werden nie komplett geladen)
+    SITEMAP_KEYWORDS = ['impressum', 'imprint', 'legal-notice', 'legal']
+    SITEMAP_MAX_BYTES = 2 * 1024 * 1024     # Max. (entpackte) Bytes pro Sitemap-Datei
+    SITEMAP_MAX_FILES = 6                   # Max. Dateien inkl. Kinder eines Sitemap-Index
+    SITEMAP_CHUNK_SIZE = 16 * 1024
+    SITEMAP_TIMEOUT = 4                     # Wie _try_common_paths
+    SITEMAP_FALLBACK_PATHS = ['/sitemap.xml', '/sitemap_index.xml', '/sitemap', '/sitemap.xml.gz']
+
+    # Kontakt-Scanner (Schutz vor pathologischen Seiten)
+    SCAN_MAX_HTML_CHARS = 2_000_000         # Max. HTML-Zeichen die geparst werden
+    SCAN_MAX_TEXT_CHARS = 500_000           # Max. Textzeichen die gescannt werden
+    SCAN_MAX_NODE_CHARS = 20_000            # Max. Zeichen pro Textknoten
+
     # Positions-Keywords für Geschäftsführer (priorisiert)
     POSITION_KEYWORDS = [
         # Höchste Priorität - Geschäftsführung
@@ -193,117 +338,8 @@ class ImpressumScraperUltimate:
         ('vorsitzende', 0.65),
     ]
     
-    # Häufige deutsche Vornamen (umfassend - für Validierung)
-    COMMON_FIRST_NAMES = {
-        # Männlich - häufig
-        'alexander', 'andreas', 'benjamin', 'christian', 'daniel', 'david',
-        'dennis', 'dominik', 'eric', 'erik', 'fabian', 'felix', 'florian',
-        'frank', 'hans', 'jan', 'jens', 'johannes', 'jonas', 'julian',
-        'kai', 'kevin', 'klaus', 'lars', 'lukas', 'marcel', 'marco',
-        'marcus', 'mario', 'markus', 'martin', 'matthias', 'max',
-        'maximilian', 'michael', 'niklas', 'nils', 'oliver', 'patrick',
-        'paul', 'peter', 'philipp', 'ralf', 'rene', 'robin', 'sascha',
-        'sebastian', 'simon', 'stefan', 'steffen', 'stephan', 'thomas',
-        'tim', 'tobias', 'tom', 'uwe', 'wolfgang',
-        # Männlich - erweitert
-        'achim', 'adalbert', 'adam', 'adrian', 'albert', 'albrecht', 'alfons',
-        'alfred', 'ali', 'amin', 'andre', 'anton', 'armin', 'arnd', 'arndt',
-        'arne', 'arno', 'arnold', 'arthur', 'august', 'axel',
-        'bastian', 'benedikt', 'benno', 'bernd', 'bernhard', 'bert', 'berthold',
-        'björn', 'boris', 'bruno', 'burkhard', 'carl', 'carsten', 'christof',
-        'christoff', 'christoph', 'christopher', 'claus', 'clemens', 'conrad', 'cornelius',
-        'detlef', 'detlev', 'dieter', 'dietmar', 'dietrich', 'dirk',
-        'eckhard', 'edgar', 'edmund', 'eduard', 'egon', 'eike', 'ekkehard',
-        'elmar', 'emanuele', 'emil', 'enrico', 'erhard', 'ernest', 'ernst',
-        'erwin', 'eugen',
-        'ferdinand', 'franz', 'frederik', 'friedhelm', 'friedrich', 'fritz',
-        'georg', 'gerald', 'gerd', 'gerhard', 'gert', 'gottfried', 'gregor',
-        'guido', 'gunnar', 'gunter', 'günter', 'günther', 'gustav', 'gernot',
-        'hagen', 'harald', 'hartmut', 'hartwig', 'heiko', 'heiner', 'heinrich',
-        'heinz', 'helmut', 'hendrik', 'henning', 'henry', 'herbert', 'hermann',
-        'hilmar', 'holger', 'horst', 'hubert', 'hugo', 'ibrahim',
-        'ignaz', 'ingo', 'ingolf', 'ivo',
-        'jacob', 'jakob', 'joachim', 'jochen', 'jörg', 'jörn', 'josef',
-        'joseph', 'jürgen', 'julius', 'justus',
-        'karlheinz', 'karl', 'karsten', 'kaspar', 'konrad', 'konstantin',
-        'kurt', 'leo', 'leon', 'leonard', 'leopold', 'lorenz', 'lothar',
-        'louis', 'ludwig', 'luca', 'ludger', 'lutz', 'manfred',
-        'marc', 'marcello', 'mark', 'marius', 'marko', 'marvin', 'mathias',
-        'mato', 'maurizio', 'maxim', 'mehmet', 'meinhard', 'mirko', 'miroslav',
-        'mohammad', 'moritz', 'muhammed', 'mustafa',
-        'nico', 'nicolai', 'nikolai', 'nikolaus', 'norbert',
-        'olaf', 'oskar', 'oswald', 'otmar', 'otto', 'pascal',
-        'rafael', 'raimund', 'rainer', 'ralph', 'raoul', 'raphael', 'rasso',
-        'reiner', 'reinhard', 'reinhold', 'richard', 'rigo', 'robert', 'roger',
-        'roland', 'rolf', 'roman', 'ronald', 'rüdiger', 'rudolf', 'rupert',
-        'samuel', 'sandro', 'siegfried', 'siegmund', 'sönke', 'sven',
-        'theodor', 'thilo', 'thorsten', 'tilman', 'torben', 'torsten', 'tristan',
-        'udo', 'ulf', 'ulrich', 'utz',
-        'valentin', 'viktor', 'vincent', 'vinzenz', 'volker',
-        'waldemar', 'walter', 'werner', 'wilfried', 'wilhelm', 'willi',
-        'winfried', 'wolfram',
-        'yannick', 'yusuf',
-        # Weiblich - häufig
-        'alexandra', 'andrea', 'angelika', 'anja', 'anna', 'anne',
-        'annette', 'antje', 'barbara', 'bianca', 'brigitte', 'carina',
-        'carmen', 'carolin', 'caroline', 'christina', 'christiane',
-        'claudia', 'daniela', 'diana', 'doris', 'elena', 'elke', 'eva',
-        'franziska', 'gabriele', 'heike', 'helena', 'ines', 'iris',
-        'jana', 'jasmin', 'jennifer', 'jessica', 'johanna', 'julia',
-        'juliane', 'karin', 'katharina', 'kathrin', 'katja', 'katrin',
-        'kerstin', 'kristina', 'lara', 'laura', 'lea', 'lena', 'linda',
-        'lisa', 'manuela', 'maria', 'marie', 'marina', 'marion', 'martina',
-        'melanie', 'michaela', 'monika', 'nadine', 'natalie', 'nicole',
-        'nina', 'petra', 'sabine', 'sabrina', 'sandra', 'sara', 'sarah',
-        'silke', 'simone', 'sophia', 'stefanie', 'stephanie', 'susanne',
-        'tanja', 'ulrike', 'ursula', 'vanessa', 'vera', 'yvonne',
-        # Weiblich - erweitert
-        'adelheid', 'agnes', 'agathe', 'aida', 'alice', 'alina', 'amelie',
-        'anette', 'angelina', 'anita', 'anke', 'annegret', 'anneliese',
-        'annemarie', 'astrid', 'ayse',
-        'beate', 'beatrice', 'beatrix', 'bella', 'berta', 'bettina', 'birgit',
-        'britta', 'charlotte', 'christa', 'christel', 'christine', 'clara',
-        'conny', 'constanze', 'cordula', 'corinna', 'cornelia', 'dagmar',
-        'denise', 'dora', 'dorothea', 'dorothee', 'dorrit',
-        'edith', 'elfriede', 'elisabeth', 'ella', 'eleonore', 'emilia', 'emily',
-        'emma', 'erika', 'erna', 'esther', 'eugenia',
-        'fatima', 'felicitas', 'frieda', 'friederike',
-        'gabi', 'gerda', 'gerlinde', 'gertrud', 'gisela', 'gudrun', 'gunda',
-        'hanna', 'hannah', 'harriet', 'hedwig', 'heidi', 'helga', 'hella',
-        'helene', 'henriette', 'herta', 'hilde', 'hildegard',
-        'ida', 'ilka', 'ilona', 'ilse', 'imke', 'ina', 'inga', 'ingeborg',
-        'ingrid', 'irene', 'isabell', 'isabelle',
-        'jaqueline', 'judith', 'jutta',
-        'karen', 'karla', 'karoline', 'kirsten', 'klara',
-        'larissa', 'leonie', 'liane', 'lidia', 'liesel', 'lilli', 'lina',
-        'lotte', 'lucia', 'luise', 'lydia',
-        'madeleine', 'magdalena', 'margit', 'margret', 'margot', 'marianne',
-        'marita', 'marlene', 'marlies', 'martha', 'mathilde', 'mechthild',
-        'meike', 'melissa', 'mia', 'mira', 'miriam', 'mirjam',
-        'nadia', 'natascha', 'nele', 'nora',
-        'olivia',
-        'patricia', 'paula', 'pauline', 'pia',
-        'ramona', 'rebecca', 'regina', 'regine', 'renate', 'rita', 'rosa',
-        'rosemarie', 'roswitha', 'ruth',
-        'selina', 'sibylle', 'sigrid', 'sonja', 'svenja', 'sylvia',
-        'tamara', 'tatjana', 'theresa', 'theresia', 'traute', 'trude',
-        'ute', 'veronica', 'veronika', 'viola', 'vivien',
-        'waltraud', 'wanda', 'wiebke', 'wilhelmine',
-        # Internationale Vornamen (häufig in DE)
-        'ahmed', 'amir', 'carlo', 'cesare', 'dario', 'diego', 'dimitri',
-        'emre', 'enver', 'epiphanie', 'fatih', 'giovanni', 'giuseppe',
-        'goran', 'hakan', 'hassan', 'ivan', 'jordie', 'kemal', 'khalid',
-        'luca', 'luigi', 'mahmoud', 'marek', 'maroof', 'matteo', 'milan',
-        'mohammed', 'nabil', 'omar', 'osman', 'paolo', 'pierre', 'reza',
-        'roberto', 'salvatore', 'samir', 'sergej', 'stefano', 'vincenzo',
-        'vladislav', 'yasin', 'zoran',
-        # Ergänzungen aus CSV-Analyse
-        'nadia', 'janine', 'evelyn', 'marleen', 'madlen', 'rufus', 'fabio',
-        'yevgeniy', 'reinfried', 'diethelm', 'nico',
-        # Ergänzungen aus Impressum-Analyse (fehlende internationale Namen)
-        'fikriye', 'samia', 'jordie', 'torben', 'claus', 'niklas',
-        'sarah', 'sandra', 'birgit', 'henning', 'wilfried', 'ludgerus',
-    }
+    # Häufige deutsche Vornamen (gemeinsames Lexikon, siehe name_lexicon.py)
+    COMMON_FIRST_NAMES = get_name_lexicon()
     
     # Wörter die KEINE Namen sind (Blacklist)
     NAME_BLACKLIST = {
@@ -398,6 +434,8 @@ class ImpressumScraperUltimate:
         # Cache
         self.cache_file = "impressum_cache_v2.json"
         self.cache = self._load_cache()
+        # scrape() läuft parallel im Scrape-Pool des Name-Finders
+        self._cache_lock = threading.Lock()
         
         # ChromeDriver
         self._init_chrome_driver()
@@ -428,7 +466,7 @@ class ImpressumScraperUltimate:
         return {}
 
     def _save_cache(self):
-        """Speichert Cache"""
+        """Speichert Cache (Aufrufer hält _cache_lock)"""
         try:
             with open(self.cache_file, 'w', encoding='utf-8') as f:
                 json.dump(self.cache, f, indent=2, ensure_ascii=False)
@@ -585,17 +623,20 @@ class ImpressumScraperUltimate:
                 except re.error as e:
                     logger.warning(f"Regex-Fehler: {pattern} - {e}")
         
-        # E-Mail Pattern
-        self.email_pattern = re.compile(
-            r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-            re.IGNORECASE
-        )
-        
-        # Telefon Pattern
-        self.phone_pattern = re.compile(
-            r'(?:\+49|0049|0)\s*[\d\s/\-\(\)]{8,}',
+        # Kontakt-Tokens: E-Mail, obfuskierte E-Mail und Telefon in EINEM Pattern
+        # (begrenzte Quantoren - kein katastrophales Backtracking)
+        # Obfuskiert nur mit Klammern "[at]"/"(at)" oder freistehendem " at "
+        _AT = r'(?:\s*[\[\(\{]\s*(?:at|@)\s*[\]\)\}]\s*|\s+(?:at|@)\s+)'
+        _DOT = r'(?:\s*[\[\(\{]\s*(?:dot|punkt|\.)\s*[\]\)\}]\s*|\s+(?:dot|punkt)\s+|\.)'
+        self.contact_token_pattern = re.compile(
+            r'(?P<email>[a-z0-9._%+-]{1,64}@[a-z0-9.-]{1,253}\.[a-z]{2,24})'
+            rf'|(?P<obf_local>[a-z0-9._%+-]{{1,64}}){_AT}'
+            rf'(?P<obf_domain>[a-z0-9-]{{1,63}}(?:\.[a-z0-9-]{{1,63}}){{0,4}}){_DOT}(?P<obf_tld>[a-z]{{2,24}})\b'
+            r'|(?:Tel\.?|Telefon|Phone|Fon)[:\s]+(?P<phone_labeled>[+\d\s\-/\(\)]{8,30})'
+            r'|(?P<phone>(?:\+49|0049|0)\s*[\d\s/\-\(\)]{8,30})',
             re.IGNORECASE
         )
+        self.phone_strip_pattern = re.compile(r'[^\d+]')
 
     # ===== URL NORMALISIERUNG =====
     
@@ -649,7 +690,7 @@ class ImpressumScraperUltimate:
             # Lade Homepage
             response = self.session.get(base_url, timeout=8)
             response.raise_for_status()
-            html = response.text
+            html = self._decode_response(response)
             soup = BeautifulSoup(html, 'html.parser')
             
             # Strategie 1: Footer-Links (höchste Trefferquote)
@@ -670,7 +711,13 @@ class ImpressumScraperUltimate:
                 self._cache_impressum(cache_key, impressum_url)
                 return impressum_url
             
-            # Strategie 4+5 (Sitemap/API) uebersprungen - zu langsam fuer Bulk
+            # Strategie 4: Sitemap (Streaming, Byte-Limit - auch fuer Bulk geeignet)
+            impressum_url = self._find_in_sitemap(base_url)
+            if impressum_url:
+                self._cache_impressum(cache_key, impressum_url)
+                return impressum_url
+
+            # Strategie 5 (API) uebersprungen - zu langsam fuer Bulk
 
         except Exception as e:
             logger.error(f"Fehler beim Finden der Impressum-URL: {e}")
@@ -681,8 +728,9 @@ class ImpressumScraperUltimate:
 
     def _cache_impressum(self, key: str, value: str):
         """Cached Impressum-URL"""
-        self.cache[key] = value
-        self._save_cache()
+        with self._cache_lock:
+            self.cache[key] = value
+            self._save_cache()
 
     def _find_in_footer(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
         """Sucht Impressum-Link im Footer (höchste Trefferquote)"""
@@ -772,7 +820,7 @@ class ImpressumScraperUltimate:
             try:
                 response = self.session.get(test_url, timeout=4)
                 if response.status_code == 200:
-                    text = response.text.lower()
+                    text = self._decode_response(response).lower()
                     if any(kw in text for kw in ['impressum', 'imprint', 'geschäftsführer', 'inhaber', 'verantwortlich']):
                         return test_url
             except Exception:
@@ -781,36 +829,153 @@ class ImpressumScraperUltimate:
         return None
 
     def _find_in_sitemap(self, base_url: str) -> Optional[str]:
-        """Durchsucht Sitemap nach Impressum"""
+        """
+        Durchsucht Sitemap nach Impressum (Streaming)
+
+        - Sitemap-Wurzeln aus robots.txt zuerst, sonst /sitemap.xml und Co.
+        - Sobald eine Wurzel als Sitemap geparst wurde, keine weiteren Standard-Pfade
+        - Timeout/Verbindungsfehler: Abbruch statt weiterer Pfade (Seite nicht erreichbar)
+        - Liest jede Sitemap inkrementell und bricht beim ersten Treffer ab
+        - Entpackt .xml.gz on-the-fly
+        - Folgt Sitemap-Index-Dateien (Seiten-Sitemaps vor Produkt-Sitemaps)
+        - Byte-Limit pro Datei und Limit für die Anzahl Dateien
+        """
         logger.info("🗺️ Durchsuche Sitemap...")
-        
-        sitemap_urls = [
-            urljoin(base_url, '/sitemap.xml'),
-            urljoin(base_url, '/sitemap_index.xml'),
-            urljoin(base_url, '/sitemap'),
-            urljoin(base_url, '/sitemap.xml.gz'),
-        ]
-        
-        for sitemap_url in sitemap_urls:
+
+        try:
+            roots = self._robots_sitemaps(base_url)
+        except requests.RequestException as e:
+            logger.debug(f"robots.txt nicht erreichbar ({base_url}): {e}")
+            return None
+        if not roots:
+            roots = [urljoin(base_url, path) for path in self.SITEMAP_FALLBACK_PATHS]
+
+        pending = list(roots)
+        visited = set()
+        files_read = 0
+
+        while pending and files_read < self.SITEMAP_MAX_FILES:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+
+            children = []
+            parsed = False
             try:
-                response = self.session.get(sitemap_url, timeout=10)
-                if response.status_code == 200:
-                    # Parse XML
-                    soup = BeautifulSoup(response.text, 'xml')
-                    
-                    for loc in soup.find_all('loc'):
-                        url = loc.text.strip()
-                        url_lower = url.lower()
-                        
-                        for keyword in ['impressum', 'imprint', 'legal-notice', 'legal']:
-                            if keyword in url_lower:
-                                logger.info(f"✅ Impressum in Sitemap: {url}")
-                                return url
-            except Exception:
+                for kind, loc in self._iter_sitemap_locs(sitemap_url):
+                    if kind == 'root':
+                        parsed = True
+                    elif kind == 'sitemap':
+                        children.append(loc)
+                    elif self._is_impressum_sitemap_url(loc):
+                        logger.info(f"✅ Impressum in Sitemap: {loc}")
+                        return loc
+            except (requests.Timeout, requests.ConnectionError) as e:
+                logger.debug(f"Sitemap {sitemap_url} nicht erreichbar: {e}")
+                return None
+            except Exception as e:
+                logger.debug(f"Sitemap {sitemap_url} fehlgeschlagen: {e}")
                 continue
-        
+            finally:
+                files_read += 1
+
+            if parsed:
+                # Wurzel gefunden: restliche Standard-Pfade verwerfen, nur noch Index-Kinder
+                children.sort(key=self._sitemap_child_rank)
+                pending = [u for u in children + pending if u not in roots]
+
         return None
 
+    def _robots_sitemaps(self, base_url: str) -> List[str]:
+        """Sitemap-URLs aus robots.txt (leer, wenn keine angegeben sind)"""
+        response = self.session.get(urljoin(base_url, '/robots.txt'), timeout=self.SITEMAP_TIMEOUT)
+        if response.status_code != 200:
+            return []
+        sitemaps = []
+        for line in self._decode_response(response).splitlines():
+            key, _, value = line.partition(':')
+            if key.strip().lower() == 'sitemap' and value.strip():
+                sitemaps.append(urljoin(base_url, value.strip()))
+        return sitemaps[:self.SITEMAP_MAX_FILES]
+
+    def _is_impressum_sitemap_url(self, url: str) -> bool:
+        """Prüft ob eine Sitemap-URL wie eine Impressum-Seite aussieht"""
+        url_lower = url.lower()
+        return any(keyword in url_lower for keyword in self.SITEMAP_KEYWORDS)
+
+    def _sitemap_child_rank(self, url: str) -> int:
+        """Sortiert Index-Kinder: Impressum-Treffer, dann Seiten-Sitemaps, dann Rest"""
+        url_lower = url.lower()
+        if self._is_impressum_sitemap_url(url_lower):
+            return 0
+        if 'page' in url_lower or 'seite' in url_lower:
+            return 1
+        if 'product' in url_lower or 'produkt' in url_lower or 'image' in url_lower:
+            return 3
+        return 2
+
+    def _iter_sitemap_locs(self, sitemap_url: str):
+        """
+        Liest eine Sitemap inkrementell und liefert (typ, loc)-Paare.
+
+        typ ist 'root' (einmal, loc = 'urlset'/'sitemapindex') sobald die Datei
+        als Sitemap erkannt ist, 'sitemap' für Einträge eines Sitemap-Index,
+        sonst 'url'. Es werden höchstens SITEMAP_MAX_BYTES (entpackt) verarbeitet.
+        """
+        response = self.session.get(sitemap_url, timeout=self.SITEMAP_TIMEOUT, stream=True)
+        try:
+            if response.status_code != 200:
+                return
+
+            parser = ET.XMLPullParser(events=('start', 'end'))
+            decompressor = None
+            root = None
+            container = None
+            budget = self.SITEMAP_MAX_BYTES
+            first_chunk = True
+
+            for chunk in response.iter_content(chunk_size=self.SITEMAP_CHUNK_SIZE):
+                if not chunk:
+                    continue
+
+                # .xml.gz: requests entpackt nur Content-Encoding, nicht die Datei selbst
+                if first_chunk:
+                    first_chunk = False
+                    if chunk[:2] == b'\x1f\x8b':
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                if decompressor:
+                    chunk = decompressor.decompress(chunk, budget)
+                    exhausted = bool(decompressor.unconsumed_tail)
+                else:
+                    chunk = chunk[:budget]
+                    exhausted = False
+
+                budget -= len(chunk)
+                parser.feed(chunk)
+
+                for event, elem in parser.read_events():
+                    tag = elem.tag.rsplit('}', 1)[-1]
+                    if event == 'start':
+                        if root is None:
+                            if tag not in ('urlset', 'sitemapindex'):
+                                return  # Keine Sitemap (z.B. HTML-Seite unter /sitemap)
+                            root = elem
+                            yield 'root', tag
+                        if tag in ('url', 'sitemap'):
+                            container = tag
+                    elif tag == 'loc' and elem.text:
+                        yield container or 'url', elem.text.strip()
+                    elif tag in ('url', 'sitemap') and root is not None:
+                        # Verarbeitete Einträge sofort freigeben (konstanter Speicher)
+                        root.clear()
+
+                if budget <= 0 or exhausted:
+                    logger.debug(f"Sitemap-Limit erreicht: {sitemap_url}")
+                    break
+        finally:
+            response.close()
+
     def _api_find_impressum(self, html: str, base_url: str) -> Optional[str]:
         """Verwendet DeepSeek API um Impressum-Link zu finden"""
         if not self.api_enabled:
@@ -905,10 +1070,7 @@ class ImpressumScraperUltimate:
         try:
             response = self.session.get(url, timeout=8)
             response.raise_for_status()
-            # Fix Encoding: requests rät manchmal Latin-1 statt UTF-8
-            if response.encoding and response.encoding.lower() in ('iso-8859-1', 'latin-1', 'latin1'):
-                response.encoding = response.apparent_encoding or 'utf-8'
-            html = response.text
+            html = self._decode_response(response)
 
             # Akzeptiere auch kuerzeren Content (Impressum-Seiten sind oft kurz)
             if len(html) >= 500:
@@ -919,6 +1081,17 @@ class ImpressumScraperUltimate:
 
         return ""
 
+    def _decode_response(self, response) -> str:
+        """
+        Dekodiert eine HTTP-Antwort ohne response.apparent_encoding
+
+        requests rät bei fehlendem Charset Latin-1 und würde sonst die
+        statistische Erkennung über den kompletten Body laufen lassen.
+        """
+        content_type = response.headers.get('Content-Type', '')
+        declared = response.encoding if 'charset' in content_type.lower() else None
+        return decode_html(response.content, declared)
+
     def _has_meaningful_content(self, html: str) -> bool:
         """Prüft ob HTML sinnvollen Content hat (nicht nur JS-Loader)"""
         soup = BeautifulSoup(html, 'html.parser')
@@ -991,14 +1164,9 @@ class ImpressumScraperUltimate:
                 comment.extract()
 
             # Extrahiere Text
+            # (doppelt-encodiertes UTF-8 wurde bereits beim Dekodieren repariert, siehe decode_html)
             text = soup.get_text(separator='\n', strip=True)
 
-            # Fix doppelt-encodiertes UTF-8 (z.B. "Ã¼" → "ü", "Ã¶" → "ö")
-            try:
-                text = text.encode('latin-1').decode('utf-8')
-            except (UnicodeEncodeError, UnicodeDecodeError):
-                pass  # Nicht doppelt-encodiert, Text beibehalten
-
             # Bereinige
             lines = []
             for line in text.split('\n'):
@@ -1341,37 +1509,95 @@ Antwort:"""
 
     # ===== E-MAIL EXTRAKTION =====
     
+    def scan_contact_tokens(self, html: str) -> Iterator[Tuple[str, str]]:
+        """
+        Single-Pass-Scanner für Kontaktdaten
+
+        Parst das HTML einmal und läuft genau einmal über das Dokument:
+        Attribute (mailto:, tel:, Cloudflare-E-Mail-Schutz) werden direkt
+        ausgewertet, Textknoten (ohne Script/Style/Kommentare) gesammelt und
+        mit EINEM vorkompilierten Pattern gescannt.
+
+        Yields:
+            (kind, value) mit kind in 'email', 'obfuscated_email', 'phone'
+        """
+        if not html:
+            return
+
+        soup = BeautifulSoup(html[:self.SCAN_MAX_HTML_CHARS], 'html.parser')
+        texts = []
+        budget = self.SCAN_MAX_TEXT_CHARS
+
+        for node in soup.descendants:
+            if isinstance(node, Tag):
+                href = node.get('href')
+                if isinstance(href, str):
+                    href_lower = href.lower()
+                    if href_lower.startswith('mailto:'):
+                        for address in unquote(href[7:]).split('?')[0].split(','):
+                            yield 'email', address.lower().strip()
+                    elif href_lower.startswith('tel:'):
+                        phone = self.phone_strip_pattern.sub('', unquote(href[4:]))
+                        if len(phone) >= 8:
+                            yield 'phone', phone
+                    elif '/cdn-cgi/l/email-protection#' in href_lower:
+                        email = _decode_cfemail(href.split('#', 1)[1])
+                        if email:
+                            yield 'email', email.lower().strip()
+                cfemail = node.get('data-cfemail')
+                if isinstance(cfemail, str):
+                    email = _decode_cfemail(cfemail)
+                    if email:
+                        yield 'email', email.lower().strip()
+                continue
+
+            # Nur echter Text (keine Kommentare, Script-/Style-Inhalte etc.);
+            # JSON-LD enthält oft die Kontakt-E-Mail und wird mitgescannt
+            if type(node) is not NavigableString:
+                parent = node.parent
+                if not (parent is not None and parent.name == 'script'
+                        and 'ld+json' in (parent.get('type') or '')):
+                    continue
+            # Budget erschöpft: nur keinen Text mehr sammeln - Attribute
+            # weiter unten (Footer-mailto:, tel:, data-cfemail) zählen noch
+            if budget <= 0:
+                continue
+            text = str(node)[:min(self.SCAN_MAX_NODE_CHARS, budget)]
+            if text.strip():
+                texts.append(text)
+                budget -= len(text)
+
+        for match in self.contact_token_pattern.finditer('\n'.join(texts)):
+            if match.group('email'):
+                yield 'email', match.group('email').lower().strip()
+            elif match.group('obf_local'):
+                yield 'obfuscated_email', '{}@{}.{}'.format(
+                    match.group('obf_local'), match.group('obf_domain'), match.group('obf_tld')
+                ).lower()
+            else:
+                phone = self.phone_strip_pattern.sub('', match.group('phone_labeled') or match.group('phone'))
+                if len(phone) >= 8:
+                    yield 'phone', phone
+
+    def extract_contacts(self, html: str) -> Tuple[List[str], List[str]]:
+        """
+        Extrahiert E-Mails (validiert) und Telefonnummern in einem Scan
+
+        Returns:
+            (emails, phones) - jeweils ohne Duplikate, in Dokument-Reihenfolge
+        """
+        emails: Dict[str, None] = {}
+        phones: Dict[str, None] = {}
+        for kind, value in self.scan_contact_tokens(html):
+            if kind == 'phone':
+                phones.setdefault(value)
+            elif self._validate_email(value):
+                emails.setdefault(value)
+        return list(emails), list(phones)
+
     def extract_emails(self, html: str) -> List[str]:
         """Extrahiert E-Mail-Adressen aus HTML"""
-        emails = set()
-        
-        # Dekodiere HTML-Entities
-        decoded_html = html_module.unescape(html)
-        
-        # Standard-Regex
-        found = self.email_pattern.findall(decoded_html)
-        for email in found:
-            email = email.lower().strip()
-            if self._validate_email(email):
-                emails.add(email)
-        
-        # mailto: Links
-        soup = BeautifulSoup(decoded_html, 'html.parser')
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '')
-            if 'mailto:' in href.lower():
-                email = href.lower().replace('mailto:', '').split('?')[0].strip()
-                if self._validate_email(email):
-                    emails.add(email)
-        
-        # Obfuskierte E-Mails (at), [at], etc.
-        obfuscated_pattern = r'([a-zA-Z0-9._%+-]+)\s*[\[\(]?\s*(?:at|@|AT)\s*[\]\)]?\s*([a-zA-Z0-9.-]+)\s*[\[\(]?\s*(?:dot|\.)\s*[\]\)]?\s*([a-zA-Z]{2,})'
-        for match in re.finditer(obfuscated_pattern, decoded_html, re.IGNORECASE):
-            email = f"{match.group(1)}@{match.group(2)}.{match.group(3)}".lower()
-            if self._validate_email(email):
-                emails.add(email)
-        
-        return list(emails)
+        return self.extract_contacts(html)[0]
 
     def _validate_email(self, email: str) -> bool:
         """Validiert E-Mail-Adresse"""
@@ -1438,25 +1664,7 @@ Antwort:"""
     
     def extract_phones(self, html: str) -> List[str]:
         """Extrahiert Telefonnummern aus HTML"""
-        phones = set()
-        
-        text = self.extract_clean_text(html)
-        
-        # Telefon-Patterns
-        patterns = [
-            r'(?:Tel\.?|Telefon|Phone|Fon)[:\s]+([+\d\s\-/\(\)]{8,})',
-            r'(?:\+49|0049|0)\s*[\d\s/\-\(\)]{8,}',
-        ]
-        
-        for pattern in patterns:
-            for match in re.finditer(pattern, text, re.IGNORECASE):
-                phone = match.group(0) if match.groups() == () else match.group(1)
-                phone = re.sub(r'[^\d+]', '', phone)
-                
-                if len(phone) >= 8:
-                    phones.add(phone)
-        
-        return list(phones)
+        return self.extract_contacts(html)[1]
 
     # ===== HAUPTMETHODE =====
     
@@ -1498,18 +1706,18 @@ Antwort:"""
                 result.confidence = confidence
                 result.extraction_method = method
 
-            # Schritt 4: Extrahiere E-Mails
-            emails = self.extract_emails(html)
+            # Schritt 4+5: E-Mails und Telefon (ein gemeinsamer Scan)
+            emails, phones = self.extract_contacts(html)
 
             if emails:
                 result.email = self.select_best_email(emails)
                 result.found_email = True
 
-            # Schritt 5: Extrahiere Telefon (optional)
-            phones = self.extract_phones(html)
             if phones:
                 result.phone = phones[0]
 
+            result.impressum_parsed = True
+
         except Exception as e:
             logger.error(f"Scraping-Fehler fuer {website}: {e}")
 
@@ -0,0 +1,889 @@
+"""
+Job Queue - Persistente Hintergrund-Jobs über alle Gunicorn-Worker hinweg
+
+Ersetzt das prozesslokale background_tasks-Dict:
+- Jobs liegen in der Tabelle 'jobs' (models_v3.Job)
+- Jeder Prozess startet einen JobWorkerPool, der Jobs ATOMAR beansprucht
+  (UPDATE ... WHERE status='queued' - nur ein Worker gewinnt)
+- Fortschritt wird gedrosselt in die DB geschrieben und ist von jedem
+  Worker lesbar (/api/task/<id>)
+- Heartbeats: Jobs eines abgestürzten/gekillten Prozesses werden nach
+  JOB_STALE_SECONDS wieder eingereiht (max. JOB_MAX_ATTEMPTS Versuche)
+- Besitz: Fortschritt, Checkpoints und Abschluss schreibt nur der Worker,
+  der den Job gerade hält (worker_id + status='running'); ein wieder
+  eingereihter Job bricht beim alten Worker mit JobLostError ab
+- Events: jede Lead-Änderung wird als JobEvent gespeichert und per SSE
+  an das Frontend gestreamt (nichts geht zwischen zwei Polls verloren)
+- Checkpoints: Handler speichern einen Cursor (letzte fertige Lead-ID) in
+  derselben Transaktion wie die Lead-Änderung und setzen nach Absturz,
+  Deploy oder Abbruch genau dort fort
+- LeadBatch: parallele Handler sammeln Ergebnisse und committen in Batches;
+  die Identity-Map wird nach jedem Batch geleert (Speicher bleibt flach)
+- Prioritäten: kleine (interaktive) Läufe werden vor großen Batches
+  beansprucht; zusätzlich hat jeder Prozess einen Express-Thread, der nur
+  interaktive Jobs nimmt - 20 Leads warten nie hinter 20k Leads
+- Aufbewahrung: beendete Jobs + Events werden nach JOB_RETENTION_HOURS bzw.
+  über JOB_MAX_RETAINED hinaus gelöscht; eine kompakte JobSummary bleibt
+  JOB_HISTORY_DAYS als Historie erhalten
+- Temporäre Dateien (TEMP_FILE_PARAMS, z.B. CSV-Upload) werden bei Job-Ende
+  gelöscht, spätestens beim Aufräumen
+"""
+import os
+import sys
+import time
+import uuid
+import socket
+import logging
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Callable, Iterable, List
+
+from sqlalchemy import select, update, insert, delete, func, tuple_
+from sqlalchemy.orm import load_only
+
+from models_v3 import CompanyV3, Job, JobEvent, JobSummary, utc_now
+
+try:
+    import resource  # Nicht verfügbar unter Windows
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 2))
+JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 120))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+HEARTBEAT_INTERVAL = 10             # Sekunden zwischen Heartbeats laufender Jobs
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+PROGRESS_FLUSH_INTERVAL = 0.3       # Fortschritt max. ~3x pro Sekunde schreiben
+PRIORITY_BATCH = 0
+PRIORITY_INTERACTIVE = 10
+INTERACTIVE_MAX_LEADS = int(os.environ.get('INTERACTIVE_MAX_LEADS', 100))  # Bis hier: interaktiv
+EXPRESS_WORKER_THREADS = int(os.environ.get('EXPRESS_WORKER_THREADS', 1))
+DEFAULT_LEADS_PER_MINUTE = 30       # ETA-Schätzung ohne Historie
+JOB_RETENTION_HOURS = int(os.environ.get('JOB_RETENTION_HOURS', 24))   # Beendete Jobs + Events
+JOB_MAX_RETAINED = int(os.environ.get('JOB_MAX_RETAINED', 200))         # Max. beendete Jobs in der DB
+JOB_HISTORY_DAYS = int(os.environ.get('JOB_HISTORY_DAYS', 180))         # JobSummary-Historie
+EVICT_INTERVAL = 300                # Sekunden zwischen Aufräum-Läufen
+# Art-spezifische Zähler, die in JobSummary.details landen
+SUMMARY_DETAIL_KEYS = ('local_found', 'cache_found', 'web_found', 'tokens_used', 'tokens_per_min',
+                       'memory_peak_mb', 'memory_growth_mb', 'mode')
+LEAD_BATCH_SIZE = 25                # Ergebnisse pro Commit
+LEAD_BATCH_SECONDS = 2.0            # Spätestens dann committen (Live-Updates)
+
+# Parameter, die nach Job-Ende aus der DB gelöscht werden (z.B. Session-API-Key)
+SECRET_PARAMS = ('api_key',)
+# Parameter mit temporären Dateien (z.B. CSV-Upload), die bei Job-Ende gelöscht werden
+TEMP_FILE_PARAMS = ('upload_path',)
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Höchststand des Prozess-RSS in MB (None wenn nicht messbar)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KiB, macOS: Bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class JobLostError(Exception):
+    """Der Job gehört nicht mehr diesem Worker (wieder eingereiht, abgebrochen oder gelöscht)"""
+
+
+def _remove_temp_files(params: Optional[Dict[str, Any]]) -> None:
+    """Löscht die temporären Dateien eines Jobs (TEMP_FILE_PARAMS)"""
+    for key in TEMP_FILE_PARAMS:
+        path = (params or {}).get(key)
+        if not path:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️ Temporäre Datei nicht gelöscht ({path}): {e}")
+
+
+def _seconds_between(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    """Dauer in Sekunden (SQLite liefert naive Datetimes, utc_now() aware)"""
+    if start is None or end is None:
+        return None
+    return round((end.replace(tzinfo=None) - start.replace(tzinfo=None)).total_seconds(), 1)
+
+
+def _summarize(job: Job) -> JobSummary:
+    """Kompakte Zusammenfassung eines beendeten Jobs"""
+    progress = job.progress or {}
+    processed = progress.get('progress', 0)
+    duration = _seconds_between(job.started_at, job.finished_at)
+    throughput = progress.get('throughput')
+    if throughput is None and duration:
+        throughput = round(processed * 60 / duration, 1)
+    return JobSummary(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        total=progress.get('total', 0),
+        processed=processed,
+        hits=progress.get('found', progress.get('generated', progress.get('imported', 0))),
+        skipped=progress.get('skipped', 0),
+        errors=progress.get('errors', 0),
+        attempts=job.attempts or 0,
+        duration_seconds=duration,
+        queue_seconds=_seconds_between(job.created_at, job.started_at),
+        throughput=throughput,
+        details={key: progress[key] for key in SUMMARY_DETAIL_KEYS if key in progress},
+        error=(job.error or '')[:500] or None,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _summary_dict(summary: JobSummary) -> Dict[str, Any]:
+    return {
+        'job_id': summary.job_id,
+        'kind': summary.kind,
+        'status': summary.status,
+        'total': summary.total,
+        'processed': summary.processed,
+        'hits': summary.hits,
+        'skipped': summary.skipped,
+        'errors': summary.errors,
+        'attempts': summary.attempts,
+        'duration_seconds': summary.duration_seconds,
+        'queue_seconds': summary.queue_seconds,
+        'throughput': summary.throughput,
+        'details': summary.details or {},
+        'error': summary.error,
+        'created_at': summary.created_at.isoformat() if summary.created_at else None,
+        'finished_at': summary.finished_at.isoformat() if summary.finished_at else None,
+    }
+
+
+def priority_for(lead_count: int) -> int:
+    """Kleine Läufe sind interaktiv (jemand wartet davor) und haben Vorrang"""
+    return PRIORITY_INTERACTIVE if lead_count <= INTERACTIVE_MAX_LEADS else PRIORITY_BATCH
+
+
+class JobQueue:
+    """DB-Zugriff für Jobs - jede Methode nutzt eine eigene kurze Session"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def enqueue(self, kind: str, params: Dict[str, Any], progress: Optional[Dict[str, Any]] = None,
+                prefix: Optional[str] = None, priority: int = PRIORITY_BATCH) -> str:
+        """Legt einen Job an und gibt die Job-ID (= task_id fürs Frontend) zurück"""
+        job_id = f"{prefix or kind}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        session = self.db.get_session()
+        try:
+            session.add(Job(
+                id=job_id,
+                kind=kind,
+                status='queued',
+                priority=priority,
+                params=params,
+                progress=progress or {},
+            ))
+            session.commit()
+        finally:
+            session.close()
+        return job_id
+
+    def claim(self, worker_id: str, kinds: Iterable[str],
+              min_priority: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Beansprucht den wartenden Job mit höchster Priorität (dann ältesten) atomar
+
+        Args:
+            min_priority: Nur Jobs ab dieser Priorität (Express-Thread)
+
+        Returns:
+            Snapshot des Jobs (id, kind, params, progress, attempts) oder None
+        """
+        kinds = list(kinds)
+        session = self.db.get_session()
+        try:
+            for _ in range(5):
+                query = select(Job.id).where(Job.status == 'queued', Job.kind.in_(kinds))
+                if min_priority is not None:
+                    query = query.where(Job.priority >= min_priority)
+                candidate = session.execute(
+                    query.order_by(Job.priority.desc(), Job.created_at).limit(1)
+                ).scalar()
+                if candidate is None:
+                    return None
+
+                now = utc_now()
+                claimed = session.execute(
+                    update(Job)
+                    .where(Job.id == candidate, Job.status == 'queued')
+                    .values(
+                        status='running',
+                        worker_id=worker_id,
+                        heartbeat_at=now,
+                        started_at=func.coalesce(Job.started_at, now),
+                        attempts=Job.attempts + 1,
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                session.commit()
+
+                if claimed == 1:
+                    job = session.get(Job, candidate)
+                    return {
+                        'id': job.id,
+                        'kind': job.kind,
+                        'worker_id': worker_id,
+                        'params': dict(job.params or {}),
+                        'progress': dict(job.progress or {}),
+                        'attempts': job.attempts,
+                    }
+                # Ein anderer Worker war schneller - nächsten Kandidaten versuchen
+            return None
+        finally:
+            session.close()
+
+    def save_progress(self, job_id: str, progress: Dict[str, Any], worker_id: str) -> bool:
+        """
+        Schreibt den Fortschritt (+ Heartbeat), solange worker_id den Job hält
+
+        Returns:
+            True wenn ein Abbruch angefordert wurde
+
+        Raises:
+            JobLostError: Job wurde wieder eingereiht oder beendet
+        """
+        session = self.db.get_session()
+        try:
+            updated = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == 'running')
+                .values(progress=dict(progress), heartbeat_at=utc_now())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.commit()
+            if not updated:
+                raise JobLostError(job_id)
+            return bool(session.execute(
+                select(Job.cancel_requested).where(Job.id == job_id)
+            ).scalar())
+        finally:
+            session.close()
+
+    def finish(self, job_id: str, worker_id: str, status: str, progress: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None) -> bool:
+        """
+        Schließt einen Job ab, löscht geheime Parameter und temporäre Dateien
+
+        Returns:
+            False wenn worker_id den Job nicht mehr hält (nichts geändert)
+        """
+        values = {'status': status, 'finished_at': utc_now(), 'error': error}
+        if progress is not None:
+            values['progress'] = dict(progress)
+        session = self.db.get_session()
+        try:
+            finished = session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == 'running')
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not finished:
+                session.rollback()
+                return False
+            job = session.get(Job, job_id)
+            params = job.params
+            if job.params and any(key in job.params for key in SECRET_PARAMS):
+                job.params = {k: v for k, v in job.params.items() if k not in SECRET_PARAMS}
+            # Historie (nach Fortsetzen + erneutem Ende überschrieben)
+            session.merge(_summarize(job))
+            session.commit()
+            _remove_temp_files(params)
+            return True
+        finally:
+            session.close()
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Bricht einen Job ab (wartend: sofort, laufend: beim nächsten Check)"""
+        session = self.db.get_session()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                return False
+            params = None
+            if job.status == 'queued':
+                params = job.params
+                job.status = 'cancelled'
+                job.finished_at = utc_now()
+                if job.params:
+                    job.params = {k: v for k, v in job.params.items() if k not in SECRET_PARAMS}
+                session.merge(_summarize(job))
+            elif job.status == 'running':
+                job.cancel_requested = True
+            session.commit()
+            _remove_temp_files(params)
+            return True
+        finally:
+            session.close()
+
+    def resume(self, job_id: str, params_update: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Reiht einen abgebrochenen/fehlgeschlagenen Job wieder ein
+
+        Der Fortschritt (inkl. Cursor) bleibt erhalten - der Handler setzt
+        nach der letzten fertigen Lead-ID fort.
+
+        Returns:
+            Status nach dem Aufruf ('queued', 'running', 'completed') oder None
+        """
+        session = self.db.get_session()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                return None
+            if job.status in ('cancelled', 'failed'):
+                job.status = 'queued'
+                job.cancel_requested = False
+                job.finished_at = None
+                job.error = None
+                job.worker_id = None
+                job.attempts = 0
+                if params_update:
+                    job.params = dict(job.params or {}, **params_update)
+                session.commit()
+            return job.status
+        finally:
+            session.close()
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fortschritt + Status für /api/task/<id>"""
+        session = self.db.get_session()
+        try:
+            job = session.get(Job, job_id)
+            if job is None:
+                # Schon aufgeräumt - Endstand aus der Historie
+                summary = session.get(JobSummary, job_id)
+                if summary is None:
+                    return None
+                return {
+                    'status': summary.status, 'kind': summary.kind, 'evicted': True,
+                    'progress': summary.processed, 'total': summary.total, 'found': summary.hits,
+                    'skipped': summary.skipped, 'errors': summary.errors, 'error': summary.error,
+                }
+            status = dict(job.progress or {})
+            status['status'] = job.status
+            status['kind'] = job.kind
+            status['priority'] = job.priority
+            if job.error:
+                status['error'] = job.error
+            if job.status == 'queued':
+                status.update(self._queue_estimate(session, job))
+            return status
+        finally:
+            session.close()
+
+    def _queue_estimate(self, session, job: Job) -> Dict[str, Any]:
+        """
+        Position in der Warteschlange + geschätzte Startzeit (grob)
+
+        Vor dem Job liegen wartende Jobs mit höherer Priorität bzw. gleicher
+        Priorität und älterem created_at. Parallelität = Anzahl laufender Jobs
+        (bei voller Queue sind alle Worker-Threads belegt); interaktive Jobs
+        konkurrieren nur mit interaktiven (Express-Thread).
+        """
+        ahead = session.scalars(
+            select(Job).where(
+                Job.status == 'queued',
+                (Job.priority > job.priority)
+                | ((Job.priority == job.priority) & (Job.created_at < job.created_at)),
+            )
+        ).all()
+        running_query = select(Job).where(Job.status == 'running')
+        if job.priority >= PRIORITY_INTERACTIVE:
+            running_query = running_query.where(Job.priority >= PRIORITY_INTERACTIVE)
+        running = session.scalars(running_query).all()
+
+        # Leads/min je Job-Art aus der Historie
+        rates = dict(session.execute(
+            select(JobSummary.kind, func.avg(JobSummary.processed * 60.0 / JobSummary.duration_seconds))
+            .where(JobSummary.duration_seconds > 0, JobSummary.processed > 0)
+            .group_by(JobSummary.kind)
+        ).all())
+
+        def remaining_seconds(other: Job) -> float:
+            progress = other.progress or {}
+            remaining = max(progress.get('total', 0) - progress.get('progress', 0), 0)
+            rate = rates.get(other.kind) or DEFAULT_LEADS_PER_MINUTE
+            return remaining * 60 / rate
+
+        work = sum(remaining_seconds(other) for other in running) + sum(remaining_seconds(other) for other in ahead)
+        eta = round(work / max(1, len(running)))
+        return {
+            'queue_position': len(ahead) + 1,
+            'estimated_start_seconds': eta,
+        }
+
+    def get_events(self, job_id: str, after_id: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        """Events eines Jobs mit ID > after_id (für SSE / Last-Event-ID)"""
+        session = self.db.get_session()
+        try:
+            rows = session.execute(
+                select(JobEvent.id, JobEvent.event_type, JobEvent.data)
+                .where(JobEvent.job_id == job_id, JobEvent.id > after_id)
+                .order_by(JobEvent.id)
+                .limit(limit)
+            ).all()
+            return [{'id': row.id, 'type': row.event_type, 'data': row.data} for row in rows]
+        finally:
+            session.close()
+
+    def get_history(self, kind: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """Letzte beendete Jobs + Kennzahlen je Job-Art (für /api/tasks/history)"""
+        session = self.db.get_session()
+        try:
+            query = select(JobSummary).order_by(JobSummary.finished_at.desc()).limit(limit)
+            stats_query = (
+                select(
+                    JobSummary.kind,
+                    func.count(JobSummary.job_id).label('runs'),
+                    func.sum(JobSummary.processed).label('processed'),
+                    func.sum(JobSummary.hits).label('hits'),
+                    func.sum(JobSummary.errors).label('errors'),
+                    func.avg(JobSummary.duration_seconds).label('avg_duration_seconds'),
+                    func.avg(JobSummary.queue_seconds).label('avg_queue_seconds'),
+                    func.avg(JobSummary.throughput).label('avg_throughput'),
+                )
+                .group_by(JobSummary.kind)
+            )
+            if kind:
+                query = query.where(JobSummary.kind == kind)
+                stats_query = stats_query.where(JobSummary.kind == kind)
+
+            stats = {}
+            for row in session.execute(stats_query):
+                stats[row.kind] = {
+                    'runs': row.runs,
+                    'processed': row.processed or 0,
+                    'hits': row.hits or 0,
+                    'errors': row.errors or 0,
+                    'avg_duration_seconds': round(row.avg_duration_seconds or 0, 1),
+                    'avg_queue_seconds': round(row.avg_queue_seconds or 0, 1),
+                    'avg_throughput': round(row.avg_throughput or 0, 1),
+                }
+            return {
+                'tasks': [_summary_dict(summary) for summary in session.scalars(query)],
+                'stats': stats,
+            }
+        finally:
+            session.close()
+
+    def evict_finished(self) -> int:
+        """
+        Löscht beendete Jobs + Events nach JOB_RETENTION_HOURS und über
+        JOB_MAX_RETAINED hinaus (älteste zuerst); Summaries nach JOB_HISTORY_DAYS
+
+        Idempotent - läuft in jedem Prozess im Wartungs-Thread.
+        """
+        now = utc_now()
+        finished = Job.status.in_(FINISHED_STATUSES)
+        session = self.db.get_session()
+        try:
+            expired = set(session.scalars(
+                select(Job.id).where(finished, Job.finished_at < now - timedelta(hours=JOB_RETENTION_HOURS))
+            ))
+            expired.update(session.scalars(
+                select(Job.id).where(finished).order_by(Job.finished_at.desc()).offset(JOB_MAX_RETAINED)
+            ))
+            expired = sorted(expired)
+
+            # SQLite-Variablenlimit: in Blöcken löschen
+            for start in range(0, len(expired), 500):
+                block = expired[start:start + 500]
+                # Summary nachtragen, falls der Job ohne finish() endete (requeue_stale)
+                missing = set(block) - set(session.scalars(
+                    select(JobSummary.job_id).where(JobSummary.job_id.in_(block))
+                ))
+                for job in session.scalars(select(Job).where(Job.id.in_(missing))):
+                    session.merge(_summarize(job))
+                # Temporäre Dateien von Jobs, die ohne finish() endeten (requeue_stale -> failed)
+                for params in session.scalars(select(Job.params).where(Job.id.in_(block))):
+                    _remove_temp_files(params)
+                session.execute(delete(JobEvent).where(JobEvent.job_id.in_(block)))
+                session.execute(delete(Job).where(Job.id.in_(block)))
+
+            session.execute(
+                delete(JobSummary).where(JobSummary.finished_at < now - timedelta(days=JOB_HISTORY_DAYS))
+            )
+            session.commit()
+            if expired:
+                logger.info(f"🧹 {len(expired)} beendete Job(s) aufgeräumt")
+            return len(expired)
+        finally:
+            session.close()
+
+    def heartbeat(self, jobs: Dict[str, str]) -> None:
+        """Heartbeat für laufende Jobs (job_id -> worker_id) - nur solange der Worker sie hält"""
+        if not jobs:
+            return
+        session = self.db.get_session()
+        try:
+            session.execute(
+                update(Job)
+                .where(tuple_(Job.id, Job.worker_id).in_(list(jobs.items())), Job.status == 'running')
+                .values(heartbeat_at=utc_now())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def requeue_stale(self) -> int:
+        """
+        Reiht Jobs ohne Heartbeat wieder ein (Prozess abgestürzt/gekillt)
+
+        Nach JOB_MAX_ATTEMPTS Versuchen wird der Job als 'failed' markiert.
+        """
+        cutoff = utc_now() - timedelta(seconds=JOB_STALE_SECONDS)
+        stale = (Job.status == 'running') & (Job.heartbeat_at < cutoff)
+        session = self.db.get_session()
+        try:
+            requeued = session.execute(
+                update(Job)
+                .where(stale, Job.attempts < JOB_MAX_ATTEMPTS, Job.cancel_requested.isnot(True))
+                .values(status='queued', worker_id=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            session.execute(
+                update(Job)
+                .where(stale)
+                .values(
+                    status='failed',
+                    finished_at=utc_now(),
+                    error='Worker nicht mehr erreichbar (kein Heartbeat)',
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            if requeued:
+                logger.warning(f"♻️ {requeued} verwaiste Job(s) wieder eingereiht")
+            return requeued
+        finally:
+            session.close()
+
+
+class JobContext:
+    """
+    Wird an Job-Handler übergeben
+
+    Handler lesen params, schreiben Fortschritt in state (Dict wie früher
+    background_tasks[task_id]) und prüfen regelmäßig cancelled().
+    """
+
+    def __init__(self, queue: JobQueue, job: Dict[str, Any]):
+        self.queue = queue
+        self.id = job['id']
+        self.worker_id = job['worker_id']
+        self.kind = job['kind']
+        self.params = job['params']
+        self.state = job['progress']
+        self.attempt = job['attempts']
+        self._last_flush = 0.0
+        self._cancel_requested = False
+        # Durchsatz wird pro Lauf gemessen (nach Fortsetzen neu)
+        self._run_started = time.monotonic()
+        self._run_results = 0
+        self._run_tokens = 0
+        self._memory_start = peak_memory_mb()
+
+    def pending(self, lead_ids: List[int]):
+        """
+        Iteriert (index, lead_id) ab dem gespeicherten Cursor
+
+        lead_ids müssen aufsteigend sortiert sein (siehe enqueue-Aufrufer);
+        bereits erledigte Leads werden gar nicht erst geladen.
+        """
+        cursor = self.state.get('cursor')
+        start = bisect.bisect_right(lead_ids, cursor) if cursor is not None else 0
+        if start:
+            logger.info(f"⏩ Job {self.id}: Fortsetzen nach Lead {cursor} ({start}/{len(lead_ids)})")
+        for idx in range(start, len(lead_ids)):
+            yield idx, lead_ids[idx]
+
+    def checkpoint(self, session, lead_update: Optional[Dict[str, Any]] = None, **fields) -> None:
+        """
+        Schreibt Fortschritt + Cursor in die Transaktion des Aufrufers
+
+        Der Aufrufer committet - Lead-Änderung, Cursor und Lead-Event landen
+        damit atomar in der DB (kein Lead doppelt, keiner verloren).
+
+        Args:
+            lead_update: Geänderte Felder eines Leads ({'id': ..., 'first_name': ...})
+                         -> JobEvent 'lead' für den SSE-Stream
+
+        Raises:
+            JobLostError: Job gehört nicht mehr diesem Worker - der Aufrufer
+                          committet dann nicht, die Transaktion wird verworfen
+        """
+        self.state.update(fields)
+        if lead_update:
+            self.record_lead(session, lead_update)
+        updated = session.execute(
+            update(Job)
+            .where(Job.id == self.id, Job.worker_id == self.worker_id, Job.status == 'running')
+            .values(progress=dict(self.state), heartbeat_at=utc_now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            raise JobLostError(self.id)
+
+    def record_lead(self, session, lead_update: Dict[str, Any]) -> None:
+        """
+        Legt ein JobEvent 'lead' in der Transaktion des Aufrufers an
+
+        Für Batch-Commits: mehrere Leads pro Transaktion, danach ein checkpoint().
+        """
+        # Polling-Fallback sieht weiterhin den letzten Lead
+        self.state['last_updated'] = lead_update
+        session.execute(insert(JobEvent).values(
+            job_id=self.id, event_type='lead', data=lead_update, created_at=utc_now()
+        ))
+
+    def add_throughput(self, results: int = 0, tokens: int = 0) -> None:
+        """Aktualisiert 'throughput' (Ergebnisse/min) und 'tokens_per_min' im Fortschritt"""
+        self._run_results += results
+        self._run_tokens += tokens
+        minutes = max(time.monotonic() - self._run_started, 1e-3) / 60
+        self.state['throughput'] = round(self._run_results / minutes, 1)
+        if self._run_tokens:
+            self.state['tokens_per_min'] = round(self._run_tokens / minutes)
+
+    def sample_memory(self) -> None:
+        """
+        Schreibt den Speicher-Höchststand in den Fortschritt
+
+        memory_peak_mb gilt für den ganzen Prozess; memory_growth_mb ist der
+        Anstieg seit Job-Start (bleibt bei flachem Speicherverbrauch ~0).
+        """
+        peak = peak_memory_mb()
+        if peak is None:
+            return
+        self.state['memory_peak_mb'] = peak
+        self.state['memory_growth_mb'] = round(peak - (self._memory_start or peak), 1)
+
+    def update(self, **fields) -> None:
+        """Aktualisiert den Fortschritt (DB-Schreiben gedrosselt)"""
+        self.state.update(fields)
+        self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_flush < PROGRESS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        try:
+            self._cancel_requested = self.queue.save_progress(self.id, self.state, self.worker_id)
+        except JobLostError:
+            raise
+        except Exception as e:
+            # Fortschritt ist nicht kritisch - Job läuft weiter
+            logger.warning(f"Job {self.id}: Fortschritt nicht gespeichert: {e}")
+
+    def cancelled(self) -> bool:
+        """True wenn ein Abbruch angefordert wurde (Stand des letzten Flush)"""
+        self.flush()
+        return self._cancel_requested
+
+
+class LeadBatch:
+    """
+    Sammelt Lead-Ergebnisse eines Chunks für Batch-Commits
+
+    Ergebnisse kommen (parallel) in beliebiger Reihenfolge; der Cursor rückt
+    nur über den lückenlos erledigten Anfang des Chunks vor. Bis zum Commit
+    liegen Ergebnisse nur im Speicher - die Session hält zwischen den Commits
+    keine Schreibsperre, ctx.update()/cancelled() blockieren also nicht.
+
+    Nach jedem Commit wird die Identity-Map geleert - geladene Leads eines
+    Chunks leben nur bis zum nächsten Batch, egal wie groß der Job ist.
+
+    Verwendung:
+        batch = LeadBatch(ctx, session, chunk, apply, columns)
+        batch.add(lead_id, result)      # apply(lead, result) beim Commit
+        batch.skip(lead_id)             # erledigt ohne Schreiben
+        if batch.due():
+            batch.commit(counts)
+    """
+
+    def __init__(self, ctx: JobContext, session, chunk: List[tuple], apply: Callable[..., None],
+                 columns: Iterable = (), batch_size: int = LEAD_BATCH_SIZE,
+                 batch_seconds: float = LEAD_BATCH_SECONDS):
+        self.ctx = ctx
+        self.session = session
+        self.apply = apply
+        self.columns = tuple(columns)  # Projektion für apply() (leer = alle Spalten)
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.lead_ids = [lead_id for _, lead_id in chunk]
+        self.first_idx = chunk[0][0] if chunk else 0
+        self.done = set()
+        self.ready = []
+        self._position = 0
+        self._last_commit = time.monotonic()
+
+    def extend(self, chunk: List[tuple]) -> None:
+        """Hängt den nächsten Chunk (index, lead_id) an - für Handler, die IDs gestreamt lesen"""
+        if not self.lead_ids and chunk:
+            self.first_idx = chunk[0][0]
+        self.lead_ids.extend(lead_id for _, lead_id in chunk)
+
+    @property
+    def progress(self) -> int:
+        """Index-Fortschritt inkl. noch nicht committeter Ergebnisse"""
+        return self.first_idx + len(self.done) + len(self.ready)
+
+    def skip(self, lead_id: int) -> None:
+        self.done.add(lead_id)
+
+    def add(self, lead_id: int, *payload) -> None:
+        self.ready.append((lead_id, payload))
+
+    def due(self) -> bool:
+        return (len(self.ready) >= self.batch_size
+                or (self.ready and time.monotonic() - self._last_commit >= self.batch_seconds))
+
+    def commit(self, counters: Dict[str, Any]) -> None:
+        """
+        Wendet gesammelte Ergebnisse an und committet mit Checkpoint
+
+        apply(lead, *payload) läuft im Job-Thread; lead ist None wenn der Lead
+        zwischenzeitlich gelöscht wurde. counters wird NACH apply gelesen.
+        """
+        self._last_commit = time.monotonic()
+        if self.ready:
+            ids = [lead_id for lead_id, _ in self.ready]
+            # Nach dem letzten Commit sind geladene Objekte expired - ein IN-Query statt Reload pro Lead
+            query = self.session.query(CompanyV3).filter(CompanyV3.id.in_(ids))
+            if self.columns:
+                query = query.options(load_only(*self.columns))
+            leads = {lead.id: lead for lead in query}
+            for lead_id, payload in self.ready:
+                self.apply(leads.get(lead_id), *payload)
+            self.done.update(ids)
+            self.ready = []
+            self.ctx.add_throughput(results=len(ids))
+
+        while self._position < len(self.lead_ids) and self.lead_ids[self._position] in self.done:
+            self._position += 1
+        fields = dict(counters, progress=self.first_idx + len(self.done))
+        if self._position:
+            fields['cursor'] = self.lead_ids[self._position - 1]
+        self.ctx.sample_memory()
+        self.ctx.checkpoint(self.session, **fields)
+        self.session.commit()
+        # Verarbeitete Objekte freigeben (Identity-Map wächst sonst mit jedem Lead)
+        self.session.expunge_all()
+
+
+class JobWorkerPool:
+    """
+    Worker-Threads eines Prozesses
+
+    Jeder Gunicorn-Worker startet einen eigenen Pool; die Jobs werden über
+    die DB verteilt, nicht über Prozess-Speicher.
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[JobContext], None]],
+                 threads: int = JOB_WORKER_THREADS, express_threads: int = EXPRESS_WORKER_THREADS,
+                 poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.threads = threads
+        self.express_threads = express_threads
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._active: Dict[str, str] = {}  # job_id -> worker_id
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for i in range(self.threads):
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True).start()
+        # Express-Threads nehmen nur interaktive Jobs - auch wenn alle anderen Threads an Batches hängen
+        for i in range(self.express_threads):
+            threading.Thread(target=self._run, args=(PRIORITY_INTERACTIVE,),
+                             name=f"job-express-{i}", daemon=True).start()
+        threading.Thread(target=self._maintain, name="job-heartbeat", daemon=True).start()
+        logger.info(f"⚙️ Job-Worker gestartet: {self.threads}+{self.express_threads} Thread(s) in PID {os.getpid()}")
+
+    def notify(self) -> None:
+        """Neuer Job im eigenen Prozess - Worker sofort wecken statt Poll abwarten"""
+        self._wakeup.set()
+
+    def _run(self, min_priority: Optional[int] = None) -> None:
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+        while True:
+            try:
+                job = self.queue.claim(worker_id, self.handlers.keys(), min_priority=min_priority)
+            except Exception as e:
+                logger.error(f"Job-Claim fehlgeschlagen: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        ctx = JobContext(self.queue, job)
+        with self._lock:
+            self._active[ctx.id] = ctx.worker_id
+        logger.info(f"▶️ Job {ctx.id} ({ctx.kind}) gestartet, Versuch {ctx.attempt}")
+        try:
+            self.handlers[ctx.kind](ctx)
+            ctx.sample_memory()
+            ctx.flush(force=True)
+            status = 'cancelled' if ctx.cancelled() else 'completed'
+            if not self.queue.finish(ctx.id, ctx.worker_id, status, progress=ctx.state):
+                raise JobLostError(ctx.id)
+            logger.info(f"⏹️ Job {ctx.id}: {status} (Speicher-Höchststand {ctx.state.get('memory_peak_mb')} MB, "
+                        f"+{ctx.state.get('memory_growth_mb', 0)} MB)")
+        except JobLostError:
+            # Wieder eingereiht (z.B. nach langer Sperre ohne Heartbeat) - ein anderer Worker macht weiter
+            logger.warning(f"⚠️ Job {ctx.id}: gehört nicht mehr diesem Worker - Lauf abgebrochen")
+        except Exception as e:
+            logger.exception(f"Job {ctx.id} fehlgeschlagen: {e}")
+            try:
+                self.queue.finish(ctx.id, ctx.worker_id, 'failed', progress=ctx.state, error=str(e))
+            except Exception as finish_error:
+                logger.error(f"Job {ctx.id}: Status nicht gespeichert: {finish_error}")
+        finally:
+            with self._lock:
+                self._active.pop(ctx.id, None)
+
+    def _maintain(self) -> None:
+        """Heartbeats für laufende Jobs, verwaiste Jobs einsammeln, beendete Jobs aufräumen"""
+        last_evict = 0.0
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                active = dict(self._active)
+            try:
+                self.queue.heartbeat(active)
+                self.queue.requeue_stale()
+            except Exception as e:
+                logger.warning(f"Job-Heartbeat fehlgeschlagen: {e}")
+
+            if time.monotonic() - last_evict >= EVICT_INTERVAL:
+                last_evict = time.monotonic()
+                try:
+                    self.queue.evict_finished()
+                except Exception as e:
+                    logger.warning(f"Job-Aufräumen fehlgeschlagen: {e}")
@@ -0,0 +1,69 @@
+"""
+Kurzlebiger Cache für gefilterte Lead-Anzahlen (Pagination-Total)
+
+Jeder Seitenwechsel hat bisher query.count() über die ganze gefilterte
+Menge ausgeführt. Die Anzahl ändert sich nur bei Schreibzugriffen auf
+companies_v3:
+- Schlüssel = Filter-Signatur (Projekt, Suche, Filter, ...)
+- Invalidierung bei jedem INSERT/UPDATE/DELETE auf der Tabelle in diesem
+  Prozess (Engine-Event, erfasst ORM, Bulk-Queries und Trigger-Quellen)
+- TTL begrenzt die Abweichung bei Schreibzugriffen anderer Worker-Prozesse
+
+TTL per Umgebungsvariable: LEAD_COUNT_TTL (Sekunden, 0 = kein Cache)
+"""
+import os
+import time
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+
+from sqlalchemy import event
+
+LEAD_COUNT_TTL = float(os.environ.get('LEAD_COUNT_TTL', 30))
+MAX_ENTRIES = 256
+_WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class CountCache:
+    """Thread-sicherer TTL-Cache key -> Anzahl mit globaler Invalidierung"""
+
+    def __init__(self, ttl: float = LEAD_COUNT_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], int]) -> int:
+        """Gecachte Anzahl oder compute() (Ergebnis wird nur ohne zwischenzeitliches Schreiben gemerkt)"""
+        if self.ttl <= 0:
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = compute()
+        with self._lock:
+            if generation == self._generation:
+                if len(self._entries) >= self.max_entries:
+                    self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                    if len(self._entries) >= self.max_entries:
+                        self._entries.clear()
+                self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def watch(self, engine, table_name: str) -> None:
+        """Invalidiert bei jedem schreibenden Statement auf table_name über diese Engine"""
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if table_name in statement and statement.lstrip()[:7].upper().startswith(_WRITE_VERBS):
+                self.invalidate()
+
+        event.listen(engine, 'after_cursor_execute', after_cursor_execute)
@@ -0,0 +1,189 @@
+"""
+CSV-Import - spaltenweise statt Zeile für Zeile
+
+Der alte Import lief über df.iterrows() und hat pro Zeile alle Spalten nach
+Website und Schlüsselfeldern durchsucht und ein ORM-Objekt gebaut. Jetzt:
+- das Spalten-Mapping (KEY_MAPPINGS) wird einmal pro Datei aufgelöst
+- Werte werden spaltenweise mit pandas umgewandelt (Trimmen, Zahlen)
+- Leads gehen per Core-INSERT (executemany) in Batches in die DB
+- große Dateien: chunkweise lesen (read_csv_chunks), Speicher bleibt
+  unabhängig von der Dateigröße - der Import läuft als Job (app._run_import)
+
+Gleiche Regeln wie bisher:
+- Website ist Pflicht (erste nicht-leere Website-Spalte gewinnt)
+- Schlüsselfelder: spätere Spalten überschreiben frühere, leere Werte nie
+- Original-Zeile wird komplett als Liste in Spalten-Reihenfolge gespeichert
+  (Spalten stehen einmal im Projekt, siehe models_v3.pack_original_row)
+"""
+import os
+import codecs
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from sqlalchemy import insert
+
+from models_v3 import CompanyV3, ORIGINAL_ROW_KEY
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+IMPORT_CHUNK_ROWS = int(os.environ.get('IMPORT_CHUNK_ROWS', 5000))   # CSV-Zeilen pro Chunk/Commit
+_SNIFF_BLOCK = 1 << 20
+
+# Mapping für Suche/Filter (nur Schlüsselfelder)
+KEY_MAPPINGS = {
+    'site': 'website', 'website': 'website', 'url': 'website', 'webseite': 'website',
+    'name': 'name', 'company_name': 'name', 'firmenname': 'name',
+    'email_1': 'email', 'email': 'email', 'e-mail': 'email',
+    'phone': 'phone', 'telefon': 'phone',
+    'city': 'city', 'stadt': 'city', 'ort': 'city',
+    'rating': 'rating', 'bewertung': 'rating',
+    'reviews': 'review_count', 'review_count': 'review_count',
+    'category': 'main_category', 'kategorie': 'main_category',
+    'full_address': 'address', 'address': 'address', 'adresse': 'address',
+    'postal_code': 'zip_code', 'zip_code': 'zip_code', 'plz': 'zip_code',
+    'state': 'state', 'bundesland': 'state',
+    'country': 'country', 'land': 'country',
+}
+
+
+def normalize_column(name: Any) -> str:
+    """CSV-Spaltenname -> Schlüssel für KEY_MAPPINGS ("Full Address" -> "full_address")"""
+    return str(name).lower().strip().replace(' ', '_')
+
+
+def resolve_columns(columns: Sequence[Any]) -> Dict[str, List[int]]:
+    """DB-Feld -> Positionen der passenden CSV-Spalten (in Datei-Reihenfolge)"""
+    mapping: Dict[str, List[int]] = {}
+    for position, column in enumerate(columns):
+        field = KEY_MAPPINGS.get(normalize_column(column))
+        if field:
+            mapping.setdefault(field, []).append(position)
+    return mapping
+
+
+def _text_values(series: pd.Series) -> pd.Series:
+    """Getrimmte Strings, NaN für leere Werte"""
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & (text != '') & (text.str.lower() != 'nan'))
+
+
+def _original_values(series: pd.Series) -> list:
+    """Spalte für die Original-Zeile: Zahlen bleiben Zahlen, Text getrimmt, leer = ''"""
+    if is_numeric_dtype(series):
+        return series.astype(object).where(series.notna(), '').tolist()
+    return series.astype(str).str.strip().where(series.notna(), '').tolist()
+
+
+def _python_values(series: pd.Series, dtype: str = None) -> list:
+    """Spalte -> Python-Werte für executemany (NaN -> None)"""
+    if dtype:
+        series = series.astype(dtype)
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def lead_records(df: pd.DataFrame, project_id: int,
+                 mapping: Dict[str, List[int]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    DataFrame -> (Insert-Zeilen für companies_v3, übersprungene Zeilen ohne Website)
+
+    mapping aus resolve_columns() - bei chunkweisem Lesen einmal pro Datei.
+    """
+    if mapping is None:
+        mapping = resolve_columns(df.columns)
+
+    website = pd.Series(np.nan, index=df.index, dtype=object)
+    for position in mapping.get('website', []):
+        website = website.combine_first(_text_values(df.iloc[:, position]))
+    keep = website.notna()
+    skipped = int((~keep).sum())
+    if not keep.any():
+        return [], skipped
+    df = df[keep]
+
+    fields: Dict[str, list] = {'website': website[keep].tolist()}
+    for field, positions in mapping.items():
+        if field == 'website':
+            continue
+        values = pd.Series(np.nan, index=df.index, dtype=object)
+        for position in positions:
+            column = _text_values(df.iloc[:, position])
+            if field in ('rating', 'review_count'):
+                column = pd.to_numeric(column, errors='coerce')
+                column = column.where(np.isfinite(column))
+                if field == 'review_count':
+                    column = np.trunc(column)
+            values = column.combine_first(values)  # Spätere Spalte gewinnt
+
+        if field == 'rating':
+            fields[field] = _python_values(values, 'float64')
+        elif field == 'review_count':
+            fields[field] = _python_values(values, 'Int64')
+        else:
+            default = CompanyV3.__table__.c[field].default
+            if default is not None and default.is_scalar:
+                values = values.fillna(default.arg)  # Spalte da, Wert leer -> wie ORM-Default
+            fields[field] = _python_values(values)
+
+    # Original-Zeilen: spaltenweise umwandeln, dann zu Zeilen-Listen zusammensetzen
+    rows = zip(*(_original_values(df.iloc[:, position]) for position in range(df.shape[1])))
+    keys = list(fields)
+    return [
+        dict(zip(keys, values), project_id=project_id, attributes={ORIGINAL_ROW_KEY: list(row)})
+        for values, row in zip(zip(*fields.values()), rows)
+    ], skipped
+
+
+def insert_leads(session, records: List[Dict[str, Any]], batch_size: int = IMPORT_BATCH_SIZE) -> int:
+    """Core-INSERT (executemany) in Batches - ohne ORM-Objekte und Identity-Map"""
+    table = CompanyV3.__table__
+    for start in range(0, len(records), batch_size):
+        session.execute(insert(table), records[start:start + batch_size])
+    return len(records)
+
+
+def sniff_encoding(path: str) -> str:
+    """
+    utf-8, wenn die ganze Datei gültiges UTF-8 ist, sonst latin-1
+
+    Blockweise geprüft (konstanter Speicher) - beim chunkweisen Lesen darf
+    der Decoder nicht erst mitten in der Datei scheitern.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_SNIFF_BLOCK), b''):
+                decoder.decode(block)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return 'latin-1'
+    return 'utf-8'
+
+
+def estimate_rows(path: str) -> int:
+    """Zeilen ohne Header (Zeilenumbrüche in Anführungszeichen zählen mit - nur für den Fortschritt)"""
+    lines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_SNIFF_BLOCK), b''):
+            lines += block.count(b'\n')
+            last = block
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def read_columns(path: str, encoding: str) -> List[str]:
+    """Original-Spalten in Datei-Reihenfolge (nur der Header wird gelesen)"""
+    return list(pd.read_csv(path, encoding=encoding, nrows=0).columns)
+
+
+def read_csv_chunks(path: str, encoding: str, chunk_rows: int = IMPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    CSV in DataFrames zu chunk_rows Zeilen
+
+    Alle Spalten als Text: pandas würde die Typen sonst pro Chunk raten
+    (PLZ "01234" mal Zahl, mal Text) - Zahlenfelder wandelt lead_records um.
+    """
+    with pd.read_csv(path, encoding=encoding, dtype=str, chunksize=chunk_rows) as reader:
+        yield from reader
@@ -0,0 +1,46 @@
+"""
+Lead-Suche über den FTS5-Index leads_fts (siehe models_v3.LEADS_FTS_DDL)
+
+- Präfix-Suche: jedes Wort im Suchfeld ist ein Präfix ("mül" findet "Müller"),
+  alle Wörter müssen vorkommen
+- Umlaute/Akzente werden ignoriert ("koln" findet "Köln")
+- Sortierung nach Relevanz (bm25, Treffer im Namen zählen am meisten)
+- Fallback ILIKE-Teilstring-Suche, wenn FTS5 fehlt oder die Eingabe keine
+  Wörter enthält
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, or_, text
+
+from models_v3 import CompanyV3, LEADS_FTS_WEIGHTS
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Fallback-Spalten (wie die ursprüngliche ILIKE-Suche)
+ILIKE_COLUMNS = (CompanyV3.name, CompanyV3.website, CompanyV3.first_name,
+                 CompanyV3.last_name, CompanyV3.email, CompanyV3.city)
+
+_RANKED_SQL = ("SELECT rowid AS id, bm25(leads_fts, {}) AS rank FROM leads_fts "
+               "WHERE leads_fts MATCH :match").format(', '.join(str(w) for w in LEADS_FTS_WEIGHTS))
+
+
+def fts_match_query(term: str) -> Optional[str]:
+    """Suchfeld -> FTS5-MATCH-Ausdruck ("wort"* "wort2"*) oder None ohne Wörter"""
+    words = _WORD_RE.findall(term or '')
+    if not words:
+        return None
+    # Quoting: Operatoren (AND/OR/NEAR, -, :) in der Eingabe werden wörtlich gesucht
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def apply_search(query, term: str, use_fts: bool = True):
+    """Filtert eine Lead-Query nach term - mit FTS5 zusätzlich nach Relevanz sortiert"""
+    match = fts_match_query(term) if use_fts else None
+    if match is None:
+        pattern = f'%{term}%'
+        return query.filter(or_(*(column.ilike(pattern) for column in ILIKE_COLUMNS)))
+
+    ranked = (text(_RANKED_SQL).bindparams(match=match)
+              .columns(id=Integer, rank=Float).subquery('search'))
+    return query.join(ranked, ranked.c.id == CompanyV3.id).order_by(ranked.c.rank)
@@ -9,11 +9,18 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Table
+from sqlalchemy import create_engine, event, inspect, text, select, bindparam, Column, Integer, String, Float, DateTime, Text, JSON, ForeignKey, Boolean, Table, Computed, Index
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, deferred
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
+try:
+    import fcntl  # Nicht verfügbar unter Windows
+except ImportError:
+    fcntl = None
+
 
 def utc_now():
     """Gibt aktuelle UTC-Zeit zurück (Python 3.12+ kompatibel)"""
@@ -128,6 +135,16 @@ class Project(Base):
         return f"<Project(id={self.id}, name={self.name}, leads={self.lead_count})>"
 
 
+# Anreicherungs-Status als Bitmaske (generierte Spalte enrichment_state)
+STATE_HAS_NAMES = 1          # Vor- und Nachname gesetzt
+STATE_HAS_COMPLIMENT = 2     # Kompliment gesetzt
+STATE_COMPLETE = STATE_HAS_NAMES | STATE_HAS_COMPLIMENT
+ENRICHMENT_STATE_SQL = (
+    "(CASE WHEN coalesce(first_name, '') <> '' AND coalesce(last_name, '') <> '' THEN 1 ELSE 0 END)"
+    " + (CASE WHEN coalesce(compliment, '') <> '' THEN 2 ELSE 0 END)"
+)
+
+
 class CompanyV3(Base):
     """
     Company V3 - Branchenunabhängig
@@ -139,6 +156,8 @@ class CompanyV3(Base):
     """
     __tablename__ = 'companies_v3'
 
+    # Große Text-/JSON-Spalten sind deferred: Listen und Job-Handler laden sie
+    # nur bei Bedarf (load_only/undefer_group('details')), nicht pro Zeile
     id = Column(Integer, primary_key=True)
 
     # Projekt-Zuordnung
@@ -148,7 +167,7 @@ class CompanyV3(Base):
     # Basis-Daten
     website = Column(String(500), index=True, default="")
     name = Column(String(255))
-    description = Column(Text)
+    description = deferred(Column(Text), group='details')
     phone = Column(String(100))                          # Telefonnummer
 
     # Kontakt-Person
@@ -160,32 +179,32 @@ class CompanyV3(Base):
     # Statt: industry = Column(String) - nur 1 Branche
     # Neu: Array von Branchen
     main_category = Column(String(255), index=True)      # Hauptkategorie (z.B. "Maschinenbauunternehmen")
-    industries = Column(JSON)                            # ["Zahnarzt", "Kieferorthopädie"] oder categories array
-    sub_industries = Column(JSON)                        # ["Implantologie", "Ästhetik"]
+    industries = deferred(Column(JSON), group='details')  # ["Zahnarzt", "Kieferorthopädie"] oder categories array
+    sub_industries = deferred(Column(JSON), group='details')  # ["Implantologie", "Ästhetik"]
 
     # === FLEXIBLE TAG-FELDER ===
-    technologies = Column(JSON)                          # ["Invisalign", "DVT"] ODER ["Python", "React"]
-    languages = Column(JSON)                             # ["Deutsch", "Englisch", "Spanisch"]
-    services = Column(JSON)                              # Branchenspezifische Services
-    certifications = Column(JSON)                        # Zertifikate
+    technologies = deferred(Column(JSON), group='details')  # ["Invisalign", "DVT"] ODER ["Python", "React"]
+    languages = deferred(Column(JSON), group='details')  # ["Deutsch", "Englisch", "Spanisch"]
+    services = deferred(Column(JSON), group='details')   # Branchenspezifische Services
+    certifications = deferred(Column(JSON), group='details')  # Zertifikate
 
     # === GENERISCHE TAGS ===
     # Für alles, was nicht in Standard-Kategorien passt
-    custom_tags = Column(JSON)                           # ["Premium", "Startup", "Remote-First"]
+    custom_tags = deferred(Column(JSON), group='details')  # ["Premium", "Startup", "Remote-First"]
 
     # === DYNAMISCHE ATTRIBUTE ===
     # Key-Value Store für branchenspezifische Attribute
-    attributes = Column(JSON)                            # {"booking_system": "Doctolib", "crm": "Salesforce"}
+    attributes = deferred(Column(JSON))                  # {"booking_system": "Doctolib", "crm": "Salesforce"}
 
     # === CSV-SPEZIFISCHE FELDER ===
     place_id = Column(String(255))                       # Google Place ID
     owner_name = Column(String(255))                     # Inhaber-Name
-    review_keywords = Column(Text)                       # Review-Keywords
+    review_keywords = deferred(Column(Text), group='details')  # Review-Keywords
     link = Column(String(500))                           # Google Maps Link
     query = Column(String(255))                          # Such-Query
     is_spending_on_ads = Column(Boolean)                 # Schaltet Werbung
-    competitors = Column(Text)                           # Konkurrenten
-    workday_timing = Column(Text)                        # Öffnungszeiten
+    competitors = deferred(Column(Text), group='details')  # Konkurrenten
+    workday_timing = deferred(Column(Text), group='details')  # Öffnungszeiten
     featured_image = Column(String(500))                 # Bild-URL
     can_claim = Column(Boolean)                          # Kann beansprucht werden
     is_temporarily_closed = Column(Boolean)              # Temporär geschlossen
@@ -207,7 +226,7 @@ class CompanyV3(Base):
 
     # Social & Web (wie bisher)
     linkedin_url = Column(String(500))
-    website_text = Column(Text)
+    website_text = deferred(Column(Text), group='details')
 
     # Ratings (wie bisher)
     rating = Column(Float)
@@ -226,10 +245,61 @@ class CompanyV3(Base):
     updated_at = Column(DateTime, default=utc_now, onupdate=utc_now)
     last_enriched_at = Column(DateTime)
 
+    # Filter "Namen fehlen / Kompliment fehlt / Vollständig" (virtuell, nur im Index gespeichert)
+    enrichment_state = Column(Integer, Computed(ENRICHMENT_STATE_SQL))
+
+    __table_args__ = (
+        Index('ix_companies_v3_project_state', 'project_id', 'enrichment_state'),
+        Index('ix_companies_v3_project_rating', 'project_id', 'rating'),
+        Index('ix_companies_v3_project_reviews', 'project_id', 'review_count'),
+        Index('ix_companies_v3_enrichment_state', 'enrichment_state'),
+    )
+
     def __repr__(self):
         return f"<CompanyV3(id={self.id}, name={self.name}, industries={self.industries})>"
 
 
+# ===========================
+# Original-CSV-Daten
+# ===========================
+# Die Spalten einer CSV stehen einmal pro Projekt in
+# Project.column_cache['original_columns'], jeder Lead speichert nur die
+# Werte als Liste in attributes['_original_row'] (gleiche Reihenfolge).
+# Ältere Datenbanken: siehe DatabaseV3._migrate_original_rows().
+ORIGINAL_ROW_KEY = '_original_row'
+_LEGACY_KEYS = ('_original_columns', '_original_data')
+
+
+def project_columns(project) -> list:
+    """Original-Spalten eines Projekts (leer ohne CSV-Import)"""
+    cache = project.column_cache if project is not None else None
+    return list((cache or {}).get('original_columns') or [])
+
+
+def load_project_columns(session, project_ids) -> dict:
+    """{project_id: Original-Spalten} mit einer Query - für Seiten/Exporte über mehrere Projekte"""
+    ids = {pid for pid in project_ids if pid is not None}
+    if not ids:
+        return {}
+    rows = session.query(Project.id, Project.column_cache).filter(Project.id.in_(ids))
+    return {pid: list((cache or {}).get('original_columns') or []) for pid, cache in rows}
+
+
+def pack_original_row(columns, data: dict) -> list:
+    """Werte einer CSV-Zeile als Liste in Spalten-Reihenfolge"""
+    return [data.get(col, '') for col in columns]
+
+
+def unpack_original_row(attributes, columns) -> dict:
+    """{Spalte: Wert} der Original-CSV-Zeile eines Leads"""
+    if not isinstance(attributes, dict):
+        return {}
+    row = attributes.get(ORIGINAL_ROW_KEY)
+    if row is None:
+        return dict(attributes.get('_original_data') or {})  # Noch nicht migriert
+    return {col: (row[i] if i < len(row) else '') for i, col in enumerate(columns)}
+
+
 # ===========================
 # Saved Filter Presets
 # ===========================
@@ -268,6 +338,280 @@ class FilterPreset(Base):
         return f"<FilterPreset(name={self.name}, category={self.category})>"
 
 
+# ===========================
+# Kontakt-Cache (Domain-Ebene)
+# ===========================
+
+class ContactCacheEntry(Base):
+    """
+    Scraping-Ergebnis pro Domain - projektübergreifend
+
+    Dieselbe Firma taucht oft in mehreren Projekten auf; der Name-Finder
+    liest hier zuerst, bevor er die Website erneut scraped.
+    Auch negative Ergebnisse (nichts gefunden) werden gespeichert.
+    """
+    __tablename__ = 'contact_cache'
+
+    domain = Column(String(255), primary_key=True)       # "mueller-bau.de" (ohne www.)
+
+    first_name = Column(String(100))
+    last_name = Column(String(100))
+    email = Column(String(255))
+    phone = Column(String(100))
+    position = Column(String(100))
+    impressum_url = Column(String(500))
+
+    found_name = Column(Boolean, default=False)
+    found_email = Column(Boolean, default=False)
+    extraction_method = Column(String(100))
+    confidence = Column(Float, default=0.0)
+
+    scraped_at = Column(DateTime, default=utc_now, index=True)
+
+    def __repr__(self):
+        return f"<ContactCacheEntry(domain={self.domain}, found_name={self.found_name})>"
+
+
+# ===========================
+# Job-Queue (Hintergrund-Tasks)
+# ===========================
+
+class Job(Base):
+    """
+    Persistenter Hintergrund-Job (Namen finden, Komplimente generieren, ...)
+
+    Liegt in der DB statt im Prozess-Speicher: jeder Gunicorn-Worker kann
+    den Fortschritt lesen, und ein Neustart verliert keine Jobs.
+
+    Status-Ablauf: queued -> running -> completed | failed | cancelled
+    """
+    __tablename__ = 'jobs'
+
+    id = Column(String(64), primary_key=True)            # "names_20250101120000_a1b2c3"
+    kind = Column(String(50), nullable=False)            # "find_names", "generate_compliments"
+    status = Column(String(20), nullable=False, default='queued', index=True)
+    priority = Column(Integer, nullable=False, default=0, server_default='0')  # Höher = früher (kleine Läufe)
+
+    params = Column(JSON)                                # Eingaben (lead_ids, Prompt, ...)
+    progress = Column(JSON)                              # Fortschritt wie von /api/task geliefert
+    error = Column(Text)
+
+    # Worker-Zuordnung
+    worker_id = Column(String(100))                      # "hostname:pid:thread"
+    heartbeat_at = Column(DateTime)
+    attempts = Column(Integer, default=0)
+    cancel_requested = Column(Boolean, default=False)
+
+    created_at = Column(DateTime, default=utc_now, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind={self.kind}, status={self.status})>"
+
+
+class JobEvent(Base):
+    """
+    Einzelnes Ereignis eines Jobs (z.B. Name/Kompliment für einen Lead)
+
+    Wird vom SSE-Stream /api/task/<id>/events ausgeliefert; die
+    fortlaufende ID dient als Last-Event-ID beim Reconnect.
+    """
+    __tablename__ = 'job_events'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), ForeignKey('jobs.id'), nullable=False, index=True)
+    event_type = Column(String(30), nullable=False)       # "lead"
+    data = Column(JSON)
+    created_at = Column(DateTime, default=utc_now)
+
+    def __repr__(self):
+        return f"<JobEvent(id={self.id}, job_id={self.job_id}, type={self.event_type})>"
+
+
+class JobSummary(Base):
+    """
+    Kompakte Zusammenfassung eines beendeten Jobs (Historie, Kapazitätsplanung)
+
+    Bleibt erhalten, wenn Job und Events nach Ablauf der Aufbewahrungszeit
+    gelöscht werden (job_queue.JobQueue.evict_finished).
+    """
+    __tablename__ = 'job_summaries'
+
+    job_id = Column(String(64), primary_key=True)        # Kein FK - der Job wird gelöscht
+    kind = Column(String(50), nullable=False, index=True)
+    status = Column(String(20), nullable=False)
+
+    total = Column(Integer, default=0)                   # Leads im Job
+    processed = Column(Integer, default=0)               # Erreichter Fortschritt
+    hits = Column(Integer, default=0)                    # Namen gefunden / Komplimente generiert
+    skipped = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+
+    duration_seconds = Column(Float)                     # Erster Start bis Ende
+    queue_seconds = Column(Float)                        # Wartezeit bis zum ersten Start
+    throughput = Column(Float)                           # Ergebnisse/min (letzter Lauf)
+    details = Column(JSON)                               # {"local_found": 3, "tokens_used": 1200, ...}
+    error = Column(Text)
+
+    created_at = Column(DateTime)
+    finished_at = Column(DateTime, index=True)
+
+    def __repr__(self):
+        return f"<JobSummary(job_id={self.job_id}, kind={self.kind}, status={self.status})>"
+
+
+class ProjectStats(Base):
+    """
+    Kennzahlen pro Projekt (Leads, Namen, Komplimente, Rating-Verteilung)
+
+    Wird von Triggern auf companies_v3 inkrementell gepflegt (siehe
+    PROJECT_STATS_DDL) - Import, Job-Handler, Bearbeitung und Bulk-Löschen
+    aktualisieren sie ohne eigenen Code. project_id 0 = Leads ohne Projekt.
+    """
+    __tablename__ = 'project_stats'
+
+    project_id = Column(Integer, primary_key=True, autoincrement=False)  # Kein FK: 0 = ohne Projekt
+    total = Column(Integer, nullable=False, default=0, server_default='0')
+    with_names = Column(Integer, nullable=False, default=0, server_default='0')
+    with_compliment = Column(Integer, nullable=False, default=0, server_default='0')
+    complete = Column(Integer, nullable=False, default=0, server_default='0')
+    with_email = Column(Integer, nullable=False, default=0, server_default='0')
+
+    # Rating-Verteilung (Stufen wie im Rating-Filter der Oberfläche)
+    rating_none = Column(Integer, nullable=False, default=0, server_default='0')   # Kein Rating
+    rating_low = Column(Integer, nullable=False, default=0, server_default='0')    # < 3.0
+    rating_30 = Column(Integer, nullable=False, default=0, server_default='0')     # 3.0 - 3.49
+    rating_35 = Column(Integer, nullable=False, default=0, server_default='0')     # 3.5 - 3.99
+    rating_40 = Column(Integer, nullable=False, default=0, server_default='0')     # 4.0 - 4.49
+    rating_45 = Column(Integer, nullable=False, default=0, server_default='0')     # >= 4.5
+
+    def __repr__(self):
+        return f"<ProjectStats(project_id={self.project_id}, total={self.total})>"
+
+
+class Selection(Base):
+    """
+    Serverseitige Lead-Auswahl ("Alle auswählen" / Checkbox-Auswahl)
+
+    Der Browser schickt nur Filter (oder wenige IDs) und bekommt ein Token;
+    Jobs und Exporte nehmen das Token statt tausender Lead-IDs. Die IDs
+    werden beim Anlegen in selection_items eingefroren - wie vorher die
+    ID-Liste im Browser ändert sich die Auswahl nicht, während ein Job die
+    Filterbedingung (z.B. "ohne Namen") abarbeitet.
+    """
+    __tablename__ = 'selections'
+
+    token = Column(String(64), primary_key=True)
+    filters = Column(JSON)                               # Filter-Spec wie /api/leads (None = ID-Liste)
+    lead_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=utc_now)
+    expires_at = Column(DateTime, index=True)
+
+    def __repr__(self):
+        return f"<Selection(token={self.token}, leads={self.lead_count})>"
+
+
+class SelectionItem(Base):
+    """Lead einer Selection - PK (token, lead_id) = Keyset-Index zum chunkweisen Lesen"""
+    __tablename__ = 'selection_items'
+
+    token = Column(String(64), primary_key=True)
+    lead_id = Column(Integer, primary_key=True, autoincrement=False)
+
+
+# ===========================
+# Volltextsuche (SQLite FTS5)
+# ===========================
+# External-Content-Index: leads_fts hält nur den Index, die Inhalte liest
+# FTS5 aus der View leads_fts_source. Trigger auf companies_v3 halten den
+# Index bei Import, Bearbeitung und Anreicherung synchron.
+LEADS_FTS_COLUMNS = ('name', 'website', 'first_name', 'last_name', 'email', 'city', 'description', 'original_data')
+# bm25-Gewichte je Spalte (gleiche Reihenfolge): Treffer im Namen zählen am meisten
+LEADS_FTS_WEIGHTS = (10.0, 5.0, 5.0, 5.0, 3.0, 2.0, 1.0, 1.0)
+
+
+def _fts_values(row: str) -> list:
+    """Spalten-Ausdrücke für eine Zeile (companies_v3, new oder old)"""
+    # Werte der Original-CSV-Zeile (Liste, siehe ORIGINAL_ROW_KEY)
+    attributes = f"CASE WHEN json_valid({row}.attributes) THEN {row}.attributes END"
+    original = f"(SELECT group_concat(value, ' ') FROM json_each({attributes}, '$._original_row'))"
+    return [f'{row}.{col}' for col in LEADS_FTS_COLUMNS[:-1]] + [original]
+
+
+_FTS_COLUMN_LIST = ', '.join(LEADS_FTS_COLUMNS)
+_FTS_NEW = ', '.join(_fts_values('new'))
+_FTS_OLD = ', '.join(_fts_values('old'))
+_FTS_SOURCE = ', '.join(f'{expr} AS {col}' for expr, col in zip(_fts_values('companies_v3'), LEADS_FTS_COLUMNS))
+LEADS_FTS_DDL = {
+    'leads_fts_source': f"CREATE VIEW leads_fts_source AS SELECT companies_v3.id AS id, {_FTS_SOURCE} FROM companies_v3",
+    'leads_fts': f"CREATE VIRTUAL TABLE leads_fts USING fts5({_FTS_COLUMN_LIST}, content='leads_fts_source', "
+                 f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'leads_fts_ai': f"CREATE TRIGGER leads_fts_ai AFTER INSERT ON companies_v3 BEGIN "
+                    f"INSERT INTO leads_fts(rowid, {_FTS_COLUMN_LIST}) VALUES (new.id, {_FTS_NEW}); END",
+    'leads_fts_ad': f"CREATE TRIGGER leads_fts_ad AFTER DELETE ON companies_v3 BEGIN "
+                    f"INSERT INTO leads_fts(leads_fts, rowid, {_FTS_COLUMN_LIST}) VALUES ('delete', old.id, {_FTS_OLD}); END",
+    'leads_fts_au': f"CREATE TRIGGER leads_fts_au AFTER UPDATE OF {', '.join(LEADS_FTS_COLUMNS[:-1])}, attributes ON companies_v3 BEGIN "
+                    f"INSERT INTO leads_fts(leads_fts, rowid, {_FTS_COLUMN_LIST}) VALUES ('delete', old.id, {_FTS_OLD}); "
+                    f"INSERT INTO leads_fts(rowid, {_FTS_COLUMN_LIST}) VALUES (new.id, {_FTS_NEW}); END",
+}
+
+
+# ===========================
+# Projekt-Statistik (Trigger)
+# ===========================
+# Zähler-Ausdrücke je Lead-Zeile ({r} = new, old oder companies_v3)
+PROJECT_STATS_COUNTERS = {
+    'total': '1',
+    'with_names': f'{{r}}.enrichment_state & {STATE_HAS_NAMES} != 0',
+    'with_compliment': f'{{r}}.enrichment_state & {STATE_HAS_COMPLIMENT} != 0',
+    'complete': f'{{r}}.enrichment_state = {STATE_COMPLETE}',
+    'with_email': "coalesce({r}.email, '') <> ''",
+    'rating_none': '{r}.rating IS NULL',
+    'rating_low': '{r}.rating < 3.0',
+    'rating_30': '{r}.rating >= 3.0 AND {r}.rating < 3.5',
+    'rating_35': '{r}.rating >= 3.5 AND {r}.rating < 4.0',
+    'rating_40': '{r}.rating >= 4.0 AND {r}.rating < 4.5',
+    'rating_45': '{r}.rating >= 4.5',
+}
+# Untergrenze des Rating-Filters -> Buckets, die ihn erfüllen
+RATING_BUCKETS = {4.5: ('rating_45',), 4.0: ('rating_40', 'rating_45'),
+                  3.5: ('rating_35', 'rating_40', 'rating_45'),
+                  3.0: ('rating_30', 'rating_35', 'rating_40', 'rating_45')}
+_STATS_COLUMN_LIST = ', '.join(PROJECT_STATS_COUNTERS)
+
+
+def _stats_delta(row: str, sign: int) -> str:
+    """Upsert, der die Zähler einer Lead-Zeile addiert (sign=1) oder abzieht (sign=-1)"""
+    values = ', '.join(f'CASE WHEN {expr.format(r=row)} THEN {sign} ELSE 0 END'
+                       for expr in PROJECT_STATS_COUNTERS.values())
+    updates = ', '.join(f'{col} = {col} + excluded.{col}' for col in PROJECT_STATS_COUNTERS)
+    # "WHERE true": sonst liest SQLite ON CONFLICT als Teil des SELECT
+    return (f"INSERT INTO project_stats(project_id, {_STATS_COLUMN_LIST}) "
+            f"SELECT coalesce({row}.project_id, 0), {values} WHERE true "
+            f"ON CONFLICT(project_id) DO UPDATE SET {updates};")
+
+
+PROJECT_STATS_DDL = {
+    'project_stats_ai': f"CREATE TRIGGER project_stats_ai AFTER INSERT ON companies_v3 BEGIN {_stats_delta('new', 1)} END",
+    'project_stats_ad': f"CREATE TRIGGER project_stats_ad AFTER DELETE ON companies_v3 BEGIN {_stats_delta('old', -1)} END",
+    'project_stats_au': f"CREATE TRIGGER project_stats_au AFTER UPDATE OF project_id, first_name, last_name, "
+                        f"compliment, email, rating ON companies_v3 BEGIN "
+                        f"{_stats_delta('old', -1)} {_stats_delta('new', 1)} END",
+    'project_stats_pd': "CREATE TRIGGER project_stats_pd AFTER DELETE ON projects BEGIN "
+                        "DELETE FROM project_stats WHERE project_id = old.id; END",
+}
+# Kompletter Neuaufbau (Migration / Trigger geändert)
+PROJECT_STATS_REBUILD = (
+    f"INSERT INTO project_stats(project_id, {_STATS_COLUMN_LIST}) "
+    f"SELECT coalesce(project_id, 0), "
+    + ', '.join(f'sum(CASE WHEN {expr.format(r="companies_v3")} THEN 1 ELSE 0 END)'
+                for expr in PROJECT_STATS_COUNTERS.values())
+    + " FROM companies_v3 GROUP BY coalesce(project_id, 0)"
+)
+
+
 # ===========================
 # Database Helper V3
 # ===========================
@@ -276,14 +620,220 @@ class DatabaseV3:
     """Database Connection Manager V3"""
 
     def __init__(self, db_path="lead_enrichment_v3.db"):
-        self.engine = create_engine(f'sqlite:///{db_path}', echo=False)
+        self.db_path = db_path
+        # Mehrere Threads/Prozesse (Job-Worker + Requests) teilen sich die DB:
+        # busy-timeout statt sofortigem "database is locked"
+        self.engine = create_engine(
+            f'sqlite:///{db_path}', echo=False,
+            connect_args={'timeout': 30, 'check_same_thread': False}
+        )
+        event.listen(self.engine, 'connect', self._configure_sqlite)
         self.Session = sessionmaker(bind=self.engine)
+        self.search_enabled = False  # FTS5-Index vorhanden (sonst ILIKE-Suche)
+
+    @staticmethod
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """WAL: Leser blockieren Schreiber nicht (Fortschritts-Polling während Jobs)"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
 
     def create_all(self):
-        """Erstellt alle Tabellen"""
-        Base.metadata.create_all(self.engine)
+        """Erstellt alle Tabellen (Migration prozessübergreifend serialisiert)"""
+        with self._migration_lock():
+            Base.metadata.create_all(self.engine)
+            self._add_missing_columns()
+            self._migrate_original_rows()
+            self._ensure_search_index()
+            self._ensure_project_stats()
         print("✅ Datenbank V3 Schema erstellt!")
 
+    @contextmanager
+    def _migration_lock(self):
+        """
+        Exklusiver Datei-Lock neben der DB für die Dauer von create_all()
+
+        Gunicorn startet die Worker ohne --preload und jeder ruft create_all()
+        beim Import auf. pysqlite committet DDL sofort - ohne Lock würden zwei
+        Worker z.B. leads_fts gleichzeitig löschen und neu anlegen. Der zweite
+        Worker sieht nach dem Warten das fertige Schema und tut nichts mehr.
+        Ohne fcntl (Windows, Entwicklung mit einem Prozess) ohne Lock.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(f'{self.db_path}.migrate.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _add_missing_columns(self):
+        """
+        Migration: neue Spalten bestehender Tabellen nachziehen
+
+        create_all() legt nur fehlende Tabellen an. Neue Spalten brauchen
+        einen server_default, wenn sie NOT NULL sind. Läuft unter dem
+        Migrations-Lock; kommt trotzdem ein anderer Prozess zuvor (z.B. ohne
+        fcntl), wird die Spalte/der Index neu geprüft statt abzubrechen.
+        """
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(self.engine.dialect)}'
+                    if column.computed is not None:
+                        # SQLite kann per ALTER TABLE nur VIRTUAL generierte Spalten anlegen
+                        ddl += f' GENERATED ALWAYS AS ({column.computed.sqltext}) VIRTUAL'
+                    elif column.server_default is not None:
+                        ddl += f" DEFAULT {column.server_default.arg}"
+                        if not column.nullable:
+                            ddl += ' NOT NULL'
+                    try:
+                        conn.execute(text(ddl))
+                    except OperationalError as e:
+                        if 'duplicate column name' not in str(e).lower():
+                            raise
+                        if column.name not in {col['name'] for col in inspect(conn).get_columns(table.name)}:
+                            raise
+                        continue  # Ein anderer Prozess hat die Spalte gerade angelegt
+                    print(f"   + Spalte {table.name}.{column.name}")
+
+                # Neue Indizes bestehender Tabellen (create_all legt sie nur mit der Tabelle an)
+                existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        try:
+                            index.create(conn)
+                        except OperationalError as e:
+                            if 'already exists' not in str(e).lower():
+                                raise
+                            continue  # Von einem anderen Prozess angelegt
+                        print(f"   + Index {index.name}")
+
+    def _migrate_original_rows(self, batch_size=1000):
+        """
+        Migration: Original-Spalten pro Lead -> einmal pro Projekt
+
+        Alte Leads speichern attributes = {'_original_columns': [...],
+        '_original_data': {...}}; danach stehen die Spalten in
+        Project.column_cache und der Lead hält nur noch '_original_row'.
+        """
+        legacy = text("json_extract(companies_v3.attributes, '$._original_columns') IS NOT NULL")
+        companies, projects = CompanyV3.__table__, Project.__table__
+        pending = (select(companies.c.id, companies.c.project_id, companies.c.attributes)
+                   .where(companies.c.project_id.isnot(None), legacy))
+        with self.engine.begin() as conn:
+            if conn.execute(pending.limit(1)).first() is None:
+                return
+            # FTS-Trigger würden jede Zeile neu indexieren - der Index wird danach einmal aufgebaut
+            self._drop_search_index(conn)
+
+        migrated = 0
+        with self.engine.begin() as conn:
+            caches = {pid: dict(cache or {}) for pid, cache in conn.execute(select(projects.c.id, projects.c.column_cache))}
+            changed = set()
+            last_id = 0
+            while True:
+                rows = conn.execute(pending.where(companies.c.id > last_id)
+                                    .order_by(companies.c.id).limit(batch_size)).all()
+                if not rows:
+                    break
+                updates = []
+                for lead_id, project_id, attributes in rows:
+                    cache = caches.setdefault(project_id, {})
+                    columns = cache.setdefault('original_columns', [])
+                    # Abweichende Spalten (sollte es nicht geben) hinten anhängen
+                    missing = [col for col in attributes.get('_original_columns') or [] if col not in columns]
+                    if missing:
+                        columns.extend(missing)
+                        changed.add(project_id)
+                    new_attributes = {key: value for key, value in attributes.items() if key not in _LEGACY_KEYS}
+                    new_attributes[ORIGINAL_ROW_KEY] = pack_original_row(columns, attributes.get('_original_data') or {})
+                    updates.append({'lead_id': lead_id, 'attributes': new_attributes})
+                conn.execute(companies.update().where(companies.c.id == bindparam('lead_id'))
+                             .values(attributes=bindparam('attributes')), updates)
+                last_id = rows[-1][0]
+                migrated += len(rows)
+
+            for project_id in changed:
+                conn.execute(projects.update().where(projects.c.id == project_id)
+                             .values(column_cache=caches[project_id]))
+        print(f"   + {migrated} Leads: Original-Spalten ins Projekt verschoben")
+
+    def _ensure_search_index(self):
+        """
+        Migration: FTS5-Index leads_fts (View, Index, Trigger) anlegen
+
+        Weicht eines der Objekte von LEADS_FTS_DDL ab (neue Installation,
+        geänderte Spalten), wird alles neu angelegt und der Index einmalig
+        aus companies_v3 aufgebaut. Ohne FTS5 im SQLite-Build bleibt die
+        Suche bei ILIKE.
+        """
+        if self._schema_matches(LEADS_FTS_DDL):
+            self.search_enabled = True
+            return
+
+        try:
+            with self.engine.begin() as conn:
+                self._drop_search_index(conn)
+                for ddl in LEADS_FTS_DDL.values():
+                    conn.execute(text(ddl))
+                # Kein 'rebuild': FTS5 kann die View (json_each-Unterabfrage) dafür nicht lesen
+                conn.execute(text(f"INSERT INTO leads_fts(rowid, {_FTS_COLUMN_LIST}) "
+                                  f"SELECT id, {_FTS_COLUMN_LIST} FROM leads_fts_source"))
+        except OperationalError as e:
+            if 'fts5' not in str(e).lower():
+                raise
+            # SQLite ohne FTS5: pysqlite committet DDL sofort - halb angelegte Objekte wieder entfernen
+            with self.engine.begin() as conn:
+                self._drop_search_index(conn)
+            print(f"⚠️  Volltextsuche nicht verfügbar (FTS5): {e}")
+            return
+        self.search_enabled = True
+        print("   + Suchindex leads_fts aufgebaut")
+
+    def _schema_matches(self, ddl: dict) -> bool:
+        """True wenn alle Objekte (View/Trigger/Tabelle) exakt so in sqlite_master stehen"""
+        with self.engine.begin() as conn:
+            existing = dict(conn.execute(text(
+                "SELECT name, sql FROM sqlite_master WHERE name IN ({})".format(
+                    ', '.join(f"'{name}'" for name in ddl)))).all())
+        return all(existing.get(name) == sql for name, sql in ddl.items())
+
+    def _ensure_project_stats(self):
+        """
+        Migration: Trigger für project_stats anlegen
+
+        Bei neuen oder geänderten Triggern wird die Tabelle einmalig aus
+        companies_v3 neu berechnet - danach halten die Trigger sie aktuell.
+        """
+        if self._schema_matches(PROJECT_STATS_DDL):
+            return
+        with self.engine.begin() as conn:
+            for name in PROJECT_STATS_DDL:
+                conn.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+            conn.execute(text('DELETE FROM project_stats'))
+            conn.execute(text(PROJECT_STATS_REBUILD))
+            for ddl in PROJECT_STATS_DDL.values():
+                conn.execute(text(ddl))
+        print("   + Projekt-Statistik project_stats aufgebaut")
+
+    @staticmethod
+    def _drop_search_index(conn):
+        for name in ('leads_fts_ai', 'leads_fts_ad', 'leads_fts_au'):
+            conn.execute(text(f'DROP TRIGGER IF EXISTS {name}'))
+        conn.execute(text('DROP TABLE IF EXISTS leads_fts'))
+        conn.execute(text('DROP VIEW IF EXISTS leads_fts_source'))
+
     def get_session(self):
         """Gibt eine neue Session zurück"""
         return self.Session()
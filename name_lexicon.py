@@ -0,0 +1,239 @@
+"""
+Name Lexicon - Gemeinsame Vornamen-Datenbank
+Eine Quelle für Anrede (Geschlecht), Namens-Validierung und lokale Extraktion
+
+Features:
+- Pflegbare Quelle als TSV (first_names_dach.tsv: name, gender)
+- Kompaktes Binärformat mit offener Hash-Tabelle (O(1) Lookup)
+- Wird beim ersten Zugriff gebaut und nur bei geänderter Quelle neu erzeugt
+- Zugriff per mmap: alle Gunicorn-Worker teilen sich die Seiten im Page-Cache
+- Umlaut-Varianten (jürgen -> juergen) für Namen aus E-Mail-Adressen
+
+Umfang: Die mitgelieferte Liste ist handkuratiert (~1.600 Namen, nur
+Geschlecht, keine Häufigkeiten) - kein Auszug aus Melderegister-/
+Standesamtsdaten. Eine vollständige Liste mit Häufigkeiten steht noch aus;
+Format und Builder sind dafür ausgelegt (Quelle ersetzen, .lex wird neu gebaut).
+
+Binärformat (Little Endian):
+    Header:  magic 'NLEX', version (H), reserved (H), slots (I), entries (I)
+    Slots:   slots x I  - Offset in den Eintrags-Pool + 1 (0 = leer)
+    Pool:    je Eintrag: len (B), gender (B), name (UTF-8)
+"""
+import os
+import mmap
+import zlib
+import struct
+import logging
+import threading
+from typing import Optional, Dict
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(BASE_DIR, 'first_names_dach.tsv')
+COMPILED_PATH = os.path.join(BASE_DIR, 'data', 'first_names_dach.lex')
+
+_MAGIC = b'NLEX'
+_VERSION = 2
+_HEADER = struct.Struct('<4sHHII')
+_SLOT = struct.Struct('<I')
+_ENTRY = struct.Struct('<BB')
+
+_GENDERS = {'m': 'male', 'f': 'female', 'u': 'unknown'}
+
+# Umlaut-Umschreibungen wie in E-Mail-Adressen üblich
+_TRANSLITERATION = str.maketrans({
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss',
+    'é': 'e', 'è': 'e', 'ç': 'c', 'ş': 's', 'ı': 'i', 'ğ': 'g',
+})
+
+
+@dataclass(frozen=True)
+class NameEntry:
+    """Ein Eintrag im Vornamen-Lexikon"""
+    name: str
+    gender: str          # 'male', 'female' oder 'unknown' (unisex)
+
+
+# ============================================================
+# BUILD
+# ============================================================
+
+def _normalize(name: str) -> str:
+    return name.strip().lower()
+
+
+def _read_source(source_path: str) -> Dict[str, str]:
+    """Liest die TSV-Quelle; Kommentare (#) und Leerzeilen werden ignoriert"""
+    entries: Dict[str, str] = {}
+    with open(source_path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            name = _normalize(parts[0])
+            gender = parts[1].strip() if len(parts) > 1 else 'u'
+            if gender not in _GENDERS:
+                logger.warning(f"⚠️ {source_path}:{line_no}: unbekanntes Geschlecht '{gender}'")
+                gender = 'u'
+            if name:
+                entries[name] = gender
+
+    # Umschreibungen ergänzen, ohne echte Einträge zu überschreiben
+    for name, value in list(entries.items()):
+        alias = name.translate(_TRANSLITERATION)
+        if alias != name and alias not in entries:
+            entries[alias] = value
+    return entries
+
+
+def build_lexicon(source_path: str = SOURCE_PATH, target_path: str = COMPILED_PATH) -> int:
+    """
+    Kompiliert die TSV-Quelle in das Binärformat
+
+    Schreibt atomar (Temp-Datei + os.replace), damit parallel startende
+    Worker nie eine halb geschriebene Datei öffnen.
+
+    Returns:
+        Anzahl der Einträge
+    """
+    entries = _read_source(source_path)
+
+    # Ladefaktor <= 0.5, Slot-Anzahl als Zweierpotenz (Maskieren statt Modulo)
+    slots = 8
+    while slots < len(entries) * 2:
+        slots *= 2
+
+    table = [0] * slots
+    pool = bytearray()
+    for name, gender in sorted(entries.items()):
+        key = name.encode('utf-8')
+        if len(key) > 255:
+            continue
+        idx = zlib.crc32(key) & (slots - 1)
+        while table[idx]:
+            idx = (idx + 1) & (slots - 1)
+        table[idx] = len(pool) + 1
+        pool += _ENTRY.pack(len(key), ord(gender)) + key
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, slots, len(entries)))
+        f.write(struct.pack(f'<{slots}I', *table))
+        f.write(pool)
+    try:
+        os.replace(tmp_path, target_path)
+    except OSError as e:
+        # Windows: Ziel ist von einem anderen Prozess gemappt - alte Datei bleibt
+        os.remove(tmp_path)
+        logger.warning(f"⚠️ Lexikon konnte nicht ersetzt werden: {e}")
+
+    logger.info(f"📚 Vornamen-Lexikon gebaut: {len(entries)} Einträge -> {target_path}")
+    return len(entries)
+
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+class NameLexicon:
+    """
+    Read-only Sicht auf das kompilierte Lexikon
+
+    Verhält sich für Mitgliedschaftstests wie ein Set:
+        'hans' in lexicon
+    """
+
+    def __init__(self, path: str = COMPILED_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Leere Datei oder Dateisystem ohne mmap-Unterstützung
+                self._buf = f.read()
+
+        magic, version, _, self._slots, self._count = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Ungültiges Lexikon-Format: {path}")
+        self._mask = self._slots - 1
+        self._slots_offset = _HEADER.size
+        self._pool_offset = self._slots_offset + self._slots * _SLOT.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self._find(name) is not None
+
+    def _find(self, name: str) -> Optional[int]:
+        """Position des Eintrags im Puffer oder None"""
+        key = _normalize(name).encode('utf-8')
+        if not key:
+            return None
+        buf = self._buf
+        idx = zlib.crc32(key) & self._mask
+        while True:
+            ref = _SLOT.unpack_from(buf, self._slots_offset + idx * _SLOT.size)[0]
+            if not ref:
+                return None
+            pos = self._pool_offset + ref - 1
+            length = buf[pos]
+            start = pos + _ENTRY.size
+            if length == len(key) and buf[start:start + length] == key:
+                return pos
+            idx = (idx + 1) & self._mask
+
+    def lookup(self, name: str) -> Optional[NameEntry]:
+        """Liefert den Eintrag zu einem Vornamen oder None"""
+        pos = self._find(name) if name else None
+        if pos is None:
+            return None
+        length, gender = _ENTRY.unpack_from(self._buf, pos)
+        start = pos + _ENTRY.size
+        return NameEntry(
+            name=bytes(self._buf[start:start + length]).decode('utf-8'),
+            gender=_GENDERS.get(chr(gender), 'unknown')
+        )
+
+    def gender(self, name: str) -> Optional[str]:
+        """'male', 'female', 'unknown' (unisex) oder None wenn unbekannt"""
+        entry = self.lookup(name)
+        return entry.gender if entry else None
+
+
+_lexicon: Optional[NameLexicon] = None
+_lexicon_lock = threading.Lock()
+
+
+def _needs_build(source_path: str, target_path: str) -> bool:
+    if not os.path.exists(target_path):
+        return True
+    try:
+        with open(target_path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header)[:2] != (_MAGIC, _VERSION):
+            return True  # Altes Format (z.B. v1 mit Häufigkeit) -> neu bauen
+        return os.path.getmtime(source_path) > os.path.getmtime(target_path)
+    except OSError:
+        return False
+
+
+def get_name_lexicon() -> NameLexicon:
+    """Lazy-Loading des gemeinsamen Lexikons (baut es bei Bedarf)"""
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                if _needs_build(SOURCE_PATH, COMPILED_PATH):
+                    build_lexicon(SOURCE_PATH, COMPILED_PATH)
+                _lexicon = NameLexicon(COMPILED_PATH)
+    return _lexicon
+
+
+if __name__ == '__main__':
+    count = build_lexicon()
+    print(f"✅ {count} Vornamen kompiliert: {COMPILED_PATH}")
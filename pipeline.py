@@ -0,0 +1,117 @@
+"""
+Pipeline - mehrstufige Verarbeitung mit begrenzten Queues
+
+Jede Stufe hat eigene Worker-Threads und eine begrenzte Eingangs-Queue:
+- langsame Stufen (Web-Scraping, KI) laufen mit eigener Parallelität
+- volle Queues bremsen die vorherige Stufe (Backpressure), der Speicher
+  bleibt unabhängig von der Job-Größe begrenzt
+- fertige Items landen in einer Ergebnis-Queue, die der Job-Thread leert
+  (nur er schreibt in die DB)
+
+Eine Stufenfunktion bekommt das Item und gibt den Namen der nächsten Stufe
+zurück (None = fertig). Exceptions beenden das Item mit item['error'].
+"""
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PUT_POLL_SECONDS = 0.2
+
+
+@dataclass
+class Stage:
+    """Eine Pipeline-Stufe: func(item) -> Name der nächsten Stufe oder None"""
+    name: str
+    func: Callable[[Dict[str, Any]], Optional[str]]
+    workers: int = 1
+    maxsize: int = 0  # 0 = 2x workers
+
+
+class Pipeline:
+    """Stufen mit eigenen Worker-Threads, verbunden über begrenzte Queues"""
+
+    def __init__(self, name: str, stages: Sequence[Stage]):
+        self.name = name
+        self.stages = {stage.name: stage for stage in stages}
+        self._queues = {stage.name: queue.Queue(maxsize=stage.maxsize or 2 * max(1, stage.workers))
+                        for stage in stages}
+        self._results = queue.Queue()  # unbegrenzt - Worker dürfen nie am Job-Thread hängen
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Items in der Pipeline, deren Ergebnis noch nicht abgeholt wurde"""
+        with self._lock:
+            return self._in_flight
+
+    def start(self) -> None:
+        for stage in self.stages.values():
+            for i in range(max(1, stage.workers)):
+                thread = threading.Thread(target=self._run, args=(stage,),
+                                          name=f"{self.name}-{stage.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self) -> None:
+        """Beendet alle Worker; Items in den Queues werden verworfen"""
+        self._stop.set()
+
+    def put(self, stage_name: str, item: Dict[str, Any], timeout: float = PUT_POLL_SECONDS) -> bool:
+        """Reiht ein Item in eine Stufe ein - False wenn die Queue voll bleibt"""
+        try:
+            self._queues[stage_name].put(item, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._lock:
+            self._in_flight += 1
+        return True
+
+    def results(self, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        """Alle fertigen Items (wartet höchstens timeout Sekunden auf das erste)"""
+        items = []
+        try:
+            items.append(self._results.get(timeout=timeout) if timeout > 0 else self._results.get_nowait())
+            while True:
+                items.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+        if items:
+            with self._lock:
+                self._in_flight -= len(items)
+        return items
+
+    def _forward(self, stage_name: Optional[str], item: Dict[str, Any]) -> None:
+        if stage_name is None:
+            self._results.put(item)
+            return
+        target = self._queues[stage_name]
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self, stage: Stage) -> None:
+        source = self._queues[stage.name]
+        while not self._stop.is_set():
+            try:
+                item = source.get(timeout=PUT_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if self._stop.is_set():
+                break
+            try:
+                next_stage = stage.func(item)
+            except Exception as e:
+                logger.error(f"{self.name}/{stage.name}: {e}")
+                item['error'] = str(e)
+                next_stage = None
+            self._forward(next_stage, item)
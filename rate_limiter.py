@@ -0,0 +1,162 @@
+"""
+Rate-Limiter für KI-Provider
+
+Pro Provider (und pro Prozess):
+- max. gleichzeitige Requests (Semaphore)
+- Token-Bucket für Requests/Minute
+- Token-Bucket für Tokens/Minute (geschätzt vor dem Request, korrigiert danach)
+- gemeinsame Pause nach 429 (Retry-After) für alle Threads
+
+Limits per Umgebungsvariable überschreibbar:
+    LLM_<PROVIDER>_CONCURRENCY, LLM_<PROVIDER>_RPM, LLM_<PROVIDER>_TPM
+    (0 = kein Limit für RPM/TPM). Mit mehreren Gunicorn-Workern gilt das
+    Limit je Worker-Prozess.
+"""
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Standard-Limits (konservativ, unterste bezahlte Stufe der Provider)
+DEFAULT_LIMITS = {
+    'deepseek': {'concurrency': 16, 'rpm': 600, 'tpm': 1_000_000},
+    'openai': {'concurrency': 8, 'rpm': 500, 'tpm': 200_000},
+    'anthropic': {'concurrency': 4, 'rpm': 50, 'tpm': 40_000},
+}
+FALLBACK_LIMITS = {'concurrency': 4, 'rpm': 60, 'tpm': 100_000}
+
+MAX_RETRY_AFTER = 120  # Sekunden - längere Retry-After-Werte werden gekappt
+
+
+class TokenBucket:
+    """Thread-sicherer Token-Bucket (Kapazität = Limit pro Minute)"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Blockiert bis `amount` Tokens verfügbar sind"""
+        if self.capacity <= 0:
+            return
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def consume(self, amount: float) -> None:
+        """Nachträgliche Korrektur (negativ = Gutschrift); Bucket darf ins Minus gehen"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ProviderLimiter:
+    """Limits eines Providers - von allen Jobs im Prozess geteilt"""
+
+    def __init__(self, name: str, concurrency: int, rpm: int, tpm: int):
+        self.name = name
+        self.max_concurrency = max(1, concurrency)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int) -> Iterator[None]:
+        """Hält einen Concurrency-Slot für die Dauer eines Requests"""
+        with self._slots:
+            self._wait_pause()
+            self._requests.acquire(1)
+            self._tokens.acquire(estimated_tokens)
+            yield
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Gleicht die Schätzung mit dem tatsächlichen Verbrauch ab"""
+        if actual_tokens:
+            self._tokens.consume(actual_tokens - estimated_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Pausiert alle Requests des Providers (z.B. nach 429)"""
+        with self._lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+        logger.warning(f"⏸️ {self.name}: Rate-Limit - Pause {seconds:.1f}s")
+
+    def _wait_pause(self) -> None:
+        while True:
+            with self._lock:
+                remaining = self._pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After-Header (Sekunden oder HTTP-Datum) -> Sekunden"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+# ============================================================
+# REGISTRY (Singleton pro Provider)
+# ============================================================
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _env_limit(provider: str, key: str, default: int) -> int:
+    value = os.environ.get(f"LLM_{provider.upper()}_{key.upper()}", '')
+    try:
+        return int(value) if value else default
+    except ValueError:
+        logger.warning(f"Ungültiges Limit LLM_{provider.upper()}_{key.upper()}={value!r}")
+        return default
+
+
+def get_rate_limiter(provider: str) -> ProviderLimiter:
+    """Limiter für einen Provider (lazy, Limits aus Umgebung oder Standard)"""
+    provider = (provider or 'default').lower()
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            defaults = DEFAULT_LIMITS.get(provider, FALLBACK_LIMITS)
+            limiter = ProviderLimiter(
+                provider,
+                concurrency=_env_limit(provider, 'concurrency', defaults['concurrency']),
+                rpm=_env_limit(provider, 'rpm', defaults['rpm']),
+                tpm=_env_limit(provider, 'tpm', defaults['tpm']),
+            )
+            _limiters[provider] = limiter
+            logger.info(f"🚦 Rate-Limit {provider}: {limiter.max_concurrency} parallel")
+        return limiter
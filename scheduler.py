@@ -0,0 +1,78 @@
+"""
+Scheduler - faire Verteilung knapper Ressourcen zwischen laufenden Jobs
+
+Globale Slot-Pools (pro Prozess) für Web-Scraping und KI-Aufrufe:
+- Obergrenze gleichzeitiger Scrapes/LLM-Requests, egal wie viele Jobs laufen
+- Faire Aufteilung: jeder aktive Job bekommt capacity / aktive Jobs Slots;
+  freie Slots darf ein Job nur ausleihen, wenn kein anderer Job wartet
+  -> ein kleiner Lauf wird von einem 20k-Batch nicht ausgehungert
+
+Limits per Umgebungsvariable: SCRAPE_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY
+(gelten je Gunicorn-Worker-Prozess).
+"""
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+SCRAPE_MAX_CONCURRENCY = int(os.environ.get('SCRAPE_MAX_CONCURRENCY', 8))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+
+
+class FairSlotPool:
+    """Begrenzte Slots, gerecht auf die Jobs verteilt, die gerade Slots wollen"""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self._cond = threading.Condition()
+        self._in_use: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, int] = defaultdict(int)
+        self._total = 0
+
+    def _fair_share(self) -> int:
+        jobs = set(self._waiting) | set(self._in_use)
+        return max(1, self.capacity // max(1, len(jobs)))
+
+    def _may_take(self, job_id: str) -> bool:
+        if self._total >= self.capacity:
+            return False
+        if self._in_use[job_id] < self._fair_share():
+            return True
+        # Über dem fairen Anteil nur, wenn kein anderer Job wartet
+        return not any(count for other, count in self._waiting.items() if other != job_id)
+
+    @contextmanager
+    def slot(self, job_id: str) -> Iterator[None]:
+        """Hält einen Slot für job_id (blockiert bis einer frei ist)"""
+        with self._cond:
+            self._waiting[job_id] += 1
+            try:
+                while not self._may_take(job_id):
+                    self._cond.wait()
+            finally:
+                self._waiting[job_id] -= 1
+                if not self._waiting[job_id]:
+                    del self._waiting[job_id]
+            self._in_use[job_id] += 1
+            self._total += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use[job_id] -= 1
+                if not self._in_use[job_id]:
+                    del self._in_use[job_id]
+                self._total -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Belegte Slots je Job (Debug/Monitoring)"""
+        with self._cond:
+            return dict(self._in_use)
+
+
+# Globale Pools (pro Prozess)
+scrape_slots = FairSlotPool('scrape', SCRAPE_MAX_CONCURRENCY)
+llm_slots = FairSlotPool('llm', LLM_MAX_CONCURRENCY)
@@ -0,0 +1,141 @@
+"""
+Serverseitige Lead-Auswahl (Selections)
+
+"Alle auswählen" hat bisher jede passende Lead-ID an den Browser geschickt,
+der die Liste an Jobs und Exporte zurückgeschickt hat (JSON-Body bzw.
+?lead_ids=... mit URL-Längen-Limit). Jetzt:
+- POST /api/selections mit Filter-Spec (oder wenigen IDs) -> Token
+- die IDs werden per INSERT ... SELECT in der DB eingefroren
+  (selection_items), nie über das Netz geschickt
+- Jobs und Exporte nehmen das Token und lesen die IDs chunkweise
+  (Keyset über den Primärschlüssel token, lead_id)
+
+Aufbewahrung: SELECTION_TTL_HOURS (Umgebungsvariable); Selections, die ein
+noch vorhandener Job referenziert (auch abgebrochen = fortsetzbar), bleiben.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+
+from models_v3 import CompanyV3, Job, Selection, SelectionItem, utc_now
+
+SELECTION_TTL_HOURS = int(os.environ.get('SELECTION_TTL_HOURS', 24))
+SELECTION_CHUNK_SIZE = 500
+_ID_BLOCK = 500  # SQLite-Variablenlimit: explizite IDs in Blöcken einfügen
+
+
+def create_selection(session, lead_query=None, lead_ids: Iterable[int] = (),
+                     exclude_ids: Iterable[int] = (), filters: Optional[Dict[str, Any]] = None) -> Selection:
+    """
+    Legt eine Selection an und committet
+
+    Args:
+        lead_query: Gefilterte Query über CompanyV3 (Filter wie /api/leads) - oder None
+        lead_ids: Explizite IDs (Checkbox-Auswahl); nur existierende Leads werden übernommen
+        exclude_ids: Nach "Alle auswählen" wieder abgewählte Leads
+        filters: Filter-Spec zur Nachvollziehbarkeit (wird mitgespeichert)
+    """
+    evict_expired(session)
+    token = uuid.uuid4().hex
+    excluded = [int(lead_id) for lead_id in exclude_ids]
+
+    if lead_query is not None:
+        ids = lead_query.with_entities(literal(token), CompanyV3.id).order_by(None)
+        if excluded:
+            ids = ids.filter(CompanyV3.id.notin_(excluded))
+        session.execute(insert(SelectionItem).from_select(['token', 'lead_id'], ids.distinct()))
+    else:
+        explicit = sorted({int(lead_id) for lead_id in lead_ids} - set(excluded))
+        for start in range(0, len(explicit), _ID_BLOCK):
+            block = explicit[start:start + _ID_BLOCK]
+            session.execute(insert(SelectionItem).from_select(
+                ['token', 'lead_id'],
+                select(literal(token), CompanyV3.id).where(CompanyV3.id.in_(block))
+            ))
+
+    count = session.scalar(select(func.count()).select_from(SelectionItem).where(SelectionItem.token == token))
+    now = utc_now()
+    selection = Selection(token=token, filters=filters, lead_count=count, created_at=now,
+                          expires_at=now + timedelta(hours=SELECTION_TTL_HOURS))
+    session.add(selection)
+    session.commit()
+    return selection
+
+
+def get_selection(session, token: Optional[str]) -> Optional[Selection]:
+    """
+    Selection zum Token oder None (unbekannt/abgelaufen)
+
+    Eine abgelaufene Selection wird gleich gelöscht (mit Commit), sofern
+    kein Job sie referenziert - laufende/fortsetzbare Jobs lesen ihre IDs
+    weiter über iter_selection_ids, neue Jobs bekommen sie nicht mehr.
+    """
+    if not token:
+        return None
+    selection = session.get(Selection, str(token))
+    if selection is None or selection.expires_at is None or _as_utc(selection.expires_at) >= utc_now():
+        return selection
+    if not session.scalar(select(func.count()).select_from(Job).where(_job_token() == selection.token)):
+        _delete_selections(session, [selection.token])
+        session.commit()
+    return None
+
+
+def selection_filter(token: str):
+    """WHERE-Bedingung: CompanyV3.id gehört zur Selection (Subquery, keine ID-Liste in Python)"""
+    return CompanyV3.id.in_(select(SelectionItem.lead_id).where(SelectionItem.token == token))
+
+
+def iter_selection_ids(session, token: str, after_id: Optional[int] = None,
+                       chunk_size: int = SELECTION_CHUNK_SIZE) -> Iterator[List[int]]:
+    """
+    Lead-IDs der Selection aufsteigend in Chunks (ab after_id exklusive)
+
+    Jeder Chunk ist eine eigene Keyset-Query - zwischen den Chunks darf der
+    Aufrufer committen, es bleibt kein Cursor offen.
+    """
+    while True:
+        query = select(SelectionItem.lead_id).where(SelectionItem.token == token)
+        if after_id is not None:
+            query = query.where(SelectionItem.lead_id > after_id)
+        ids = list(session.scalars(query.order_by(SelectionItem.lead_id).limit(chunk_size)))
+        if not ids:
+            return
+        yield ids
+        after_id = ids[-1]
+
+
+def selection_position(session, token: str, lead_id: int) -> int:
+    """Anzahl der Selection-Leads bis einschließlich lead_id (Index beim Fortsetzen)"""
+    return session.scalar(select(func.count()).select_from(SelectionItem)
+                          .where(SelectionItem.token == token, SelectionItem.lead_id <= lead_id))
+
+
+def evict_expired(session) -> int:
+    """Löscht abgelaufene Selections, die kein Job mehr referenziert (ohne Commit)"""
+    job_token = _job_token()
+    referenced = select(job_token).where(job_token.isnot(None))
+    tokens = list(session.scalars(
+        select(Selection.token).where(Selection.expires_at < utc_now(), Selection.token.notin_(referenced))
+    ))
+    _delete_selections(session, tokens)
+    return len(tokens)
+
+
+def _job_token():
+    return func.json_extract(Job.params, '$.selection')
+
+
+def _delete_selections(session, tokens: List[str]) -> None:
+    for start in range(0, len(tokens), _ID_BLOCK):
+        block = tokens[start:start + _ID_BLOCK]
+        session.execute(delete(SelectionItem).where(SelectionItem.token.in_(block)))
+        session.execute(delete(Selection).where(Selection.token.in_(block)))
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite liefert naive Datetimes zurück (gespeichert als UTC)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
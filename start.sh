@@ -1,2 +1,5 @@
 #!/bin/bash
-exec gunicorn --bind 0.0.0.0:${PORT:-8080} --workers 2 --timeout 120 app:app
+# 2 Worker x 8 Threads (gthread). Offene SSE-Streams (/api/task/<id>/events) belegen
+# je einen Thread - höchstens SSE_MAX_STREAMS (Standard 2) pro Worker, der Rest pollt.
+# Threads/Worker hier und im Procfile gemeinsam ändern.
+exec gunicorn --bind 0.0.0.0:${PORT:-8080} --workers 2 --worker-class gthread --threads 8 --timeout 120 app:app
@@ -7,10 +7,13 @@
 let state = {
     currentProject: null,
     currentPage: 1,
+    pageCursors: [null],  // Keyset-Cursor je Seite (after_id), Index = Seite - 1
     perPage: 50,
     totalPages: 1,
     totalLeads: 0,  // Gesamtzahl aller Leads (für Auswahl-Buttons)
     selectedIds: new Set(),
+    selectAll: null,        // {filters, count} nach "Alle auswählen" - Auswahl liegt auf dem Server
+    excludedIds: new Set(), // Danach wieder abgewählte Leads
     currentTask: null,
     leads: [],
     originalColumns: [],  // Original CSV-Spalten für dynamische Tabelle
@@ -81,20 +84,33 @@ function switchView(viewName) {
 // ============================================================
 // LEADS
 // ============================================================
-async function loadLeads() {
+// Aktive Filter der Lead-Liste (gleiche Keys wie /api/leads)
+function currentFilters() {
     const projectId = document.getElementById('projectSelect').value;
     const search = document.getElementById('searchInput').value;
+    return {
+        ...(projectId && { project_id: projectId }),
+        ...(search && { search: search }),
+        ...(state.currentFilter && { filter: state.currentFilter }),
+        ...(state.categoryFilter && { category: state.categoryFilter }),
+        ...(state.minRating && { min_rating: state.minRating }),
+        ...(state.minReviews && { min_reviews: state.minReviews })
+    };
+}
+
+async function loadLeads() {
+    // Seite 1 = neue Abfrage (Filter/Suche/Projekt geändert) -> Cursor verwerfen
+    if (state.currentPage === 1) {
+        state.pageCursors = [null];
+    }
+    const afterId = state.pageCursors[state.currentPage - 1];
 
     try {
         const params = new URLSearchParams({
             page: state.currentPage,
             per_page: state.perPage,
-            ...(projectId && { project_id: projectId }),
-            ...(search && { search: search }),
-            ...(state.currentFilter && { filter: state.currentFilter }),
-            ...(state.categoryFilter && { category: state.categoryFilter }),
-            ...(state.minRating && { min_rating: state.minRating }),
-            ...(state.minReviews && { min_reviews: state.minReviews })
+            ...(afterId != null && { after_id: afterId }),
+            ...currentFilters()
         });
 
         console.log('loadLeads: Fetching with params:', params.toString());
@@ -111,6 +127,8 @@ async function loadLeads() {
 
         state.leads = data.leads || [];
         state.totalPages = data.pages || 1;
+        // Cursor der nächsten Seite merken (ohne Cursor, z.B. bei Suche: OFFSET über page)
+        state.pageCursors[state.currentPage] = data.next_cursor ?? null;
         state.totalLeads = data.total || 0;
         state.currentProject = projectId || null;
 
@@ -198,7 +216,7 @@ function renderLeadsTable(leads) {
                 <td class="checkbox-col">
                     <input type="checkbox"
                         data-id="${lead.id}"
-                        ${state.selectedIds.has(lead.id) ? 'checked' : ''}
+                        ${isSelected(lead.id) ? 'checked' : ''}
                         onchange="toggleSelection(${lead.id}, this.checked)">
                 </td>
                 <td class="nr-col">${rowNum}</td>
@@ -347,7 +365,7 @@ function updatePagination(data) {
     document.getElementById('pageInfo').textContent =
         `Seite ${data.page} von ${data.pages || 1}`;
     document.getElementById('prevPage').disabled = data.page <= 1;
-    document.getElementById('nextPage').disabled = data.page >= data.pages;
+    document.getElementById('nextPage').disabled = data.has_more === undefined ? data.page >= data.pages : !data.has_more;
 }
 
 function updateCounts(total) {
@@ -355,7 +373,7 @@ function updateCounts(total) {
     const onPage = state.leads ? state.leads.length : 0;
     document.getElementById('leadCount').textContent = `${total} Leads (${onPage} auf Seite)`;
     document.getElementById('selectedCount').textContent =
-        `${state.selectedIds.size} ausgewählt`;
+        `${selectionSize()} ausgewählt`;
 }
 
 function prevPage() {
@@ -366,7 +384,7 @@ function prevPage() {
 }
 
 function nextPage() {
-    if (state.currentPage < state.totalPages) {
+    if (state.currentPage < state.totalPages || state.pageCursors[state.currentPage] != null) {
         state.currentPage++;
         loadLeads();
     }
@@ -381,65 +399,86 @@ function changePerPage() {
 // ============================================================
 // SELECTION
 // ============================================================
-function toggleSelection(id, selected) {
-    if (selected) {
+// Zwei Modi: einzeln angehakte IDs (selectedIds) oder "Alle auswählen" als
+// Filter auf dem Server (selectAll) minus wieder abgewählte Leads (excludedIds)
+function isSelected(id) {
+    return state.selectAll ? !state.excludedIds.has(id) : state.selectedIds.has(id);
+}
+
+function selectionSize() {
+    return state.selectAll ? state.selectAll.count - state.excludedIds.size : state.selectedIds.size;
+}
+
+function setSelected(id, selected) {
+    if (state.selectAll) {
+        if (selected) {
+            state.excludedIds.delete(id);
+        } else {
+            state.excludedIds.add(id);
+        }
+    } else if (selected) {
         state.selectedIds.add(id);
     } else {
         state.selectedIds.delete(id);
     }
-    updateCounts(state.leads.length);
 }
 
-function toggleAllOnPage() {
-    const checked = document.getElementById('selectAllCheckbox').checked;
-    state.leads.forEach(lead => {
-        if (checked) {
-            state.selectedIds.add(lead.id);
-        } else {
-            state.selectedIds.delete(lead.id);
-        }
-    });
-    loadLeads(); // Re-render to update checkboxes
+function clearSelection() {
+    state.selectedIds.clear();
+    state.selectAll = null;
+    state.excludedIds.clear();
 }
 
-async function selectAll() {
-    // ALLE Leads auf ALLEN Seiten auswählen (wie Original)
-    const projectId = document.getElementById('projectSelect').value;
-    const search = document.getElementById('searchInput').value;
-    const filter = state.currentFilter || '';
+// Auswahl auf dem Server anlegen -> {token, count} für Jobs und Exporte
+async function createSelection() {
+    const body = state.selectAll
+        ? { filters: state.selectAll.filters, exclude_ids: Array.from(state.excludedIds) }
+        : { lead_ids: Array.from(state.selectedIds) };
+    const response = await fetch('/api/selections', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+    const data = await response.json();
+    if (!response.ok) {
+        throw new Error(data.error || 'Auswahl fehlgeschlagen');
+    }
+    return data;
+}
 
-    try {
-        let url = `/api/leads/ids?`;
-        if (projectId) url += `project_id=${projectId}&`;
-        if (search) url += `search=${encodeURIComponent(search)}&`;
-        if (filter) url += `filter=${filter}&`;
+function toggleSelection(id, selected) {
+    setSelected(id, selected);
+    updateCounts(state.totalLeads);
+}
 
-        const response = await fetch(url);
-        const data = await response.json();
+function toggleAllOnPage() {
+    const checked = document.getElementById('selectAllCheckbox').checked;
+    state.leads.forEach(lead => setSelected(lead.id, checked));
+    loadLeads(); // Re-render to update checkboxes
+}
 
-        // Alle IDs hinzufügen
-        data.ids.forEach(id => state.selectedIds.add(id));
+function selectAll() {
+    // ALLE Leads auf ALLEN Seiten auswählen - nur die Filter merken, die IDs bleiben auf dem Server
+    state.selectedIds.clear();
+    state.excludedIds.clear();
+    state.selectAll = { filters: currentFilters(), count: state.totalLeads };
 
-        showToast(`${state.selectedIds.size} Leads ausgewählt`, 'success');
-        updateCounts(state.totalLeads);
-        loadLeads();
-    } catch (error) {
-        console.error('Error selecting all:', error);
-        showToast('Fehler beim Auswählen', 'error');
-    }
+    showToast(`${selectionSize()} Leads ausgewählt`, 'success');
+    updateCounts(state.totalLeads);
+    loadLeads();
 }
 
 function selectPage() {
     // Nur aktuelle Seite auswählen (additiv - andere Seiten bleiben)
-    state.leads.forEach(lead => state.selectedIds.add(lead.id));
-    showToast(`Seite ausgewählt (${state.selectedIds.size} gesamt)`, 'success');
+    state.leads.forEach(lead => setSelected(lead.id, true));
+    showToast(`Seite ausgewählt (${selectionSize()} gesamt)`, 'success');
     updateCounts(state.totalLeads);
     loadLeads();
 }
 
 function deselectAll() {
     // ALLE abwählen
-    state.selectedIds.clear();
+    clearSelection();
     showToast('Auswahl aufgehoben', 'info');
     updateCounts(0);
     loadLeads();
@@ -463,7 +502,7 @@ function initSearch() {
 
     projectSelect.addEventListener('change', () => {
         state.currentPage = 1;
-        state.selectedIds.clear();
+        clearSelection();
         loadLeads();
     });
 }
@@ -502,6 +541,26 @@ function initUpload() {
     });
 }
 
+async function showImportedProject(task) {
+    showToast(`✅ ${task.imported} Leads in neues Projekt importiert!`, 'success');
+
+    // Lade Projekte neu und wähle das neue Projekt aus
+    await loadProjects();
+
+    // Wähle das neu erstellte Projekt aus
+    const projectSelect = document.getElementById('projectSelect');
+    if (projectSelect && task.project_id) {
+        projectSelect.value = task.project_id;
+        state.currentProject = task.project_id;
+    }
+
+    // Wechsle zur Leads-Ansicht und lade nur Leads des neuen Projekts
+    switchView('leads');
+    state.currentPage = 1;
+    clearSelection();
+    loadLeads();
+}
+
 async function uploadFile(file) {
     if (!file.name.endsWith('.csv')) {
         showToast('Nur CSV-Dateien erlaubt', 'error');
@@ -521,25 +580,10 @@ async function uploadFile(file) {
 
         const data = await response.json();
 
-        if (data.success) {
-            showToast(`✅ ${data.imported} Leads in neues Projekt importiert!`, 'success');
-            hideProgress();
-
-            // Lade Projekte neu und wähle das neue Projekt aus
-            await loadProjects();
-
-            // Wähle das neu erstellte Projekt aus
-            const projectSelect = document.getElementById('projectSelect');
-            if (projectSelect && data.project_id) {
-                projectSelect.value = data.project_id;
-                state.currentProject = data.project_id;
-            }
-
-            // Wechsle zur Leads-Ansicht und lade nur Leads des neuen Projekts
-            switchView('leads');
-            state.currentPage = 1;
-            state.selectedIds.clear();
-            loadLeads();
+        if (data.task_id) {
+            // Import läuft als Hintergrund-Job - Fortschritt wie bei den anderen Tasks
+            state.currentTask = data.task_id;
+            pollTaskStatus(data.task_id, 'Import');
         } else {
             showToast(data.error || 'Import fehlgeschlagen', 'error');
             hideProgress();
@@ -607,7 +651,7 @@ async function deleteProject() {
             await loadProjects();
             // Auswahl zurücksetzen
             projectSelect.value = '';
-            state.selectedIds.clear();
+            clearSelection();
             // Leads neu laden
             loadLeads();
         } else {
@@ -623,17 +667,17 @@ async function deleteProject() {
 // NAME FINDER
 // ============================================================
 async function findNames() {
-    const ids = Array.from(state.selectedIds);
-    if (ids.length === 0) {
+    if (selectionSize() === 0) {
         showToast('Keine Leads ausgewählt', 'warning');
         return;
     }
 
     try {
+        const selection = await createSelection();
         const response = await fetch('/api/find-names', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ lead_ids: ids })
+            body: JSON.stringify({ selection: selection.token })
         });
 
         const data = await response.json();
@@ -650,21 +694,22 @@ async function findNames() {
 // ============================================================
 // COMPLIMENT GENERATOR MIT PROMPT-AUSWAHL
 // ============================================================
-async function generateCompliments() {
-    const ids = Array.from(state.selectedIds);
-    if (ids.length === 0) {
+async function generateCompliments(mode = 'compliments') {
+    const count = selectionSize();
+    if (count === 0) {
         showToast('Keine Leads ausgewählt', 'warning');
         return;
     }
 
-    // Speichere IDs für später
-    state.complimentLeadIds = ids;
+    // Ziel (Auswahl-Token wird erst beim Start angelegt) + Modus für später
+    state.complimentTarget = 'selection';
+    state.complimentMode = mode;
 
     // Lade Prompts und zeige Modal
     await loadPromptsForSelection();
 
     document.getElementById('promptSelectInfo').textContent =
-        `Wähle einen Prompt für ${ids.length} Lead${ids.length > 1 ? 's' : ''}.`;
+        `Wähle einen Prompt für ${count} Lead${count > 1 ? 's' : ''}.`;
     document.getElementById('promptSelectModal').classList.add('active');
 }
 
@@ -746,8 +791,8 @@ function closePromptSelectModal() {
 }
 
 async function startComplimentGeneration() {
-    const ids = state.complimentLeadIds;
-    if (!ids || ids.length === 0) {
+    const target = state.complimentTarget;
+    if (!target || (target === 'selection' && selectionSize() === 0)) {
         showToast('Keine Leads ausgewählt', 'warning');
         return;
     }
@@ -757,7 +802,6 @@ async function startComplimentGeneration() {
     const selectedModel = document.querySelector('input[name="modelSelect"]:checked')?.value || 'deepseek';
 
     let promptData = {
-        lead_ids: ids,
         provider: selectedModel
     };
 
@@ -783,8 +827,18 @@ async function startComplimentGeneration() {
 
     closePromptSelectModal();
 
+    // Anreichern: Namen + Kompliment in einem Job (Pipeline statt zwei Läufen nacheinander)
+    const enrich = state.complimentMode === 'enrich';
+
     try {
-        const response = await fetch('/api/generate-compliments', {
+        // Auswahl -> Token; Einzel-Lead aus dem Modal direkt als ID
+        if (target === 'selection') {
+            promptData.selection = (await createSelection()).token;
+        } else {
+            promptData.lead_ids = [target];
+        }
+
+        const response = await fetch(enrich ? '/api/enrich' : '/api/generate-compliments', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(promptData)
@@ -793,7 +847,7 @@ async function startComplimentGeneration() {
         const data = await response.json();
         if (data.task_id) {
             state.currentTask = data.task_id;
-            pollTaskStatus(data.task_id, 'Komplimente generieren');
+            pollTaskStatus(data.task_id, enrich ? 'Anreichern' : 'Komplimente generieren');
         } else if (data.error) {
             showToast(data.error, 'error');
         }
@@ -804,21 +858,22 @@ async function startComplimentGeneration() {
 }
 
 async function deleteCompliments() {
-    const ids = Array.from(state.selectedIds);
-    if (ids.length === 0) {
+    const count = selectionSize();
+    if (count === 0) {
         showToast('Keine Leads ausgewählt', 'warning');
         return;
     }
 
-    if (!confirm(`Komplimente von ${ids.length} Leads löschen?`)) {
+    if (!confirm(`Komplimente von ${count} Leads löschen?`)) {
         return;
     }
 
     try {
+        const selection = await createSelection();
         const response = await fetch('/api/leads/compliments', {
             method: 'DELETE',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ lead_ids: ids })
+            body: JSON.stringify({ selection: selection.token })
         });
 
         const data = await response.json();
@@ -851,65 +906,67 @@ function formatTime(seconds) {
     return `${h}h ${m}m`;
 }
 
-async function pollTaskStatus(taskId, title) {
+// Task-Fortschritt: Server-Sent Events (live, jede Lead-Änderung), Polling nur als Fallback
+function pollTaskStatus(taskId, title) {
     taskStartTime = Date.now();
     showProgress(title, 0);
 
+    if (window.EventSource) {
+        streamTaskEvents(taskId, title);
+    } else {
+        pollTaskFallback(taskId, title);
+    }
+}
+
+function streamTaskEvents(taskId, title) {
+    const source = new EventSource(`/api/task/${taskId}/events`);
+    let received = false;
+    let finished = false;
+
+    source.addEventListener('progress', (e) => {
+        received = true;
+        renderTaskProgress(JSON.parse(e.data), title);
+    });
+
+    // ECHTZEIT-UPDATE: jede Lead-Änderung einzeln (nichts geht zwischen Polls verloren)
+    source.addEventListener('lead', (e) => {
+        received = true;
+        updateTableRow(JSON.parse(e.data));
+    });
+
+    source.addEventListener('done', (e) => {
+        finished = true;
+        source.close();
+        const task = JSON.parse(e.data);
+        renderTaskProgress(task, title);
+        finishTask(task, title, true);
+    });
+
+    source.onerror = () => {
+        // Stream-Ende/Netzwerkfehler: Browser verbindet sich selbst neu (Last-Event-ID).
+        // Nie verbunden oder endgültig geschlossen -> auf Polling umschalten
+        if (finished) return;
+        if (!received || source.readyState === EventSource.CLOSED) {
+            source.close();
+            pollTaskFallback(taskId, title);
+        }
+    };
+}
+
+function pollTaskFallback(taskId, title) {
     const poll = async () => {
         try {
             const response = await fetch(`/api/task/${taskId}`);
             const task = await response.json();
 
-            const percent = (task.progress / task.total) * 100;
-            const elapsed = (Date.now() - taskStartTime) / 1000;
-
-            // ETA berechnen
-            let eta = '--';
-            if (task.progress > 0 && task.progress < task.total) {
-                const avgTimePerItem = elapsed / task.progress;
-                const remaining = (task.total - task.progress) * avgTimePerItem;
-                eta = formatTime(remaining);
-            }
-
-            // Stats zusammenstellen
-            const found = task.found || task.generated || 0;
-            const skipped = task.skipped || 0;
-            const errors = task.errors || 0;
-
-            updateProgressDetailed(
-                title,
-                percent,
-                `${task.progress} / ${task.total}`,
-                `Verstrichene Zeit: ${formatTime(elapsed)} | ETA: ${eta}`,
-                found,
-                skipped,
-                errors,
-                task.current || '',
-                task.local_found,
-                task.web_found
-            );
+            renderTaskProgress(task, title);
 
             // ECHTZEIT-UPDATE: Zeile sofort aktualisieren wenn neuer Lead gefunden
             if (task.last_updated) {
                 updateTableRow(task.last_updated);
             }
 
-            if (task.status === 'completed') {
-                hideProgress();
-                const localInfo = task.local_found ? ` (${task.local_found} lokal, ${task.web_found} web)` : '';
-                showToast(`${title} abgeschlossen! ${found} gefunden${localInfo}`, 'success');
-                loadLeads();
-
-                // Wenn im Einzel-Lead-Modus: Modal-Felder aktualisieren
-                if (state.singleLeadMode && state.currentLeadId) {
-                    refreshLeadModal(state.currentLeadId);
-                    state.singleLeadMode = false;
-                }
-            } else if (task.status === 'cancelled') {
-                hideProgress();
-                showToast('Abgebrochen', 'warning');
-                loadLeads();
-            } else {
+            if (!finishTask(task, title, false)) {
                 setTimeout(poll, 500); // Schnelleres Polling
             }
         } catch (error) {
@@ -921,6 +978,90 @@ async function pollTaskStatus(taskId, title) {
     poll();
 }
 
+function renderTaskProgress(task, title) {
+    const percent = task.total ? (task.progress / task.total) * 100 : 0;
+    const elapsed = (Date.now() - taskStartTime) / 1000;
+
+    // ETA berechnen
+    let eta = '--';
+    if (task.progress > 0 && task.progress < task.total) {
+        const avgTimePerItem = elapsed / task.progress;
+        const remaining = (task.total - task.progress) * avgTimePerItem;
+        eta = formatTime(remaining);
+    }
+
+    // Stats zusammenstellen
+    const found = task.found || task.generated || task.imported || 0;
+    const skipped = task.skipped || 0;
+    const errors = task.errors || 0;
+
+    // Erreichter Durchsatz (vom Worker gemessen)
+    let rate = '';
+    if (task.throughput) {
+        rate = ` | ${task.throughput}/min`;
+        if (task.tokens_per_min) rate += ` (${task.tokens_per_min} Tokens/min)`;
+    }
+
+    // Noch in der Warteschlange: Position + geschätzter Start statt Laufzeit
+    let timeInfo = `Verstrichene Zeit: ${formatTime(elapsed)} | ETA: ${eta}${rate}`;
+    if (task.status === 'queued' && task.queue_position) {
+        timeInfo = `Warteschlange: Position ${task.queue_position} | Start in ca. ${formatTime(task.estimated_start_seconds || 0)}`;
+    }
+
+    updateProgressDetailed(
+        title,
+        percent,
+        `${task.progress} / ${task.total}`,
+        timeInfo,
+        found,
+        skipped,
+        errors,
+        task.current || '',
+        task.local_found,
+        task.web_found,
+        task.cache_found
+    );
+}
+
+// Gibt true zurück wenn der Task beendet ist. live=true: Zeilen wurden bereits
+// per SSE aktualisiert, die Tabelle muss nicht neu geladen werden.
+function finishTask(task, title, live) {
+    const found = task.found || task.generated || 0;
+
+    if (task.status === 'completed') {
+        hideProgress();
+        if (task.kind === 'import_csv') {
+            showImportedProject(task);
+            return true;
+        }
+        const cacheInfo = task.cache_found ? `, ${task.cache_found} Cache` : '';
+        const localInfo = task.local_found || task.cache_found ? ` (${task.local_found} lokal, ${task.web_found} web${cacheInfo})` : '';
+        const generatedInfo = task.kind === 'enrich' ? `, ${task.generated || 0} Komplimente` : '';
+        showToast(`${title} abgeschlossen! ${found} gefunden${localInfo}${generatedInfo}`, 'success');
+        if (!live) loadLeads();
+
+        // Wenn im Einzel-Lead-Modus: Modal-Felder aktualisieren
+        if (state.singleLeadMode && state.currentLeadId) {
+            refreshLeadModal(state.currentLeadId);
+            state.singleLeadMode = false;
+        }
+        return true;
+    }
+    if (task.status === 'cancelled') {
+        hideProgress();
+        showToast('Abgebrochen', 'warning');
+        if (!live) loadLeads();
+        return true;
+    }
+    if (task.status === 'failed') {
+        hideProgress();
+        showToast(`${title} fehlgeschlagen: ${task.error || 'Unbekannter Fehler'}`, 'error');
+        if (!live) loadLeads();
+        return true;
+    }
+    return false;
+}
+
 async function cancelTask() {
     if (state.currentTask) {
         await fetch(`/api/task/${state.currentTask}/cancel`, { method: 'POST' });
@@ -931,34 +1072,31 @@ async function cancelTask() {
 // EXPORT
 // ============================================================
 function exportCSV() {
-    const ids = Array.from(state.selectedIds);
-    if (ids.length === 0 && !state.currentProject) {
-        showToast('Keine Leads ausgewählt', 'warning');
-        return;
-    }
-
-    let url = '/api/export?';
-    if (ids.length > 0) {
-        url += `lead_ids=${ids.join(',')}`;
-    } else if (state.currentProject) {
-        url += `project_id=${state.currentProject}`;
-    }
-
-    window.location.href = url;
+    exportLeads('/api/export');
 }
 
 function exportExcel() {
-    const ids = Array.from(state.selectedIds);
-    if (ids.length === 0 && !state.currentProject) {
+    exportLeads('/api/export/excel');
+}
+
+async function exportLeads(baseUrl) {
+    // Auswahl als Token (kurze URL, egal wie viele Leads), sonst ganzes Projekt
+    if (selectionSize() === 0 && !state.currentProject) {
         showToast('Keine Leads ausgewählt', 'warning');
         return;
     }
 
-    let url = '/api/export/excel?';
-    if (ids.length > 0) {
-        url += `lead_ids=${ids.join(',')}`;
-    } else if (state.currentProject) {
-        url += `project_id=${state.currentProject}`;
+    let url = `${baseUrl}?`;
+    try {
+        if (selectionSize() > 0) {
+            const selection = await createSelection();
+            url += `selection=${selection.token}`;
+        } else {
+            url += `project_id=${state.currentProject}`;
+        }
+    } catch (error) {
+        showToast(error.message, 'error');
+        return;
     }
 
     window.location.href = url;
@@ -1350,7 +1488,7 @@ function showProgress(title, percent) {
     document.getElementById('progressCurrent').textContent = '';
 }
 
-function updateProgressDetailed(title, percent, count, timeInfo, found, skipped, errors, current, localFound, webFound) {
+function updateProgressDetailed(title, percent, count, timeInfo, found, skipped, errors, current, localFound, webFound, cacheFound) {
     document.getElementById('progressTitle').textContent = title;
     document.getElementById('progressFill').style.width = `${percent}%`;
     document.getElementById('progressCount').textContent = count;
@@ -1359,7 +1497,9 @@ function updateProgressDetailed(title, percent, count, timeInfo, found, skipped,
     // Stats mit Details
     let okText = `OK: ${found}`;
     if (localFound !== undefined && webFound !== undefined) {
-        okText = `OK: ${found} (${localFound}L/${webFound}W)`;
+        okText = cacheFound
+            ? `OK: ${found} (${localFound}L/${cacheFound}C/${webFound}W)`
+            : `OK: ${found} (${localFound}L/${webFound}W)`;
     }
     document.getElementById('statOk').textContent = okText;
     document.getElementById('statSkip').textContent = `Skip: ${skipped}`;
@@ -1718,7 +1858,7 @@ async function findNameForLead() {
                 await new Promise(r => setTimeout(r, 1000));
                 const statusResp = await fetch(`/api/task/${data.task_id}`);
                 result = await statusResp.json();
-                if (result.status === 'completed' || result.status === 'error') break;
+                if (['completed', 'failed', 'cancelled', 'error'].includes(result.status)) break;
             }
 
             if (result && result.status === 'completed') {
@@ -1747,7 +1887,7 @@ async function generateComplimentForLead() {
     if (!state.currentLeadId) return;
 
     // Lead-ID für Kompliment-Generierung setzen
-    state.complimentLeadIds = [state.currentLeadId];
+    state.complimentTarget = state.currentLeadId;
     state.singleLeadMode = true;  // Merken dass wir im Einzel-Modus sind
 
     // Lade Prompts und zeige Modal
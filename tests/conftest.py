@@ -0,0 +1,11 @@
+"""
+Gemeinsames Setup für die Tests
+
+Module liegen flach im Repo-Root; Job-Worker werden beim Import von app.py
+nicht gestartet (Tests brauchen keine Hintergrund-Threads).
+"""
+import os
+import sys
+
+os.environ.setdefault('JOB_WORKERS_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
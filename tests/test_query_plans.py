@@ -0,0 +1,66 @@
+"""
+EXPLAIN QUERY PLAN für die Spezial-Filter der Lead-Liste
+
+Die Filter no_names / no_compliment / complete laufen über die generierte
+Spalte enrichment_state. Stimmen Filter und Indizes nicht mehr überein,
+fällt SQLite still auf einen Table-Scan zurück - das soll hier auffallen.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import load_only
+from werkzeug.datastructures import MultiDict
+
+import app
+from models_v3 import DatabaseV3, CompanyV3
+
+STATE_INDEXES = ('ix_companies_v3_enrichment_state', 'ix_companies_v3_project_state')
+
+
+@pytest.fixture(scope='module')
+def session(tmp_path_factory):
+    db = DatabaseV3(db_path=str(tmp_path_factory.mktemp('db') / 'plans.db'))
+    db.create_all()
+    session = db.get_session()
+    yield session
+    session.close()
+
+
+def _plan(session, query):
+    sql = query.statement.compile(session.bind, compile_kwargs={'literal_binds': True})
+    return [row[3] for row in session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def _lead_query(session, **args):
+    query = session.query(CompanyV3).options(load_only(*app.LEAD_LIST_COLUMNS))
+    return app._apply_lead_filters(query, MultiDict(args))
+
+
+def _assert_no_table_scan(plan):
+    assert not any(step.startswith('SCAN companies_v3') for step in plan), plan
+
+
+@pytest.mark.parametrize('project_id', [None, '1'])
+@pytest.mark.parametrize('filter_type', ['no_names', 'no_compliment', 'complete'])
+def test_special_filter_uses_state_index(session, filter_type, project_id):
+    args = {'filter': filter_type}
+    if project_id:
+        args['project_id'] = project_id
+    # Gefilterte Menge wie beim Zählen (get_leads ohne project_stats-Treffer)
+    query = _lead_query(session, **args).with_entities(CompanyV3.id).order_by(None)
+
+    plan = _plan(session, query)
+    assert any(index in step for step in plan for index in STATE_INDEXES), plan
+    _assert_no_table_scan(plan)
+
+
+@pytest.mark.parametrize('project_id', [None, '1'])
+@pytest.mark.parametrize('filter_type', ['no_names', 'no_compliment', 'complete'])
+def test_special_filter_page_without_table_scan(session, filter_type, project_id):
+    args = {'filter': filter_type}
+    if project_id:
+        args['project_id'] = project_id
+    # Seite wie get_leads (Keyset nach id): mit Projekt darf SQLite den
+    # project_id-Index in id-Reihenfolge nehmen und nach 51 Zeilen aufhören
+    query = _lead_query(session, **args).order_by(CompanyV3.id).limit(51)
+
+    _assert_no_table_scan(_plan(session, query))